@@ -5,8 +5,9 @@ set -o errexit
 # Modify this line as needed for your package manager (pip, poetry, etc.)
 pip install -r requirements.txt
 
-# Convert static asset files
-python manage.py collectstatic --no-input
+# Collect the referenced static files, hashed and compressed
+python manage.py collectstatic --no-input --clear
+python manage.py asset_report
 
 # Apply any outstanding database migrations
 python manage.py migrate
@@ -0,0 +1,630 @@
+import json
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.views import View
+
+from kitchen import (
+    counters,
+    fragments,
+    ingredient_sets,
+    live,
+    menu_cards,
+    tickets,
+)
+from kitchen.bulk import bulk_set_m2m
+from kitchen.ingredient_filters import filter_dishes
+from kitchen.mixins import GroupRequiredMixin
+from kitchen.models import Cook, Dish, DishType, Ingredient, OrderTicket
+from kitchen.pagination import CursorPaginator, InvalidCursor
+
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.errors = errors
+
+
+def parse_ids(value, name="ids"):
+    try:
+        return [int(pk) for pk in value.split(",") if pk]
+    except ValueError:
+        raise ApiError(f"{name} must be a comma separated list of integers")
+
+
+# The database's own message names tables and constraints
+CONFLICT_MESSAGE = "Conflicts with existing data"
+
+
+def is_id(value):
+    # bool is an int subclass, but never a primary key
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Column:
+    writable = True
+
+    def __init__(self, name, writable=True):
+        self.name = name
+        self.writable = writable
+
+    def plan(self, model, plan):
+        plan["only"].add(self.name)
+
+    def read(self, obj):
+        return getattr(obj, self.name)
+
+    def write(self, obj, value):
+        field = obj._meta.get_field(self.name)
+        try:
+            setattr(obj, self.name, field.to_python(value))
+        except ValidationError as error:
+            raise ApiError(error.messages[0])
+
+
+class ForeignKeyId(Column):
+    def plan(self, model, plan):
+        plan["only"].add(self.name)
+
+    def read(self, obj):
+        return getattr(obj, f"{self.name}_id")
+
+    def write(self, obj, value):
+        if value is not None and not is_id(value):
+            raise ApiError(f"{self.name} must be an integer id or null")
+        setattr(obj, f"{self.name}_id", value)
+
+    def targets(self, model):
+        return model._meta.get_field(self.name).related_model
+
+
+class RelatedValue(Column):
+    """A column of a ``ForeignKey`` target, loaded with select_related."""
+
+    def __init__(self, relation, attribute):
+        super().__init__(f"{relation}_{attribute}", writable=False)
+        self.relation = relation
+        self.attribute = attribute
+
+    def plan(self, model, plan):
+        plan["only"].add(f"{self.relation}__{self.attribute}")
+        plan["select_related"].add(self.relation)
+
+    def read(self, obj):
+        return getattr(getattr(obj, self.relation), self.attribute)
+
+
+class ManyIds(Column):
+    """Primary keys of a to-many relation, loaded with prefetch_related."""
+
+    def plan(self, model, plan):
+        relation = model._meta.get_field(self.name)
+        only = ["pk"]
+        if relation.one_to_many:
+            only.append(relation.field.attname)
+        plan["prefetch_related"].append(Prefetch(
+            self.name,
+            queryset=relation.related_model.objects.only(*only).order_by()
+        ))
+
+    def read(self, obj):
+        return sorted(related.pk for related in getattr(obj, self.name).all())
+
+    def clean(self, value):
+        if not isinstance(value, list) or not all(map(is_id, value)):
+            raise ApiError(f"{self.name} must be a list of integer ids")
+        return value
+
+    def targets(self, model):
+        return model._meta.get_field(self.name).related_model
+
+
+class Resource:
+    model = None
+    fields = {}
+    default_fields = []
+    write_groups = ["employee", "manager"]
+
+    def plan_queryset(self, field_names):
+        plan = {
+            "only": {"pk"},
+            "select_related": set(),
+            "prefetch_related": [],
+        }
+        for name in field_names:
+            self.fields[name].plan(self.model, plan)
+        queryset = self.model.objects.only(*plan["only"])
+        if plan["select_related"]:
+            queryset = queryset.select_related(*plan["select_related"])
+        if plan["prefetch_related"]:
+            queryset = queryset.prefetch_related(*plan["prefetch_related"])
+        return queryset
+
+    def filter_queryset(self, queryset, params):
+        return queryset
+
+    def serialize(self, obj, field_names):
+        return {name: self.fields[name].read(obj) for name in field_names}
+
+    def new_instance(self, data):
+        return self.model()
+
+    def clean_instance(self, obj, exclude):
+        obj.full_clean(
+            exclude=exclude, validate_unique=False, validate_constraints=False
+        )
+
+
+class DishTypeResource(Resource):
+    model = DishType
+    fields = {
+        "id": Column("id", writable=False),
+        "name": Column("name"),
+        "dishes": ManyIds("dishes", writable=False),
+    }
+    default_fields = ["id", "name"]
+
+
+class DishResource(Resource):
+    model = Dish
+    fields = {
+        "id": Column("id", writable=False),
+        "name": Column("name"),
+        "description": Column("description"),
+        "price": Column("price"),
+        "dishtype": ForeignKeyId("dishtype"),
+        "dishtype_name": RelatedValue("dishtype", "name"),
+        "cooks": ManyIds("cooks"),
+        "ingredients": ManyIds("ingredients"),
+    }
+    default_fields = ["id", "name", "price", "dishtype"]
+
+    def filter_queryset(self, queryset, params):
+        """``with_ingredients`` needs all of the ids, ``without`` none."""
+        include = parse_ids(
+            params.get("with_ingredients", ""), "with_ingredients"
+        )
+        exclude = parse_ids(
+            params.get("without_ingredients", ""), "without_ingredients"
+        )
+        return filter_dishes(queryset, [{pk} for pk in include], exclude)
+
+
+class IngredientResource(Resource):
+    model = Ingredient
+    fields = {
+        "id": Column("id", writable=False),
+        "name": Column("name"),
+        "dishes": ManyIds("dishes"),
+    }
+    default_fields = ["id", "name"]
+
+
+class CookResource(Resource):
+    model = Cook
+    fields = {
+        "id": Column("id", writable=False),
+        "username": Column("username"),
+        "first_name": Column("first_name"),
+        "last_name": Column("last_name"),
+        "years_of_experience": Column("years_of_experience"),
+        "dishes": ManyIds("dishes"),
+    }
+    default_fields = ["id", "username", "first_name", "last_name"]
+    write_groups = ["manager"]
+
+    def new_instance(self, data):
+        password = data.pop("password", None)
+        if not password:
+            raise ApiError("password is required to create a cook")
+        return self.model(password=make_password(password))
+
+    def clean_instance(self, obj, exclude):
+        super().clean_instance(obj, exclude + ["password", "last_login"])
+
+
+class OrderTicketResource(Resource):
+    model = OrderTicket
+    fields = {
+        "id": Column("id", writable=False),
+        "dish": ForeignKeyId("dish"),
+        "dish_name": RelatedValue("dish", "name"),
+        "quantity": Column("quantity"),
+        "note": Column("note"),
+        "status": Column("status", writable=False),
+        "cook": ForeignKeyId("cook", writable=False),
+        "station": Column("station", writable=False),
+        "created_at": Column("created_at", writable=False),
+        "claimed_at": Column("claimed_at", writable=False),
+        "done_at": Column("done_at", writable=False),
+    }
+    default_fields = [
+        "id", "dish", "dish_name", "quantity", "note", "status", "station",
+    ]
+
+    def filter_queryset(self, queryset, params):
+        status = params.get("status")
+        if status:
+            if status not in dict(OrderTicket.STATUS_CHOICES):
+                raise ApiError(f"Unknown status: {status}")
+            queryset = queryset.filter(status=status)
+        return queryset
+
+
+class ResourceApiView(GroupRequiredMixin, View):
+    """
+    Reads are open to any signed-in user, like the HTML list and detail
+    views. Writes need the same groups as the matching create views.
+    """
+    resource = None
+    # Groups allowed to write, the resource's write_groups when unset
+    write_groups = None
+
+    def dispatch(self, request, *args, **kwargs):
+        self.resource = self.resource()
+        self.group_required = self.write_groups or self.resource.write_groups
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        if (request.method not in SAFE_METHODS
+                and not self.has_group_permission(request.user)):
+            return self.handle_no_permission()
+        try:
+            # Group checks are done above, skip GroupRequiredMixin.dispatch
+            return super(GroupRequiredMixin, self).dispatch(
+                request, *args, **kwargs
+            )
+        except ApiError as error:
+            body = {"error": str(error)}
+            if error.errors:
+                body["errors"] = error.errors
+            return JsonResponse(body, status=error.status)
+
+    def handle_no_permission(self):
+        if self.request.user.is_authenticated:
+            return JsonResponse({"error": "Permission denied."}, status=403)
+        return JsonResponse(
+            {"error": "Authentication required."}, status=401
+        )
+
+    def get_field_names(self):
+        requested = self.request.GET.get("fields")
+        if not requested:
+            return list(self.resource.default_fields)
+        names = [name for name in requested.split(",") if name]
+        unknown = [name for name in names if name not in self.resource.fields]
+        if unknown:
+            raise ApiError(f"Unknown fields: {', '.join(unknown)}")
+        return names
+
+    def get_ids(self, value):
+        return parse_ids(value)
+
+
+def error_dict(error):
+    """Problems of one object by field, like ``ValidationError``."""
+    return error.errors or {NON_FIELD_ERRORS: [str(error)]}
+
+
+class ResourceCollectionView(ResourceApiView):
+    def get(self, request):
+        field_names = self.get_field_names()
+        queryset = self.resource.filter_queryset(
+            self.resource.plan_queryset(field_names), request.GET
+        )
+
+        if "ids" in request.GET:
+            ids = self.get_ids(request.GET["ids"])
+            if len(ids) > MAX_LIMIT:
+                raise ApiError(f"At most {MAX_LIMIT} ids per request")
+            objects = queryset.filter(pk__in=ids)
+            return JsonResponse({
+                "results": [
+                    self.resource.serialize(obj, field_names)
+                    for obj in objects
+                ],
+                "next": None,
+            })
+
+        try:
+            limit = min(int(request.GET.get("limit", DEFAULT_LIMIT)),
+                        MAX_LIMIT)
+        except ValueError:
+            raise ApiError("limit must be an integer")
+        try:
+            page = CursorPaginator(queryset, max(limit, 1)).page(
+                request.GET.get("cursor")
+            )
+        except InvalidCursor:
+            raise ApiError("Invalid cursor")
+        return JsonResponse({
+            "results": [
+                self.resource.serialize(obj, field_names) for obj in page
+            ],
+            "next": page.next_cursor,
+        })
+
+    def post(self, request):
+        rows = self.load_rows()
+        objects = []
+        relations = {}
+        errors = {}
+        for index, data in enumerate(rows):
+            obj = None
+            try:
+                obj = self.resource.new_instance(data)
+                relations[index] = self.apply(obj, data)
+            except ApiError as error:
+                errors[index] = error_dict(error)
+            objects.append(obj)
+        self.validate(objects, rows, errors)
+
+        try:
+            with transaction.atomic():
+                created = self.resource.model.objects.bulk_create(objects)
+                self.write_relations(created, relations)
+        except IntegrityError:
+            raise ApiError(CONFLICT_MESSAGE, status=409)
+        # bulk_create() sends no post_save
+        counter = counters.counter_name(self.resource.model)
+        if counter:
+            counters.adjust(counter, len(created))
+        fragments.bump(self.resource.model._meta.model_name)
+        menu_cards.refresh_for(
+            self.resource.model, [obj.pk for obj in created]
+        )
+        live.publish_for(self.resource.model, [obj.pk for obj in created])
+
+        field_names = self.get_field_names()
+        return JsonResponse({
+            "results": [
+                self.resource.serialize(obj, field_names)
+                for obj in self.resource.plan_queryset(field_names).filter(
+                    pk__in=[obj.pk for obj in created]
+                )
+            ],
+        }, status=201)
+
+    def patch(self, request):
+        rows = self.load_rows()
+        ids = [data.pop("id", None) for data in rows]
+        if not all(is_id(pk) for pk in ids):
+            raise ApiError("Every object needs an integer id")
+        existing = self.resource.model.objects.in_bulk(ids)
+        missing = [pk for pk in ids if pk not in existing]
+        if missing:
+            raise ApiError(f"Unknown ids: {missing}", status=404)
+
+        objects = []
+        relations = {}
+        changed_fields = set()
+        errors = {}
+        for index, (pk, data) in enumerate(zip(ids, rows)):
+            obj = existing[pk]
+            try:
+                relations[index] = self.apply(obj, data)
+            except ApiError as error:
+                errors[index] = error_dict(error)
+            else:
+                changed_fields.update(
+                    self.resource.fields[name].name for name in data
+                    if name not in relations[index]
+                )
+            objects.append(obj)
+        self.validate(objects, rows, errors)
+
+        try:
+            with transaction.atomic():
+                if changed_fields:
+                    # bulk_update() skips auto_now, set it explicitly
+                    now = timezone.now()
+                    for obj in objects:
+                        obj.updated_at = now
+                    self.resource.model.objects.bulk_update(
+                        objects, sorted(changed_fields | {"updated_at"})
+                    )
+                self.write_relations(objects, relations)
+        except IntegrityError:
+            raise ApiError(CONFLICT_MESSAGE, status=409)
+        if changed_fields:
+            fragments.bump(self.resource.model._meta.model_name)
+            menu_cards.refresh_for(self.resource.model, ids)
+            live.publish_for(self.resource.model, ids)
+
+        field_names = self.get_field_names()
+        return JsonResponse({
+            "results": [
+                self.resource.serialize(obj, field_names)
+                for obj in self.resource.plan_queryset(field_names).filter(
+                    pk__in=ids
+                )
+            ],
+        })
+
+    def load_rows(self):
+        try:
+            rows = json.loads(self.request.body)
+        except ValueError:
+            raise ApiError("Request body must be JSON")
+        if not isinstance(rows, list) or not all(
+            isinstance(row, dict) for row in rows
+        ):
+            raise ApiError("Request body must be a list of objects")
+        if len(rows) > MAX_LIMIT:
+            raise ApiError(f"At most {MAX_LIMIT} objects per request")
+        return rows
+
+    def apply(self, obj, data):
+        """
+        Write ``data`` to ``obj`` and return the relation ids to set, or
+        raise ApiError with the problem of every field that cannot be.
+        """
+        relations = {}
+        problems = {}
+        for name, value in data.items():
+            field = self.resource.fields.get(name)
+            try:
+                if field is None or not field.writable:
+                    raise ApiError(f"{name} is not writable")
+                if isinstance(field, ManyIds):
+                    relations[name] = field.clean(value)
+                else:
+                    field.write(obj, value)
+            except ApiError as error:
+                problems[name] = [str(error)]
+        if problems:
+            raise ApiError("Invalid fields", errors=problems)
+        return relations
+
+    def validate(self, objects, rows, errors):
+        """Validate foreign keys and relation ids with one query each."""
+        model = self.resource.model
+        for name, field in self.resource.fields.items():
+            if not isinstance(field, (ForeignKeyId, ManyIds)):
+                continue
+            wanted = {}
+            for index, data in enumerate(rows):
+                value = data.get(name)
+                values = value if isinstance(value, list) else [value]
+                # Malformed values were reported by apply()
+                wanted[index] = [pk for pk in values if is_id(pk)]
+            pks = {pk for values in wanted.values() for pk in values}
+            if not pks:
+                continue
+            found = set(
+                field.targets(model).objects.filter(
+                    pk__in=pks
+                ).values_list("pk", flat=True)
+            )
+            for index, values in wanted.items():
+                unknown = [pk for pk in values if pk not in found]
+                if unknown:
+                    errors.setdefault(index, {})[name] = [
+                        f"Unknown {name}: {unknown}"
+                    ]
+
+        exclude = [
+            field.name for field in self.resource.fields.values()
+            if isinstance(field, (ForeignKeyId, ManyIds))
+        ]
+        for index, obj in enumerate(objects):
+            if obj is None or index in errors:
+                continue
+            try:
+                self.resource.clean_instance(obj, exclude)
+            except ValidationError as error:
+                errors[index] = error.message_dict
+        if errors:
+            raise ApiError("Invalid objects", errors=errors)
+
+    def write_relations(self, objects, relations):
+        names = {name for changes in relations.values() for name in changes}
+        for name in names:
+            targets = {
+                obj.pk: relations[index][name]
+                for index, obj in enumerate(objects)
+                if name in relations.get(index, {})
+            }
+            bulk_set_m2m(objects, name, targets)
+
+
+class ResourceDetailView(ResourceApiView):
+    def get(self, request, pk):
+        field_names = self.get_field_names()
+        obj = get_object_or_404(
+            self.resource.plan_queryset(field_names), pk=pk
+        )
+        return JsonResponse(self.resource.serialize(obj, field_names))
+
+
+class StockMatchApiView(ResourceApiView):
+    """
+    ``GET ?ingredients=1,2,3&max_missing=1`` lists the dishes that can be
+    cooked from those ingredients, fewest missing ingredients first.
+    """
+    resource = DishResource
+
+    def get(self, request):
+        stock = parse_ids(request.GET.get("ingredients", ""), "ingredients")
+        try:
+            max_missing = int(request.GET.get("max_missing", 0))
+            limit = min(int(request.GET.get("limit", DEFAULT_LIMIT)),
+                        MAX_LIMIT)
+        except ValueError:
+            raise ApiError("max_missing and limit must be integers")
+        if not 0 <= max_missing <= ingredient_sets.MAX_MISSING:
+            raise ApiError(
+                f"max_missing must be between 0 and "
+                f"{ingredient_sets.MAX_MISSING}"
+            )
+        field_names = self.get_field_names()
+        matches = ingredient_sets.match(stock, max_missing)[:max(limit, 1)]
+        objects = self.resource.plan_queryset(field_names).in_bulk(
+            [found.dish_id for found in matches]
+        )
+        return JsonResponse({
+            "results": [
+                dict(
+                    self.resource.serialize(objects[found.dish_id],
+                                            field_names),
+                    missing_ingredients=found.missing,
+                )
+                for found in matches
+                # Deleted since the index was last refreshed
+                if found.dish_id in objects
+            ],
+        })
+
+
+class TicketActionView(ResourceApiView):
+    """
+    ``POST {"station": "grill", "limit": 2}`` to ``claim/`` takes the
+    oldest queued tickets, ``{"ids": [...]}`` to ``done/`` or ``release/``
+    finishes or requeues tickets of the signed in cook.
+    """
+    resource = OrderTicketResource
+    write_groups = ["trainee", "employee", "manager"]
+    action = None
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            raise ApiError("Request body must be JSON")
+        if not isinstance(data, dict):
+            raise ApiError("Request body must be an object")
+        if self.action == "claim":
+            return self.claim(request, data)
+        ids = data.get("ids")
+        if not isinstance(ids, list) or not all(map(is_id, ids)):
+            raise ApiError("ids must be a list of integers")
+        if self.action == "done":
+            count = tickets.complete(request.user, ids)
+        else:
+            count = tickets.release(request.user, ids)
+        return JsonResponse({"updated": count})
+
+    def claim(self, request, data):
+        station = data.get("station", "")
+        limit = data.get("limit", 1)
+        if not isinstance(station, str) or len(station) > 64:
+            raise ApiError("station must be a string of at most 64 chars")
+        if not isinstance(limit, int) or limit < 1:
+            raise ApiError("limit must be a positive integer")
+        field_names = self.get_field_names()
+        return JsonResponse({
+            "results": [
+                self.resource.serialize(ticket, field_names)
+                for ticket in tickets.claim(request.user, station, limit)
+            ],
+        })
@@ -0,0 +1,232 @@
+"""
+The static files the templates use, for a lean ``collectstatic``.
+
+The Pixel theme ships about 20 MB of assets, of which the pages load a
+handful. ``referenced_assets`` reads every template for literal
+``{% static '...' %}`` paths and follows the stylesheets and scripts
+those name through ``url()``, ``@import`` and ``sourceMappingURL``, the
+same references the manifest storage rewrites. The pruning finders only
+list what it found, for the project ``static/`` tree and the theme app,
+so ``collectstatic`` copies, hashes and compresses nothing else. Finding
+a single file stays unrestricted, so ``runserver`` serves everything.
+
+Paths built at runtime (``{% static variable %}``, JavaScript) are not
+seen; name them in ``KITCHEN_EXTRA_STATIC``.
+"""
+import fnmatch
+import functools
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import unquote, urldefrag
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders, utils
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.template.utils import get_app_template_dirs
+from whitenoise.compress import Compressor, brotli_installed
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+STATIC_TAG = re.compile(r"""{%\s*static\s+(['"])(?P<path>[^'"]+)\1""")
+TEMPLATE_TAG = re.compile(
+    r"""{%\s*(?:extends|include)\s+(['"])(?P<name>[^'"]+)\1"""
+)
+# Theme parts, never rendered on their own
+PARTIAL_DIRS = ("includes/", "layouts/", "components/")
+
+
+def _compile_patterns():
+    compiled = []
+    for extension, patterns in ManifestStaticFilesStorage.patterns:
+        for pattern in patterns:
+            if isinstance(pattern, (tuple, list)):
+                pattern = pattern[0]
+            compiled.append(
+                (extension, re.compile(pattern, re.IGNORECASE))
+            )
+    return compiled
+
+
+ASSET_PATTERNS = _compile_patterns()
+
+
+def project_template_dirs():
+    dirs = []
+    for engine in settings.TEMPLATES:
+        dirs.extend(Path(path) for path in engine.get("DIRS", ()))
+    return dirs
+
+
+def template_sources(dirs=None):
+    """``(name, text)`` of every template file, earlier dirs first."""
+    if dirs is None:
+        dirs = project_template_dirs() + list(
+            get_app_template_dirs("templates")
+        )
+    seen = set()
+    for directory in dirs:
+        for path in sorted(Path(directory).rglob("*.html")):
+            name = path.relative_to(directory).as_posix()
+            if name not in seen:
+                seen.add(name)
+                yield name, path.read_text(encoding="utf-8")
+
+
+def asset_references(path, text):
+    """The static paths the stylesheet or script ``path`` points at."""
+    found = set()
+    for extension, pattern in ASSET_PATTERNS:
+        if not fnmatch.fnmatchcase(path, extension):
+            continue
+        for match in pattern.finditer(text):
+            url = match.group("url").strip()
+            if re.match(r"^[a-z]+:", url) or url.startswith("//"):
+                continue
+            url = urldefrag(url)[0].split("?")[0]
+            if not url:
+                continue
+            if url.startswith("/"):
+                if not url.startswith(settings.STATIC_URL):
+                    continue
+                target = url[len(settings.STATIC_URL):]
+            else:
+                target = posixpath.join(posixpath.dirname(path), url)
+            found.add(posixpath.normpath(unquote(target)))
+    return found
+
+
+def _follow(paths):
+    """``paths`` and every existing asset they reference, recursively."""
+    found = set()
+    pending = list(paths)
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        source = finders.find(path)
+        if source is None:
+            continue
+        found.add(path)
+        if path.endswith((".css", ".js")):
+            text = Path(source).read_text(encoding="utf-8", errors="ignore")
+            pending.extend(asset_references(path, text))
+    return found
+
+
+@functools.lru_cache(maxsize=None)
+def referenced_assets():
+    """Every static path a template loads, directly or through CSS/JS."""
+    paths = set(getattr(settings, "KITCHEN_EXTRA_STATIC", ()))
+    for _, text in template_sources():
+        paths.update(match["path"] for match in STATIC_TAG.finditer(text))
+    return frozenset(_follow(paths))
+
+
+class PrunedFileSystemFinder(finders.FileSystemFinder):
+    """Lists only the referenced files of ``STATICFILES_DIRS``."""
+
+    def list(self, ignore_patterns):
+        wanted = referenced_assets()
+        for path, storage in super().list(ignore_patterns):
+            if path in wanted:
+                yield path, storage
+
+
+class PrunedAppDirectoriesFinder(finders.AppDirectoriesFinder):
+    """
+    Lists only the referenced files of the apps in
+    ``KITCHEN_PRUNED_STATIC_APPS``; other apps (the admin) keep all.
+    """
+
+    def list(self, ignore_patterns):
+        pruned = set(getattr(settings, "KITCHEN_PRUNED_STATIC_APPS", ()))
+        wanted = referenced_assets()
+        for app, storage in self.storages.items():
+            if not storage.exists(""):
+                continue
+            for path in utils.get_files(storage, ignore_patterns):
+                if app not in pruned or path in wanted:
+                    yield path, storage
+
+
+class CompressedManifestStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed names and gzip/brotli copies, from WhiteNoise. Theme scripts
+    point at source maps they do not ship; those comments are dropped
+    rather than failing the build. Other missing references still fail.
+    """
+
+    def url_converter(self, name, hashed_files, template=None):
+        converter = super().url_converter(name, hashed_files, template)
+
+        def convert(matchobj):
+            try:
+                return converter(matchobj)
+            except ValueError:
+                if "sourceMappingURL" in matchobj["matched"]:
+                    return ""
+                raise
+
+        return convert
+
+
+def _page_references(name, sources, seen):
+    text = sources.get(name)
+    if text is None or name in seen:
+        return set()
+    seen.add(name)
+    paths = {match["path"] for match in STATIC_TAG.finditer(text)}
+    for match in TEMPLATE_TAG.finditer(text):
+        paths |= _page_references(match["name"], sources, seen)
+    return paths
+
+
+def page_assets():
+    """
+    ``{template: static paths}`` for each page of the project and the
+    pruned apps, with its layout and includes. Every branch of an
+    ``{% if %}`` is counted.
+    """
+    sources = dict(template_sources())
+    pruned = set(getattr(settings, "KITCHEN_PRUNED_STATIC_APPS", ()))
+    page_dirs = project_template_dirs() + [
+        Path(app.path) / "templates"
+        for app in apps.get_app_configs() if app.name in pruned
+    ]
+    return {
+        name: _page_references(name, sources, set())
+        for name, _ in template_sources(page_dirs)
+        if not name.startswith(PARTIAL_DIRS)
+        and not posixpath.basename(name).startswith("_")
+    }
+
+
+def _shipped(compressor, path, data, compress):
+    """Bytes sent for ``data`` by WhiteNoise, which keeps useful copies."""
+    if not compressor.should_compress(path):
+        return len(data)
+    compressed = compress(data)
+    if compressor.is_compressed_effectively("", path, len(data), compressed):
+        return len(compressed)
+    return len(data)
+
+
+@functools.lru_cache(maxsize=None)
+def asset_size(path):
+    """
+    ``(raw, gzip, brotli)`` bytes sent for ``path``; brotli is None
+    without the Brotli package, ``None`` for a missing file.
+    """
+    source = finders.find(path)
+    if source is None:
+        return None
+    data = Path(source).read_bytes()
+    compressor = Compressor(quiet=True)
+    return (
+        len(data),
+        _shipped(compressor, path, data, compressor.compress_gzip),
+        _shipped(compressor, path, data, compressor.compress_brotli)
+        if brotli_installed else None,
+    )
@@ -0,0 +1,246 @@
+"""
+Balanced dish-to-cook assignment.
+
+A dish weighs one plus its number of ingredients. A cook's share of the
+work grows with experience, ``1 + EXPERIENCE_WEIGHT * years`` capped at
+``MAX_EXPERIENCE`` years. Dishes are placed heaviest first on the cooks
+whose load relative to their share is lowest (longest processing time
+first), which keeps the busiest cook within 4/3 of the best possible
+balance. Cooks already on a dish get a head start of ``STICKINESS`` times
+its weight, so that planning again on a balanced menu moves little.
+
+Cooks outside the plan (inactive, or not in the groups planned for) lose
+the dishes the plan changes. The plan lists them as ``dropped`` so that
+they can be shown before and after applying it. Its ``digest`` lets a
+preview be applied only while the kitchen still plans the same way.
+"""
+import hashlib
+import json
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+import numpy as np
+
+from kitchen import fragments, live, menu_cards
+from kitchen.bulk import bulk_set_m2m
+from kitchen.models import Cook, Dish
+
+
+EXPERIENCE_WEIGHT = 0.1
+MAX_EXPERIENCE = 30
+STICKINESS = 0.5
+
+
+def eligible_cooks(groups=None):
+    """Active cooks, of ``groups`` when given. Superusers only manage."""
+    cooks = Cook.objects.filter(is_active=True, is_superuser=False)
+    if groups:
+        cooks = cooks.filter(groups__name__in=groups).distinct()
+    return cooks
+
+
+def capacities(years):
+    years = np.array(
+        [value or 0 for value in years], dtype=np.float64
+    ).clip(0, MAX_EXPERIENCE)
+    return 1 + EXPERIENCE_WEIGHT * years
+
+
+def balance(weights, capacity, cooks_per_dish=1, current=None,
+            stickiness=STICKINESS):
+    """
+    Assign ``cooks_per_dish`` distinct cooks to every dish.
+
+    ``weights`` and ``capacity`` are per dish and per cook, ``current``
+    maps a dish index to the indexes of the cooks on it now. Returns an
+    ``(dishes, cooks_per_dish)`` array of cook indexes and the load of
+    every cook.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    capacity = np.asarray(capacity, dtype=np.float64)
+    per_dish = min(cooks_per_dish, len(capacity))
+    chosen = np.empty((len(weights), per_dish), dtype=np.intp)
+    loads = np.zeros(len(capacity))
+    current = current or {}
+    for dish in np.argsort(-weights, kind="stable"):
+        weight = weights[dish]
+        score = (loads + weight) / capacity
+        kept = current.get(dish)
+        if kept is not None and len(kept):
+            score[kept] -= stickiness * weight / capacity[kept]
+        if per_dish < len(capacity):
+            picked = np.argpartition(score, per_dish - 1)[:per_dish]
+        else:
+            picked = np.arange(per_dish)
+        loads[picked] += weight
+        chosen[dish] = picked
+    return chosen, loads
+
+
+class CookLoad:
+    def __init__(self, pk, username, years_of_experience, capacity):
+        self.pk = pk
+        self.username = username
+        self.years_of_experience = years_of_experience
+        self.capacity = capacity
+        self.current_dishes = 0
+        self.current_load = 0.0
+        self.planned_dishes = 0
+        self.planned_load = 0.0
+
+    @property
+    def current_share(self):
+        return self.current_load / self.capacity
+
+    @property
+    def planned_share(self):
+        return self.planned_load / self.capacity
+
+
+class DroppedCook:
+    """A cook outside the plan who is on ``dishes`` of the changed dishes."""
+
+    def __init__(self, pk, username, dishes):
+        self.pk = pk
+        self.username = username
+        self.dishes = dishes
+
+
+class AssignmentPlan:
+    def __init__(self, targets, current, cooks):
+        self.targets = targets
+        self.current = current
+        self.cooks = cooks
+        self.dropped = self._dropped()
+
+    @property
+    def changed(self):
+        """Dish pks whose cooks differ from today."""
+        return [
+            pk for pk, cook_pks in self.targets.items()
+            if set(cook_pks) != self.current.get(pk, set())
+        ]
+
+    @property
+    def digest(self):
+        """Fingerprint of the cooks, today's dishes and the targets."""
+        payload = json.dumps([
+            [cook.pk for cook in self.cooks],
+            sorted((pk, sorted(cook_pks)) for pk, cook_pks in
+                   self.current.items()),
+            sorted(self.targets.items()),
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _dropped(self):
+        planned = {cook.pk for cook in self.cooks}
+        dishes = {}
+        for dish_pk in self.changed:
+            for cook_pk in self.current.get(dish_pk, ()):
+                if cook_pk not in planned:
+                    dishes[cook_pk] = dishes.get(cook_pk, 0) + 1
+        if not dishes:
+            return []
+        return [
+            DroppedCook(pk, username, dishes[pk])
+            for pk, username in Cook.objects.filter(pk__in=dishes)
+            .order_by("pk").values_list("pk", "username")
+        ]
+
+    def _spread(self, shares):
+        """Busiest over average cook, by load relative to share."""
+        if not shares or not sum(shares):
+            return 1.0
+        return max(shares) / (sum(shares) / len(shares))
+
+    @property
+    def spread_current(self):
+        return self._spread([cook.current_share for cook in self.cooks])
+
+    @property
+    def spread_planned(self):
+        return self._spread([cook.planned_share for cook in self.cooks])
+
+
+def plan(cooks_per_dish=1, cooks=None):
+    """Compute a balanced assignment without writing anything."""
+    cooks = list(
+        (cooks if cooks is not None else eligible_cooks())
+        .order_by("pk")
+        .values_list("pk", "username", "years_of_experience")
+    )
+    dishes = list(
+        Dish.objects.order_by("pk")
+        .annotate(ingredient_count=Count("ingredients"))
+        .values_list("pk", "ingredient_count")
+    )
+    current = {}
+    for dish_pk, cook_pk in Dish.cooks.through.objects.values_list(
+        "dish_id", "cook_id"
+    ):
+        current.setdefault(dish_pk, set()).add(cook_pk)
+
+    capacity = capacities([years for _pk, _name, years in cooks])
+    loads = [
+        CookLoad(pk, username, years, share)
+        for (pk, username, years), share in zip(cooks, capacity.tolist())
+    ]
+    if not cooks or not dishes:
+        return AssignmentPlan({}, current, loads)
+
+    cook_index = {pk: index for index, (pk, _n, _y) in enumerate(cooks)}
+    weights = np.array([1 + count for _pk, count in dishes], dtype=np.float64)
+    current_index = {}
+    for index, (dish_pk, _count) in enumerate(dishes):
+        kept = [
+            cook_index[pk] for pk in current.get(dish_pk, ())
+            if pk in cook_index
+        ]
+        if kept:
+            current_index[index] = np.array(kept, dtype=np.intp)
+            for cook in kept:
+                loads[cook].current_dishes += 1
+                loads[cook].current_load += weights[index]
+
+    chosen, planned = balance(weights, capacity, cooks_per_dish,
+                              current_index)
+    counts = np.bincount(chosen.ravel(), minlength=len(cooks))
+    for cook, load, count in zip(loads, planned.tolist(), counts.tolist()):
+        cook.planned_load = load
+        cook.planned_dishes = count
+    cook_pks = np.array([pk for pk, _n, _y in cooks])
+    targets = {
+        dish_pk: sorted(cook_pks[row].tolist())
+        for (dish_pk, _count), row in zip(dishes, chosen)
+    }
+    return AssignmentPlan(targets, current, loads)
+
+
+def apply(assignment):
+    """
+    Rewrite ``Dish.cooks`` to the plan with one diff of the through table,
+    the cooks in ``assignment.dropped`` lose their dishes. Returns the pks
+    of the dishes that changed.
+    """
+    changed = assignment.changed
+    if not changed:
+        return []
+    with transaction.atomic():
+        added, removed = bulk_set_m2m(
+            [Dish(pk=pk) for pk in changed], "cooks",
+            {pk: assignment.targets[pk] for pk in changed},
+            send_signals=False,
+        )
+        # What the per-dish m2m_changed receivers would do, once
+        now = timezone.now()
+        touched = set()
+        for changes in (added, removed):
+            for pks in changes.values():
+                touched.update(pks)
+        Dish.objects.filter(pk__in=changed).update(updated_at=now)
+        Cook.objects.filter(pk__in=touched).update(updated_at=now)
+        menu_cards.refresh(changed)
+        live.publish("assignment", touched, changed)
+    fragments.bump("dish", "cook")
+    return changed
@@ -0,0 +1,158 @@
+"""
+Async twins of the read views, for deployments served through ASGI.
+
+Each view subclasses its sync counterpart and only replaces the parts
+that query: the conditional GET state, the page or object, and the
+lookups made while building the context are awaited with the async ORM
+(``aaggregate``, ``aget``, ``async for``) before the inherited, query-free
+``get_context_data`` runs. Templates render in Django's sync thread as
+``TemplateResponse``, just like the sync views.
+"""
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import aget_object_or_404
+from django.template.response import TemplateResponse
+from django.utils.cache import get_conditional_response
+
+from kitchen import counters, visits
+from kitchen.group_cache import aget_user_groups
+from kitchen.ingredient_filters import aresolve_names, split_names
+from kitchen.mixins import AsyncLoginRequiredMixin
+from kitchen.pagination import apaginate_by_cursor
+from kitchen.views import (
+    DishTypeListView,
+    DishTypeDetailView,
+    DishListView,
+    DishDetailView,
+    IngredientListView,
+    IngredientDetailView,
+    CookListView,
+    CookDetailView,
+)
+
+
+@login_required
+async def index(request):
+    # Templates read request.user, resolve it without a sync query
+    request.user = await request.auser()
+    counts = await counters.aget_counts()
+
+    carried = await request.session.apop("num_visits", 0)
+    num_visits = await visits.arecord(request.user, carried)
+
+    context = {
+        "num_cooks": counts["cooks"],
+        "num_dishes": counts["dishes"],
+        "num_dishtypes": counts["dishtypes"],
+        "num_ingredients": counts["ingredients"],
+        "num_visits": num_visits,
+    }
+
+    return TemplateResponse(request, "kitchen/index.html", context)
+
+
+class AsyncConditionalGetMixin(AsyncLoginRequiredMixin):
+    """Answers conditional requests like ConditionalGetMixin, awaited."""
+
+    async def aprepare(self):
+        """Run the queries ``get_queryset`` would otherwise make."""
+
+    async def aconditional_response(self, request, render):
+        """
+        304 when the client's copy is current, else the response of the
+        ``render`` coroutine function.
+        """
+        await self.aprepare()
+        etag, last_modified = await self.aget_conditional_state()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await render()
+        return self.patch_conditional_headers(response, etag, last_modified)
+
+
+class AsyncListMixin(AsyncConditionalGetMixin):
+    """The page is fetched up front, ``paginate_queryset`` hands it out."""
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, self.arender_page)
+
+    async def arender_page(self):
+        self.object_list = self.get_queryset()
+        self.cursor_page = await apaginate_by_cursor(
+            self.object_list,
+            self.get_paginate_by(self.object_list),
+            self.request.GET.get(self.cursor_kwarg),
+        )
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page = self.cursor_page
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class AsyncDetailMixin(AsyncConditionalGetMixin):
+
+    async def get(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, self.arender_object)
+
+    async def aget_object(self):
+        return await aget_object_or_404(
+            self.get_queryset(), pk=self.kwargs.get(self.pk_url_kwarg)
+        )
+
+    async def arender_object(self):
+        self.object = await self.aget_object()
+        return self.render_to_response(
+            self.get_context_data(object=self.object)
+        )
+
+
+class AsyncDishTypeListView(AsyncListMixin, DishTypeListView):
+    pass
+
+
+class AsyncDishTypeDetailView(AsyncDetailMixin, DishTypeDetailView):
+    pass
+
+
+class AsyncDishListView(AsyncListMixin, DishListView):
+
+    async def aprepare(self):
+        include = await aresolve_names(
+            split_names(self.request.GET.get("with_ingredients"))
+        )
+        exclude = await aresolve_names(
+            split_names(self.request.GET.get("without_ingredients"))
+        )
+        self._ingredient_filters = (include, set().union(*exclude))
+        # Memoized for the group checks in get_context_data
+        await aget_user_groups(self.request.user)
+
+
+class AsyncDishDetailView(AsyncDetailMixin, DishDetailView):
+    pass
+
+
+class AsyncIngredientListView(AsyncListMixin, IngredientListView):
+    pass
+
+
+class AsyncIngredientDetailView(AsyncDetailMixin, IngredientDetailView):
+    pass
+
+
+class AsyncCookListView(AsyncListMixin, CookListView):
+
+    async def aprepare(self):
+        # Memoized for the group checks in get_context_data
+        await aget_user_groups(self.request.user)
+
+
+class AsyncCookDetailView(AsyncDetailMixin, CookDetailView):
+
+    async def aget_object(self):
+        cook = await super().aget_object()
+        # Memoized on the cook for get_user_group_names in the context
+        await aget_user_groups(cook)
+        return cook
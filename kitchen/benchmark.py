@@ -0,0 +1,439 @@
+"""
+In-process load generator for the kitchen routes.
+
+Requests go through the project's real WSGI or ASGI application, so every
+middleware, the session lookup and the templates are part of the timing,
+while no network or server process adds noise.
+"""
+import asyncio
+import platform
+import string
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from io import BytesIO
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model, login
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.http import HttpRequest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from kitchen.models import Cook, Dish, DishType, Ingredient
+from kitchen.stats import percentile
+
+
+# POST flows that can be replayed any number of times
+POST_FLOWS = {
+    "dish-add": lambda objects: {},
+    "dish-remove": lambda objects: {},
+    "dish-update-ingredient": lambda objects: {
+        "ingredient_id": objects["ingredient"].pk,
+        "action": "add",
+    },
+}
+
+PERCENTILES = (50, 95, 99)
+
+# Url names of the async twins of read routes, see kitchen.async_views
+ASYNC_PREFIX = "async-"
+
+BENCHMARK_USER = "benchmark_manager"
+
+
+class Probe:
+    """One request that is repeated to measure a route."""
+
+    def __init__(self, route, method, path, data=None):
+        self.route = route
+        self.method = method
+        self.path = path
+        self.data = data
+
+    def body(self):
+        if self.data is None:
+            return b""
+        return urlencode(self.data, doseq=True).encode()
+
+
+def default_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host != "*" and not host.startswith("."):
+            return host
+    return "localhost"
+
+
+class Session:
+    """Cookies and headers of a logged in browser."""
+
+    def __init__(self, user, host=None):
+        engine = import_module(settings.SESSION_ENGINE)
+        request = HttpRequest()
+        request.session = engine.SessionStore()
+        login(
+            request, user,
+            backend="django.contrib.auth.backends.ModelBackend",
+        )
+        request.session.save()
+        self.csrf_token = get_random_string(
+            32, string.ascii_letters + string.digits
+        )
+        self.host = host or default_host()
+        self.cookie = (
+            f"{settings.SESSION_COOKIE_NAME}={request.session.session_key}; "
+            f"{settings.CSRF_COOKIE_NAME}={self.csrf_token}"
+        )
+
+    def headers(self, probe):
+        headers = [("Host", self.host), ("Cookie", self.cookie)]
+        if probe.method != "GET":
+            headers.append(("X-CSRFToken", self.csrf_token))
+            headers.append(
+                ("Content-Type", "application/x-www-form-urlencoded")
+            )
+        return headers
+
+
+def benchmark_user(username=None):
+    """
+    The cook named ``username``, or a ``BENCHMARK_USER`` manager created
+    on first use.
+    """
+    if username:
+        return get_user_model().objects.get(username=username)
+    user, created = get_user_model().objects.get_or_create(
+        username=BENCHMARK_USER
+    )
+    if created:
+        user.set_unusable_password()
+        user.save()
+        user.groups.add(Group.objects.get(name="manager"))
+    return user
+
+
+def pick_objects():
+    """Objects whose pages are measured; the lowest pk keeps runs stable."""
+    objects = {
+        "dishtype": DishType.objects.order_by("pk").first(),
+        "dish": Dish.objects.order_by("pk").first(),
+        "ingredient": Ingredient.objects.order_by("pk").first(),
+        "cook": Cook.objects.filter(dishes__isnull=False)
+        .order_by("pk").first(),
+    }
+    return {name: obj for name, obj in objects.items() if obj is not None}
+
+
+def object_for_route(name, objects):
+    name = name.removeprefix(ASYNC_PREFIX).removeprefix("api-")
+    for prefix, label in (
+        ("dish-type", "dishtype"),
+        ("dish", "dish"),
+        ("ingredient", "ingredient"),
+        ("cook", "cook"),
+    ):
+        if name.startswith(prefix):
+            return objects[label]
+    raise LookupError(f"No object to measure {name} with")
+
+
+def build_probes(urlpatterns, objects, routes=None, posts=True):
+    probes = []
+    for pattern in urlpatterns:
+        name = pattern.name
+        if routes and name not in routes:
+            continue
+        if "<int:pk>" in str(pattern.pattern):
+            args = [object_for_route(name, objects).pk]
+        else:
+            args = []
+        path = reverse(f"kitchen:{name}", args=args)
+        probes.append(Probe(name, "GET", path))
+        if posts and name in POST_FLOWS:
+            probes.append(Probe(name, "POST", path, POST_FLOWS[name](objects)))
+    return probes
+
+
+def async_twins(urlpatterns, routes=None):
+    """
+    Url names of the routes that have an async twin, each followed by
+    its twin, so that both are measured under the same conditions.
+    """
+    names = {pattern.name for pattern in urlpatterns}
+    pairs = []
+    for pattern in urlpatterns:
+        twin = ASYNC_PREFIX + pattern.name
+        if twin in names and (not routes or pattern.name in routes):
+            pairs += [pattern.name, twin]
+    return pairs
+
+
+def split_async(results):
+    """Sync and async halves of a run, twins keyed by their sync name."""
+    sync = [
+        row for row in results["routes"]
+        if not row["route"].startswith(ASYNC_PREFIX)
+    ]
+    twins = [
+        dict(row, route=row["route"].removeprefix(ASYNC_PREFIX))
+        for row in results["routes"]
+        if row["route"].startswith(ASYNC_PREFIX)
+    ]
+    return dict(results, routes=sync), dict(results, routes=twins)
+
+
+def summarize(probe, latencies, statuses, wall):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    result = {
+        "route": probe.route,
+        "method": probe.method,
+        "path": probe.path,
+        "requests": count,
+        "errors": sum(
+            number for status, number in statuses.items() if status >= 400
+        ),
+        "statuses": {
+            str(status): number for status, number in sorted(statuses.items())
+        },
+        "throughput_rps": count / wall if wall else 0.0,
+        "mean_ms": sum(latencies) / count * 1000 if count else 0.0,
+        "max_ms": latencies[-1] * 1000 if count else 0.0,
+    }
+    for percent in PERCENTILES:
+        result[f"p{percent}_ms"] = percentile(latencies, percent) * 1000
+    return result
+
+
+class WSGIDriver:
+    interface = "wsgi"
+
+    def __init__(self, application, session):
+        self.application = application
+        self.session = session
+
+    def environ(self, probe):
+        path, _, query = probe.path.partition("?")
+        body = probe.body()
+        environ = {
+            "REQUEST_METHOD": probe.method,
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": self.session.host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_LENGTH": str(len(body)),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(body),
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        for name, value in self.session.headers(probe):
+            key = name.upper().replace("-", "_")
+            if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+                key = f"HTTP_{key}"
+            environ[key] = value
+        return environ
+
+    def request(self, probe):
+        status = []
+
+        def start_response(line, headers, exc_info=None):
+            status.append(int(line.split(" ", 1)[0]))
+
+        started = time.perf_counter()
+        response = self.application(self.environ(probe), start_response)
+        try:
+            for _chunk in response:
+                pass
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+        return time.perf_counter() - started, status[0]
+
+    def fetch(self, probe):
+        """
+        ``(status, headers, body)`` of one request; the body of a streamed
+        response is None, it is closed unread.
+        """
+        started = []
+
+        def start_response(line, headers, exc_info=None):
+            started.append((int(line.split(" ", 1)[0]), dict(headers)))
+
+        response = self.application(self.environ(probe), start_response)
+        try:
+            if getattr(response, "streaming", False):
+                body = None
+            else:
+                body = b"".join(response)
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+        status, headers = started[0]
+        return status, headers, body
+
+    def run(self, probe, total, concurrency):
+        started = time.perf_counter()
+        if concurrency == 1:
+            timings = [self.request(probe) for _ in range(total)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                timings = list(pool.map(self.request, [probe] * total))
+        return timings, time.perf_counter() - started
+
+
+class ASGIDriver:
+    interface = "asgi"
+
+    def __init__(self, application, session):
+        self.application = application
+        self.session = session
+
+    def scope(self, probe):
+        path, _, query = probe.path.partition("?")
+        return {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": probe.method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in self.session.headers(probe)
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (self.session.host, 80),
+        }
+
+    async def request(self, probe):
+        body = probe.body()
+        done = asyncio.Event()
+        sent = []
+        status = []
+
+        async def receive():
+            if not sent:
+                sent.append(True)
+                return {"type": "http.request", "body": body}
+            # The handler listens for a disconnect while the view runs
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            elif not message.get("more_body"):
+                done.set()
+
+        started = time.perf_counter()
+        await self.application(self.scope(probe), receive, send)
+        done.set()
+        return time.perf_counter() - started, status[0]
+
+    async def gather(self, probe, total, concurrency):
+        limit = asyncio.Semaphore(concurrency)
+
+        async def limited():
+            async with limit:
+                return await self.request(probe)
+
+        return await asyncio.gather(*(limited() for _ in range(total)))
+
+    def run(self, probe, total, concurrency):
+        started = time.perf_counter()
+        timings = asyncio.run(self.gather(probe, total, concurrency))
+        return timings, time.perf_counter() - started
+
+
+def get_driver(interface, session):
+    if interface == "asgi":
+        from restaurant_kitchen_service.asgi import application
+
+        return ASGIDriver(application, session)
+    from restaurant_kitchen_service.wsgi import application
+
+    return WSGIDriver(application, session)
+
+
+def run(driver, probes, requests=50, concurrency=1, warmup=5, label=""):
+    """Measure every probe and return a JSON serialisable result."""
+    routes = []
+    for probe in probes:
+        if warmup:
+            driver.run(probe, warmup, 1)
+        timings, wall = driver.run(probe, requests, concurrency)
+        routes.append(summarize(
+            probe,
+            [latency for latency, _status in timings],
+            Counter(status for _latency, status in timings),
+            wall,
+        ))
+    return {
+        "meta": {
+            "label": label,
+            "created": timezone.now().isoformat(),
+            "interface": driver.interface,
+            "concurrency": concurrency,
+            "requests": requests,
+            "warmup": warmup,
+            "database": connection.vendor,
+            "rows": {
+                "dishtypes": DishType.objects.count(),
+                "dishes": Dish.objects.count(),
+                "ingredients": Ingredient.objects.count(),
+                "cooks": Cook.objects.count(),
+            },
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        },
+        "routes": routes,
+    }
+
+
+def compare(baseline, current, threshold=10.0, min_ms=1.0):
+    """
+    Pair up the routes of two results. A route regresses when its p95
+    grows by more than ``threshold`` percent and ``min_ms`` milliseconds.
+    """
+    before = {
+        f"{row['method']} {row['route']}": row for row in baseline["routes"]
+    }
+    rows = []
+    for row in current["routes"]:
+        key = f"{row['method']} {row['route']}"
+        old = before.get(key)
+        if old is None:
+            continue
+        change = (
+            (row["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100
+            if old["p95_ms"] else 0.0
+        )
+        rows.append({
+            "key": key,
+            "old_p95_ms": old["p95_ms"],
+            "new_p95_ms": row["p95_ms"],
+            "p95_change": change,
+            "old_rps": old["throughput_rps"],
+            "new_rps": row["throughput_rps"],
+            "regressed": (
+                change > threshold
+                and row["p95_ms"] - old["p95_ms"] > min_ms
+            ),
+        })
+    return rows
@@ -0,0 +1,100 @@
+from collections import defaultdict
+
+from django.db import router
+from django.db.models.signals import m2m_changed
+
+
+def _m2m_columns(model, field_name):
+    descriptor = getattr(model, field_name)
+    field = descriptor.field
+    through = field.remote_field.through
+    if descriptor.reverse:
+        return (
+            through,
+            field.m2m_reverse_field_name(),
+            field.m2m_field_name(),
+            field.model,
+            True,
+        )
+    return (
+        through,
+        field.m2m_field_name(),
+        field.m2m_reverse_field_name(),
+        field.related_model,
+        False,
+    )
+
+
+def bulk_set_m2m(instances, field_name, targets, add_only=False,
+                 send_signals=True):
+    """
+    Set ``field_name`` of every instance to ``targets[instance.pk]`` with
+    one SELECT, one DELETE and one INSERT on the through table.
+
+    ``m2m_changed`` is still sent for every instance that changed, so
+    receivers see the same ``pre_/post_add`` and ``pre_/post_remove``
+    actions as with ``instance.<field_name>.set()``. With ``add_only``
+    existing links are kept and only missing ones are inserted.
+
+    Returns ``(added, removed)``, dicts of the target pks linked to and
+    unlinked from each instance pk. Callers that touch the related rows
+    themselves for a whole batch can pass ``send_signals=False``.
+    """
+    instances = [instance for instance in instances if instance.pk in targets]
+    if not instances:
+        return {}, {}
+    model = type(instances[0])
+    through, source, target, target_model, reverse = _m2m_columns(
+        model, field_name
+    )
+    using = router.db_for_write(through)
+
+    existing = defaultdict(dict)
+    rows = through._default_manager.using(using).filter(
+        **{f"{source}_id__in": [instance.pk for instance in instances]}
+    ).values_list("pk", f"{source}_id", f"{target}_id")
+    for row_pk, source_pk, target_pk in rows:
+        existing[source_pk][target_pk] = row_pk
+
+    added, removed, new_rows, stale_rows = {}, {}, [], []
+    for instance in instances:
+        wanted = set(targets[instance.pk])
+        current = existing[instance.pk]
+        to_add = wanted - set(current)
+        to_remove = set() if add_only else set(current) - wanted
+        if to_add:
+            added[instance.pk] = to_add
+            new_rows.extend(
+                through(**{f"{source}_id": instance.pk, f"{target}_id": pk})
+                for pk in to_add
+            )
+        if to_remove:
+            removed[instance.pk] = to_remove
+            stale_rows.extend(current[pk] for pk in to_remove)
+
+    def send(action, changes):
+        if not send_signals:
+            return
+        for instance in instances:
+            if instance.pk in changes:
+                m2m_changed.send(
+                    sender=through,
+                    instance=instance,
+                    action=action,
+                    reverse=reverse,
+                    model=target_model,
+                    pk_set=set(changes[instance.pk]),
+                    using=using,
+                )
+
+    if stale_rows:
+        send("pre_remove", removed)
+        through._default_manager.using(using).filter(
+            pk__in=stale_rows
+        ).delete()
+        send("post_remove", removed)
+    if new_rows:
+        send("pre_add", added)
+        through._default_manager.using(using).bulk_create(new_rows)
+        send("post_add", added)
+    return added, removed
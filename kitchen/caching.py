@@ -0,0 +1,27 @@
+"""
+The cache that keeps the version and generation numbers.
+
+Cached group memberships, fragments and the ingredient index are all
+stamped with one of these numbers, so losing one to culling invalidates
+every entry under it. ``KITCHEN_STATE_CACHE`` names a cache of their own,
+the default cache without it.
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import transaction
+
+
+def state_cache():
+    alias = getattr(settings, "KITCHEN_STATE_CACHE", DEFAULT_CACHE_ALIAS)
+    return caches[alias]
+
+
+def invalidate(callback):
+    """
+    Call ``callback`` now, for the rest of the transaction, and again once
+    it commits: until then other requests still read the old rows and may
+    cache them again.
+    """
+    callback()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(callback, robust=True)
@@ -0,0 +1,61 @@
+from asgiref.sync import sync_to_async
+from django.db.models import F
+from django.utils import timezone
+
+from kitchen.models import Cook, Dish, DishType, Ingredient, EntityCounter
+
+
+COUNTED_MODELS = {
+    "cooks": Cook,
+    "dishes": Dish,
+    "dishtypes": DishType,
+    "ingredients": Ingredient,
+}
+
+
+def counter_name(model):
+    for name, counted_model in COUNTED_MODELS.items():
+        if issubclass(model, counted_model):
+            return name
+    return None
+
+
+def adjust(name, delta):
+    updated = EntityCounter.objects.filter(name=name).update(
+        count=F("count") + delta, updated_at=timezone.now()
+    )
+    if not updated:
+        # Counter row is missing (e.g. fresh table), rebuild it exactly
+        rebuild([name])
+
+
+def rebuild(names=None):
+    names = names or list(COUNTED_MODELS)
+    for name in names:
+        EntityCounter.objects.update_or_create(
+            name=name,
+            defaults={"count": COUNTED_MODELS[name].objects.count()},
+        )
+
+
+def get_counts():
+    counts = dict(EntityCounter.objects.values_list("name", "count"))
+    missing = [name for name in COUNTED_MODELS if name not in counts]
+    if missing:
+        rebuild(missing)
+        counts.update(
+            EntityCounter.objects.filter(
+                name__in=missing
+            ).values_list("name", "count")
+        )
+    return counts
+
+
+async def aget_counts():
+    counts = {
+        name: count async for name, count
+        in EntityCounter.objects.values_list("name", "count")
+    }
+    if any(name not in counts for name in COUNTED_MODELS):
+        return await sync_to_async(get_counts)()
+    return counts
@@ -3,6 +3,9 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.models import Group
 
+from kitchen.group_cache import get_user_groups
+from kitchen.ingredient_filters import resolve_names, split_names
+from kitchen.ingredient_sets import MAX_MISSING
 from kitchen.models import DishType, Dish, Ingredient, Cook
 
 
@@ -63,6 +66,22 @@ class DishSearchForm(forms.Form):
                    "placeholder": "Search by name"}
         )
     )
+    with_ingredients = forms.CharField(
+        required=False,
+        label="",
+        widget=forms.TextInput(
+            attrs={"class": "form-control ",
+                   "placeholder": "Contains, e.g. truffle"}
+        )
+    )
+    without_ingredients = forms.CharField(
+        required=False,
+        label="",
+        widget=forms.TextInput(
+            attrs={"class": "form-control ",
+                   "placeholder": "Without, e.g. nuts, shellfish"}
+        )
+    )
 
 
 class IngredientCreationForm(forms.ModelForm):
@@ -184,8 +203,8 @@ class CookUpdateForm(LoginRequiredMixin, forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         if self.instance.pk:
-            groups = self.instance.groups.all()
-            self.fields["group"].initial = groups[0] if groups else None
+            groups = get_user_groups(self.instance)
+            self.fields["group"].initial = groups[0][0] if groups else None
 
     def save(self, commit=True):
         user = super().save(commit=False)
@@ -208,3 +227,57 @@ class CookSearchForm(forms.Form):
                    "placeholder": "Search by username"}
         )
     )
+
+
+class MenuImportForm(forms.Form):
+    file = forms.FileField(
+        label="CSV or JSON lines file",
+        widget=forms.ClearableFileInput(
+            attrs={"class": "form-control", "accept": ".csv,.jsonl,.ndjson"}
+        )
+    )
+    merge = forms.BooleanField(
+        required=False,
+        label="Keep existing cooks and ingredients of imported dishes",
+    )
+
+
+class StockMatchForm(forms.Form):
+    # Names rather than a choice of every ingredient, which would put the
+    # whole table on the page
+    ingredients = forms.CharField(
+        required=False,
+        label="Ingredients in stock",
+        widget=forms.TextInput(
+            attrs={"class": "form-control",
+                   "placeholder": "e.g. beetroot, potato, dill"}
+        )
+    )
+    max_missing = forms.TypedChoiceField(
+        choices=[(num, num) for num in range(MAX_MISSING + 1)],
+        coerce=int,
+        initial=2,
+        label="Missing ingredients allowed",
+        widget=forms.Select(attrs={"class": "form-control"})
+    )
+
+    def clean_ingredients(self):
+        """The pks of the listed ingredient names."""
+        names = split_names(self.cleaned_data["ingredients"])
+        pks = resolve_names(names)
+        unknown = [name for name, found in zip(names, pks) if not found]
+        if unknown:
+            raise forms.ValidationError(
+                f"Unknown ingredients: {', '.join(unknown)}"
+            )
+        return sorted(set().union(*pks))
+
+
+class CookAssignmentForm(forms.Form):
+    cooks_per_dish = forms.IntegerField(
+        min_value=1,
+        max_value=5,
+        initial=1,
+        label="Cooks per dish",
+        widget=forms.NumberInput(attrs={"class": "form-control"})
+    )
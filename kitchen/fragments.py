@@ -0,0 +1,104 @@
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from kitchen.caching import invalidate, state_cache
+
+
+GENERATION_KEY = "kitchen:generation:{}"
+FRAGMENT_KEY = "kitchen:fragment:{}:{}"
+STATS_KEY = "kitchen:fragment-stats:{}:{}"
+NAMES_KEY = "kitchen:fragment-names"
+
+_known_names = set()
+
+
+def timeout():
+    # Only bounds storage, stale fragments are never read because their
+    # generation numbers no longer match
+    return getattr(settings, "KITCHEN_FRAGMENT_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def generations(labels):
+    generation_cache = state_cache()
+    keys = {label: GENERATION_KEY.format(label) for label in labels}
+    found = generation_cache.get_many(keys.values())
+    values = {}
+    for label, key in keys.items():
+        if key not in found:
+            # A fresh number so that an evicted generation never repeats
+            generation_cache.add(key, time.time_ns(), None)
+            found[key] = generation_cache.get(key)
+        values[label] = found[key]
+    return values
+
+
+def _bump(labels):
+    generation_cache = state_cache()
+    for label in labels:
+        key = GENERATION_KEY.format(label)
+        try:
+            generation_cache.incr(key)
+        except ValueError:
+            generation_cache.set(key, time.time_ns(), None)
+
+
+def bump(*labels):
+    invalidate(lambda: _bump(labels))
+
+
+def fragment_key(name, labels, vary_on):
+    current = generations(labels)
+    parts = [f"{label}={current[label]}" for label in sorted(current)]
+    parts.extend(str(value) for value in vary_on)
+    digest = hashlib.md5(
+        "\x1f".join(parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    return FRAGMENT_KEY.format(name, digest)
+
+
+def record(name, outcome):
+    # A cache write per render would cost about as much as the hit saves,
+    # so only a sample is counted. The hit rate stays the same
+    if random.random() >= getattr(
+        settings, "KITCHEN_FRAGMENT_STATS_SAMPLE", 0.01
+    ):
+        return
+    key = STATS_KEY.format(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+    if name not in _known_names:
+        _known_names.add(name)
+        cache.set(NAMES_KEY, cache.get(NAMES_KEY, set()) | {name}, None)
+
+
+def stats():
+    names = sorted(cache.get(NAMES_KEY, set()))
+    keys = [
+        STATS_KEY.format(name, outcome)
+        for name in names
+        for outcome in ("hit", "miss")
+    ]
+    values = cache.get_many(keys)
+    return {
+        name: {
+            outcome: values.get(STATS_KEY.format(name, outcome), 0)
+            for outcome in ("hit", "miss")
+        }
+        for name in names
+    }
+
+
+def reset_stats():
+    names = cache.get(NAMES_KEY, set())
+    cache.delete_many([
+        STATS_KEY.format(name, outcome)
+        for name in names
+        for outcome in ("hit", "miss")
+    ])
@@ -0,0 +1,51 @@
+"""
+SQLite FTS5 trigram tables over text columns, kept in step with their
+table by triggers. Migration ``0003_search_indexes`` creates them and
+``kitchen.search.install_sqlite_fts`` restores them after SQLite rebuilds
+a table.
+"""
+
+
+def fts_table(table):
+    return f"{table}_fts"
+
+
+def trigger_names(table):
+    fts = fts_table(table)
+    return {f"{fts}_ai", f"{fts}_ad", f"{fts}_au"}
+
+
+def create_statements(table, columns, pk="id"):
+    """SQL creating the FTS table of ``table`` and its sync triggers."""
+    fts = fts_table(table)
+    column_list = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{column_list}, content='{table}', content_rowid='{pk}', "
+        f"tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN INSERT INTO {fts}(rowid, {column_list}) "
+        f"VALUES (new.{pk}, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {column_list}) "
+        f"VALUES ('delete', old.{pk}, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} "
+        f"BEGIN INSERT INTO {fts}({fts}, rowid, {column_list}) "
+        f"VALUES ('delete', old.{pk}, {old_values}); "
+        f"INSERT INTO {fts}(rowid, {column_list}) "
+        f"VALUES (new.{pk}, {new_values}); END",
+        # Index the rows that are already there
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+
+def drop_statements(table):
+    fts = fts_table(table)
+    return [
+        *(f"DROP TRIGGER IF EXISTS {name}" for name in sorted(
+            trigger_names(table)
+        )),
+        f"DROP TABLE IF EXISTS {fts}",
+    ]
@@ -0,0 +1,99 @@
+import time
+
+from django.core.cache import cache
+
+from kitchen.caching import invalidate, state_cache
+
+
+VERSION_KEY = "kitchen:groups:version"
+TIMEOUT = 60 * 60
+
+
+def _version():
+    versions = state_cache()
+    version = versions.get(VERSION_KEY)
+    if version is None:
+        # A fresh stamp so entries from an evicted version never come back
+        versions.add(VERSION_KEY, time.time_ns(), None)
+        version = versions.get(VERSION_KEY)
+    return version
+
+
+async def _aversion():
+    versions = state_cache()
+    version = await versions.aget(VERSION_KEY)
+    if version is None:
+        await versions.aadd(VERSION_KEY, time.time_ns(), None)
+        version = await versions.aget(VERSION_KEY)
+    return version
+
+
+def _user_key(user_pk, version):
+    return f"kitchen:groups:v{version}:{user_pk}"
+
+
+def get_user_groups(user):
+    """
+    Return ``[(group_pk, group_name), ...]`` for ``user`` ordered by pk.
+
+    Memoized on the user object for the rest of the request and cached
+    across requests until the user's groups or any group name change.
+    """
+    memo = getattr(user, "_kitchen_groups", None)
+    if memo is not None:
+        return memo
+
+    key = _user_key(user.pk, _version())
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(user.groups.order_by("pk").values_list("pk", "name"))
+        cache.set(key, groups, TIMEOUT)
+    user._kitchen_groups = groups
+    return groups
+
+
+async def aget_user_groups(user):
+    """Async ``get_user_groups``, sharing the memo and the cache entries."""
+    memo = getattr(user, "_kitchen_groups", None)
+    if memo is not None:
+        return memo
+
+    key = _user_key(user.pk, await _aversion())
+    groups = await cache.aget(key)
+    if groups is None:
+        groups = [
+            row async for row
+            in user.groups.order_by("pk").values_list("pk", "name")
+        ]
+        await cache.aset(key, groups, TIMEOUT)
+    user._kitchen_groups = groups
+    return groups
+
+
+def get_user_group_names(user):
+    return [name for _, name in get_user_groups(user)]
+
+
+async def aget_user_group_names(user):
+    return [name for _, name in await aget_user_groups(user)]
+
+
+def invalidate_user(user):
+    user.__dict__.pop("_kitchen_groups", None)
+    invalidate_user_pk(user.pk)
+
+
+def invalidate_user_pk(user_pk):
+    invalidate(lambda: cache.delete(_user_key(user_pk, _version())))
+
+
+def _bump_version():
+    versions = state_cache()
+    try:
+        versions.incr(VERSION_KEY)
+    except ValueError:
+        versions.set(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_all():
+    invalidate(_bump_version)
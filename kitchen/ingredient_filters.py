@@ -0,0 +1,102 @@
+"""
+"Contains truffle" / "without nuts or shellfish" filters for dish lists.
+
+Both are ``EXISTS`` subqueries on the dish/ingredient link table keyed by
+the outer dish, so each is answered from the composite link indexes
+without reading ingredient rows. Names are resolved to primary keys once,
+up front, compared in lower case as ``str.lower`` folds them.
+"""
+from django.db.models import Exists, Func, OuterRef
+
+from kitchen.models import Ingredient
+
+
+NAME_SEPARATOR = ","
+SQLITE_LOWER = "KITCHEN_LOWER"
+
+
+def fold(name):
+    return name.lower()
+
+
+class Fold(Func):
+    """
+    ``fold`` in SQL. Postgres ``LOWER`` folds every letter, SQLite's only
+    ASCII ones, so on SQLite the Python function is called instead.
+    """
+    function = "LOWER"
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection, function=SQLITE_LOWER, **extra_context
+        )
+
+
+def install_sqlite_functions(connection):
+    if connection.vendor != "sqlite":
+        return
+    connection.connection.create_function(
+        SQLITE_LOWER, 1,
+        lambda value: None if value is None else fold(value),
+        deterministic=True,
+    )
+
+
+def split_names(value):
+    """Distinct folded names of a comma separated list."""
+    names = []
+    for name in (value or "").split(NAME_SEPARATOR):
+        name = fold(name.strip())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _name_rows(names):
+    return (
+        Ingredient.objects.annotate(lower_name=Fold("name"))
+        .filter(lower_name__in=names)
+        .values_list("lower_name", "pk")
+    )
+
+
+def resolve_names(names):
+    """
+    One set of ingredient pks per name, matched case-insensitively. The
+    set is empty when no ingredient is called that.
+    """
+    pks = {name: set() for name in names}
+    if names:
+        for name, pk in _name_rows(names):
+            pks[name].add(pk)
+    return list(pks.values())
+
+
+async def aresolve_names(names):
+    pks = {name: set() for name in names}
+    if names:
+        async for name, pk in _name_rows(names):
+            pks[name].add(pk)
+    return list(pks.values())
+
+
+def _links(pks, dish_field):
+    return Ingredient.dishes.through.objects.filter(
+        dish_id=OuterRef(dish_field), ingredient_id__in=pks
+    )
+
+
+def filter_dishes(queryset, include=(), exclude=(), dish_field="pk"):
+    """
+    Keep the rows of ``queryset`` whose dish has, for every set of pks in
+    ``include``, at least one of them and none of the pks in ``exclude``.
+    ``dish_field`` names the column holding the dish pk.
+    """
+    for pks in include:
+        if not pks:
+            return queryset.none()
+        queryset = queryset.filter(Exists(_links(pks, dish_field)))
+    exclude = set(exclude)
+    if exclude:
+        queryset = queryset.filter(~Exists(_links(exclude, dish_field)))
+    return queryset
@@ -0,0 +1,267 @@
+"""
+"What can we cook from this stock?" over packed ingredient bitsets.
+
+Every dish is one row of 64-bit words with bit ``column`` set when the
+dish needs the ingredient mapped to that column. A query packs the stock
+the same way and counts, for all dishes at once, the bits of
+``dish & ~stock``: zero missing means makeable, one or two means nearly.
+
+Each process keeps its own index. Changes made in the process are applied
+in place once their transaction commits, and a generation number in the
+cache tells other processes to rebuild theirs on their next query.
+"""
+import threading
+import time
+
+import numpy as np
+from django.db import transaction
+
+from kitchen.caching import state_cache
+from kitchen.models import Dish, Ingredient
+
+
+GENERATION_KEY = "kitchen:ingredient-sets:generation"
+WORD_BITS = 64
+MAX_MISSING = 3
+
+_lock = threading.Lock()
+_index = None
+_generation = None
+
+
+class Match:
+    def __init__(self, dish_id, missing):
+        self.dish_id = dish_id
+        self.missing = missing
+
+
+class IngredientSetIndex:
+    def __init__(self, dish_ids=(), ingredient_ids=()):
+        self.columns = {pk: column for column, pk in enumerate(ingredient_ids)}
+        self.ingredient_ids = list(ingredient_ids)
+        self.rows_by_dish = {pk: row for row, pk in enumerate(dish_ids)}
+        self.dish_ids = np.array(list(dish_ids), dtype=np.int64)
+        self.words = np.zeros(
+            (len(self.dish_ids), self._word_count(len(self.columns))),
+            dtype=np.uint64,
+        )
+
+    @staticmethod
+    def _word_count(columns):
+        return max(1, -(-columns // WORD_BITS))
+
+    @classmethod
+    def build(cls):
+        index = cls(
+            Dish.objects.order_by("pk").values_list("pk", flat=True),
+            Ingredient.objects.order_by("pk").values_list("pk", flat=True),
+        )
+        pairs = np.array(
+            Ingredient.dishes.through.objects.values_list(
+                "dish_id", "ingredient_id"
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        if len(pairs):
+            # Both id lists are sorted, so positions are found vectorised
+            rows = np.searchsorted(index.dish_ids, pairs[:, 0])
+            columns = np.searchsorted(
+                np.array(index.ingredient_ids, dtype=np.int64), pairs[:, 1]
+            )
+            np.bitwise_or.at(
+                index.words,
+                (rows, columns // WORD_BITS),
+                np.left_shift(
+                    np.uint64(1), (columns % WORD_BITS).astype(np.uint64)
+                ),
+            )
+        return index
+
+    def _row(self, dish_pk):
+        row = self.rows_by_dish.get(dish_pk)
+        if row is None:
+            row = len(self.dish_ids)
+            self.rows_by_dish[dish_pk] = row
+            self.dish_ids = np.append(self.dish_ids, np.int64(dish_pk))
+            self.words = np.vstack([
+                self.words,
+                np.zeros((1, self.words.shape[1]), dtype=np.uint64),
+            ])
+        return row
+
+    def _column(self, ingredient_pk):
+        column = self.columns.get(ingredient_pk)
+        if column is None:
+            column = len(self.ingredient_ids)
+            self.columns[ingredient_pk] = column
+            self.ingredient_ids.append(ingredient_pk)
+            width = self.words.shape[1]
+            if self._word_count(column + 1) > width:
+                # Double the width so that new ingredients rarely copy
+                self.words = np.pad(self.words, ((0, 0), (0, width)))
+        return column
+
+    @staticmethod
+    def _bit(column):
+        return column // WORD_BITS, np.uint64(1) << np.uint64(
+            column % WORD_BITS
+        )
+
+    def link(self, dish_pk, ingredient_pk):
+        # Both may grow ``words``, so resolve them before indexing it
+        row = self._row(dish_pk)
+        word, bit = self._bit(self._column(ingredient_pk))
+        self.words[row, word] |= bit
+
+    def unlink(self, dish_pk, ingredient_pk):
+        row = self.rows_by_dish.get(dish_pk)
+        column = self.columns.get(ingredient_pk)
+        if row is not None and column is not None:
+            word, bit = self._bit(column)
+            self.words[row, word] &= ~bit
+
+    def drop_dish(self, dish_pk):
+        row = self.rows_by_dish.pop(dish_pk, None)
+        if row is not None:
+            # The row stays allocated until the next rebuild
+            self.words[row] = 0
+            self.dish_ids[row] = -1
+
+    def drop_ingredient(self, ingredient_pk):
+        column = self.columns.get(ingredient_pk)
+        if column is not None:
+            word, bit = self._bit(column)
+            self.words[:, word] &= ~bit
+
+    def pack(self, ingredient_pks):
+        stock = np.zeros(self.words.shape[1], dtype=np.uint64)
+        for pk in ingredient_pks:
+            column = self.columns.get(pk)
+            if column is not None:
+                word, bit = self._bit(column)
+                stock[word] |= bit
+        return stock
+
+    def missing_counts(self, ingredient_pks):
+        """Missing ingredients of every row, -1 for rows to skip."""
+        missing = self.words & ~self.pack(ingredient_pks)
+        counts = np.bitwise_count(missing).sum(axis=1, dtype=np.int32)
+        needed = np.bitwise_count(self.words).sum(axis=1, dtype=np.int32)
+        # Dishes without recorded ingredients say nothing about the stock
+        counts[(needed == 0) | (self.dish_ids < 0)] = -1
+        return counts, missing
+
+    def match(self, ingredient_pks, max_missing=0):
+        """
+        Dishes missing at most ``max_missing`` ingredients, fewest missing
+        first. ``Match.missing`` lists the pks still to buy.
+        """
+        counts, missing = self.missing_counts(ingredient_pks)
+        rows = np.flatnonzero((counts >= 0) & (counts <= max_missing))
+        rows = rows[np.argsort(counts[rows], kind="stable")]
+        return [
+            Match(int(self.dish_ids[row]), self._ingredients(missing[row]))
+            for row in rows
+        ]
+
+    def _ingredients(self, words):
+        pks = []
+        for word_index in np.flatnonzero(words):
+            word = int(words[word_index])
+            while word:
+                low = word & -word
+                column = word_index * WORD_BITS + low.bit_length() - 1
+                pks.append(self.ingredient_ids[column])
+                word ^= low
+        return pks
+
+
+def _current_generation():
+    generations = state_cache()
+    generation = generations.get(GENERATION_KEY)
+    if generation is None:
+        # A fresh number so that an evicted generation never repeats
+        generations.add(GENERATION_KEY, time.time_ns(), None)
+        generation = generations.get(GENERATION_KEY)
+    return generation
+
+
+def _bump():
+    generations = state_cache()
+    try:
+        return generations.incr(GENERATION_KEY)
+    except ValueError:
+        generations.set(GENERATION_KEY, time.time_ns(), None)
+        return None
+
+
+def _current_index():
+    global _index, _generation
+    generation = _current_generation()
+    # Without a cache that keeps the generation, always read afresh
+    if _index is None or generation is None or generation != _generation:
+        _index = IngredientSetIndex.build()
+        _generation = generation
+    return _index
+
+
+def match(ingredient_pks, max_missing=0):
+    # Committed changes patch the index in place, never read it halfway
+    with _lock:
+        return _current_index().match(ingredient_pks, max_missing)
+
+
+def invalidate():
+    """Make every process rebuild, for writes that bypass signals."""
+    global _index
+    with _lock:
+        _index = None
+        _bump()
+
+
+def _apply(change):
+    global _index, _generation
+    with _lock:
+        generation = _bump()
+        if _index is None:
+            return
+        if generation is None or generation != _generation + 1:
+            # Another process changed the sets too, rebuild on next query
+            _index = None
+            return
+        change(_index)
+        _generation = generation
+
+
+def on_commit(change):
+    """Apply ``change(index)`` locally once the transaction commits."""
+    transaction.on_commit(lambda: _apply(change))
+
+
+def links_changed(instance, action, pk_set):
+    """Apply an ``m2m_changed`` of ``Ingredient.dishes``."""
+    if action == "pre_clear":
+        if isinstance(instance, Dish):
+            pairs = instance.ingredients.values_list("pk", flat=True)
+        else:
+            pairs = instance.dishes.values_list("pk", flat=True)
+        instance._ingredient_sets_cleared = set(pairs)
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_ingredient_sets_cleared", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+    if isinstance(instance, Dish):
+        pairs = [(instance.pk, pk) for pk in pk_set]
+    else:
+        pairs = [(pk, instance.pk) for pk in pk_set]
+    adding = action == "post_add"
+
+    def change(index):
+        for dish_pk, ingredient_pk in pairs:
+            if adding:
+                index.link(dish_pk, ingredient_pk)
+            else:
+                index.unlink(dish_pk, ingredient_pk)
+
+    on_commit(change)
@@ -0,0 +1,418 @@
+"""
+Live change events for the kitchen screens, sent as Server-Sent Events.
+
+Signal receivers and the bulk writers ``publish`` an event once their
+transaction commits. The broker hands it to every subscription of the
+process, an ``asyncio.Queue`` read by one open stream.
+
+Streams are answered by ``LiveEventsRouter`` in front of the Django ASGI
+application. Django keeps a thread per request for its sync middleware,
+so the router skips the middleware and checks a short-lived signed token
+instead of the session: an idle stream holds no thread and no database
+connection, only its queue and a suspended coroutine. A stream ends once
+its token would have expired, the screen then asks ``LiveTokenView`` for a
+new one, which checks the session: a cook logged out or deactivated stops
+receiving events within ``2 * TOKEN_MAX_AGE``.
+
+``LocalBroker`` reaches the streams of one process, ``PostgresBroker``
+relays events through ``LISTEN``/``NOTIFY`` to every worker. Set
+``KITCHEN_LIVE_BROKER`` to choose.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core import signing
+from django.db import connection, transaction
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.utils.module_loading import import_string
+from django.views import generic
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("dish", "dishtype", "ingredient", "assignment")
+# Tells a screen to reload, after events were lost or a bulk import
+RELOAD = "reload"
+QUEUE_SIZE = 100
+HEARTBEAT = 15
+RETRY_MS = 5000
+FALLBACK_RETRY_MS = 30000
+TOKEN_SALT = "kitchen.live"
+TOKEN_MAX_AGE = 5 * 60
+CHANNEL = "kitchen_live"
+# pg_notify payloads must stay below 8000 bytes
+MAX_PAYLOAD = 7900
+RECONNECT_DELAY = 1
+
+
+def model_topic(model):
+    name = model._meta.model_name
+    return name if name in TOPICS else None
+
+
+def make_event(topic, ids=(), dishes=()):
+    return {
+        "topic": topic,
+        "ids": sorted(set(ids)),
+        "dishes": sorted(set(dishes)),
+    }
+
+
+def format_event(event):
+    lines = []
+    if "id" in event:
+        lines.append(f"id: {event['id']}")
+    data = {key: value for key, value in event.items() if key != "id"}
+    lines.append(f"event: {event['topic']}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+class Subscription:
+    """Events for one stream, filtered by topic and optionally by dish."""
+
+    def __init__(self, topics=None, dishes=None, size=QUEUE_SIZE):
+        self.topics = set(topics or TOPICS) | {RELOAD}
+        self.dishes = set(dishes or ())
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(size)
+
+    def wants(self, event):
+        if event["topic"] not in self.topics:
+            return False
+        if self.dishes and event["dishes"]:
+            return not self.dishes.isdisjoint(event["dishes"])
+        # Changes whose dishes are unknown reach every screen
+        return True
+
+    def _drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    def put(self, event):
+        """Queue ``event``, called in the subscription's loop."""
+        if not self.wants(event):
+            return
+        if self.queue.full():
+            # A stream that stopped reading reloads once it catches up
+            self._drain()
+            event = make_event(RELOAD)
+        self.queue.put_nowait(event)
+
+    def close(self):
+        if self.queue.full():
+            self._drain()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout=None):
+        """The next event, ``None`` once closed."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+def _fan_out(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.put(event)
+
+
+class LocalBroker:
+    """Hands events to the subscriptions of this process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loops = {}
+        self.last_id = 0
+
+    def subscribe(self, topics=None, dishes=None):
+        """Subscribe in the running event loop."""
+        subscription = Subscription(topics, dishes)
+        with self.lock:
+            self.loops.setdefault(subscription.loop, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.loops.get(subscription.loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.loops[subscription.loop]
+
+    def subscriber_count(self):
+        with self.lock:
+            return sum(len(found) for found in self.loops.values())
+
+    def publish(self, event):
+        self.deliver(event)
+
+    def deliver(self, event):
+        """Queue ``event`` on every subscription, from any thread."""
+        with self.lock:
+            self.last_id += 1
+            event = dict(event, id=self.last_id)
+            targets = [
+                (loop, list(subscriptions))
+                for loop, subscriptions in self.loops.items()
+            ]
+        for loop, subscriptions in targets:
+            # One wake-up per event loop, however many streams it serves
+            try:
+                loop.call_soon_threadsafe(_fan_out, subscriptions, event)
+            except RuntimeError:
+                # The loop was closed under its subscriptions
+                pass
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Publishes with ``pg_notify`` and delivers what a per-process listener
+    thread receives, so every worker sees the events of every other.
+    Uses the raw psycopg2 connection of the default database.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.listener = None
+
+    def publish(self, event):
+        payload = json.dumps(event, separators=(",", ":"))
+        if len(payload) > MAX_PAYLOAD:
+            # Screens treat an event without ids as touching everything
+            payload = json.dumps(make_event(event["topic"]))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [CHANNEL, payload])
+
+    def subscribe(self, topics=None, dishes=None):
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(
+                    target=self.listen, name="kitchen-live", daemon=True
+                )
+                self.listener.start()
+        return super().subscribe(topics, dishes)
+
+    def listen(self):
+        reconnecting = False
+        while True:
+            raw = None
+            try:
+                raw = connection.get_new_connection(
+                    connection.get_connection_params()
+                )
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {CHANNEL}")
+                if reconnecting:
+                    # Events sent while the listener was down are lost
+                    self.deliver(make_event(RELOAD))
+                while True:
+                    if select.select([raw], [], [], HEARTBEAT)[0]:
+                        raw.poll()
+                        while raw.notifies:
+                            notify = raw.notifies.pop(0)
+                            try:
+                                event = json.loads(notify.payload)
+                            except ValueError:
+                                logger.warning(
+                                    "Ignoring malformed live event %r",
+                                    notify.payload,
+                                )
+                                continue
+                            self.deliver(event)
+            except Exception:
+                # Whatever broke, the thread must keep listening
+                logger.exception("Live events listener failed, reconnecting")
+                reconnecting = True
+                time.sleep(RECONNECT_DELAY)
+            finally:
+                if raw is not None:
+                    raw.close()
+
+
+_broker = None
+_broker_path = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker, _broker_path
+    path = getattr(
+        settings, "KITCHEN_LIVE_BROKER", "kitchen.live.LocalBroker"
+    )
+    with _broker_lock:
+        if _broker is None or _broker_path != path:
+            _broker = import_string(path)()
+            _broker_path = path
+        return _broker
+
+
+def publish(topic, ids=(), dishes=()):
+    """Send an event to the live screens once the transaction commits."""
+    event = make_event(topic, ids, dishes)
+    transaction.on_commit(
+        lambda: get_broker().publish(event), robust=True
+    )
+
+
+def publish_for(model, pks):
+    """Publish a change of rows of ``model``, if screens show them."""
+    topic = model_topic(model)
+    if topic is not None:
+        publish(topic, pks, pks if topic == "dish" else ())
+
+
+def make_token(user):
+    return signing.dumps(user.pk, salt=TOKEN_SALT)
+
+
+def read_token(token):
+    """The user pk of a token issued in the last ``TOKEN_MAX_AGE``."""
+    try:
+        return signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def _query_values(query, name):
+    values = []
+    for value in query.get(name, ()):
+        values.extend(part for part in value.replace(",", " ").split())
+    return values
+
+
+async def _respond(send, status, body):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _wait_for_disconnect(receive, subscription):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+    subscription.close()
+
+
+async def stream(scope, receive, send):
+    """
+    Serve ``GET ?token=...&topics=dish,assignment&dish=42`` as an event
+    stream until the client disconnects.
+    """
+    query = parse_qs(scope["query_string"].decode("latin-1"))
+    if read_token(query.get("token", [""])[0]) is None:
+        await _respond(send, 403, b"Invalid or expired live events token")
+        return
+    topics = [
+        topic for topic in _query_values(query, "topics") if topic in TOPICS
+    ]
+    dishes = [
+        int(value) for value in _query_values(query, "dish")
+        if value.isdigit()
+    ]
+
+    broker = get_broker()
+    subscription = broker.subscribe(topics, dishes)
+    watcher = asyncio.ensure_future(
+        _wait_for_disconnect(receive, subscription)
+    )
+    try:
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        })
+        opening = f"retry: {RETRY_MS}\n\n".encode()
+        if any(name == b"last-event-id" for name, _ in scope["headers"]):
+            # Events sent while the screen was away are not kept
+            opening += format_event(make_event(RELOAD))
+        await send({
+            "type": "http.response.body", "body": opening, "more_body": True,
+        })
+        loop = asyncio.get_running_loop()
+        closes_at = loop.time() + getattr(
+            settings, "KITCHEN_LIVE_STREAM_MAX_AGE", TOKEN_MAX_AGE
+        )
+        while True:
+            left = closes_at - loop.time()
+            if left <= 0:
+                # EventSource reconnects, with a token checked against
+                # the session
+                break
+            try:
+                event = await subscription.get(min(HEARTBEAT, left))
+            except asyncio.TimeoutError:
+                chunk = b": ping\n\n"
+            else:
+                if event is None:
+                    break
+                chunk = format_event(event)
+            await send({
+                "type": "http.response.body", "body": chunk, "more_body": True,
+            })
+    except OSError:
+        # The server lost the client while we were sending
+        pass
+    finally:
+        broker.unsubscribe(subscription)
+        watcher.cancel()
+
+
+class LiveEventsRouter:
+    """
+    ASGI application that streams the ``kitchen:live-events`` path itself
+    and passes every other request on to ``application``.
+    """
+
+    def __init__(self, application):
+        self.application = application
+        self.path = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "GET":
+            if self.path is None:
+                self.path = reverse("kitchen:live-events")
+            if scope["path"] == self.path:
+                await stream(scope, receive, send)
+                return
+        await self.application(scope, receive, send)
+
+
+class LiveTokenView(LoginRequiredMixin, generic.View):
+    """A token to open the event stream with, never cached."""
+
+    def get(self, request):
+        response = JsonResponse({
+            "url": reverse("kitchen:live-events"),
+            "token": make_token(request.user),
+        })
+        patch_cache_control(response, private=True, no_store=True)
+        return response
+
+
+class LiveEventsFallbackView(generic.View):
+    """
+    Reached when the stream request did not go through LiveEventsRouter
+    (runserver, WSGI workers). Asks EventSource to come back later
+    instead of holding a worker.
+    """
+
+    def get(self, request):
+        response = HttpResponse(
+            f"retry: {FALLBACK_RETRY_MS}\n\n",
+            content_type="text/event-stream",
+        )
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import assets
+
+
+def _kib(size):
+    return "-" if size is None else f"{size / 1024:.1f}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the static bytes each page ships, raw and as WhiteNoise "
+        "serves them gzip or brotli compressed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "templates", nargs="*",
+            help="Page templates to report, all pages by default",
+        )
+
+    def handle(self, *args, **options):
+        pages = assets.page_assets()
+        if options["templates"]:
+            pages = {
+                name: paths for name, paths in pages.items()
+                if name in options["templates"]
+            }
+        self.stdout.write(
+            f"{'page':<44}{'files':>6}{'raw KiB':>10}"
+            f"{'gzip KiB':>10}{'br KiB':>10}"
+        )
+        missing = set()
+        for name, paths in pages.items():
+            sizes = {path: assets.asset_size(path) for path in paths}
+            missing.update(path for path, size in sizes.items() if not size)
+            found = [size for size in sizes.values() if size]
+            raw = sum(size[0] for size in found)
+            gzipped = sum(size[1] for size in found)
+            brotlied = None
+            if assets.brotli_installed:
+                brotlied = sum(size[2] for size in found)
+            self.stdout.write(
+                f"{name:<44}{len(found):>6}{_kib(raw):>10}"
+                f"{_kib(gzipped):>10}{_kib(brotlied):>10}"
+            )
+
+        collected = assets.referenced_assets()
+        size = sum(assets.asset_size(path)[0] for path in collected)
+        self.stdout.write(
+            f"{len(collected)} files, {_kib(size)} KiB referenced by the "
+            f"templates, stylesheet fonts and images included"
+        )
+        for path in sorted(missing):
+            self.stderr.write(self.style.WARNING(f"Missing: {path}"))
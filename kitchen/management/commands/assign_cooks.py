@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import assignment
+
+
+class Command(BaseCommand):
+    help = (
+        "Spread all dishes over the cooks by experience and apply the "
+        "result, or only preview it with --dry-run"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cooks-per-dish", type=int, default=1)
+        parser.add_argument(
+            "--group", action="append", dest="groups",
+            help="Only assign cooks of this group, may be repeated"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Print the plan without writing it"
+        )
+
+    def handle(self, *args, **options):
+        if options["cooks_per_dish"] < 1:
+            raise CommandError("--cooks-per-dish must be at least 1")
+        started = time.perf_counter()
+        plan = assignment.plan(
+            options["cooks_per_dish"],
+            assignment.eligible_cooks(options["groups"]),
+        )
+        if not plan.cooks:
+            raise CommandError("No active cooks to assign dishes to")
+        elapsed = time.perf_counter() - started
+
+        if options["verbosity"] > 1:
+            for cook in plan.cooks:
+                self.stdout.write(
+                    f"{cook.username:<30} {cook.current_dishes:>6} -> "
+                    f"{cook.planned_dishes:<6} dishes, load "
+                    f"{cook.current_share:8.1f} -> {cook.planned_share:.1f}"
+                )
+        changed = plan.changed
+        summary = (
+            f"{len(plan.targets)} dishes over {len(plan.cooks)} cooks, "
+            f"busiest cook at {plan.spread_current:.2f}x -> "
+            f"{plan.spread_planned:.2f}x the average, "
+            f"{len(changed)} dishes change (planned in {elapsed:.2f}s)"
+        )
+        if options["dry_run"]:
+            self.stdout.write(f"Dry run: {summary}")
+        else:
+            assignment.apply(plan)
+            self.stdout.write(self.style.SUCCESS(f"Assigned {summary}"))
+        for cook in plan.dropped:
+            self.stdout.write(
+                f"{cook.username} is not in the plan and "
+                f"{'would lose' if options['dry_run'] else 'lost'} "
+                f"{cook.dishes} dishes"
+            )
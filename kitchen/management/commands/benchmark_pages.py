@@ -0,0 +1,104 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import benchmark, page_weight
+from kitchen.models import Dish
+from kitchen.urls import urlpatterns
+
+
+def _kib(size):
+    return f"{size / 1024:.1f}"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the bytes that block the first paint and the render time "
+        "of the kitchen pages in the full theme layout and the slim one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=20,
+            help="Measured requests per page and layout"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=3,
+            help="Unmeasured requests per page and layout"
+        )
+        parser.add_argument(
+            "--routes", nargs="+", metavar="NAME",
+            help="Only measure these url names"
+        )
+        parser.add_argument(
+            "--username",
+            help=f"Cook to log in as, defaults to a "
+                 f"'{benchmark.BENCHMARK_USER}' manager created on first use"
+        )
+        parser.add_argument("--output", help="Write JSON results here")
+
+    def handle(self, *args, **options):
+        if not Dish.objects.exists():
+            raise CommandError(
+                "The database has no dishes, run seed_kitchen first"
+            )
+        probes = page_weight.page_probes(
+            urlpatterns, benchmark.pick_objects(), options["routes"]
+        )
+        if not probes:
+            raise CommandError("No routes matched")
+        try:
+            user = benchmark.benchmark_user(options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No cook named '{options['username']}'")
+        driver = benchmark.get_driver("wsgi", benchmark.Session(user))
+
+        pages = page_weight.run(
+            driver, probes,
+            requests=options["requests"], warmup=options["warmup"],
+        )
+        self.report(pages)
+        self.report_comparison(page_weight.compare(pages))
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(pages, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+    def report(self, pages):
+        self.stdout.write(
+            f"{'route':<28}{'layout':<8}{'html KiB':>10}{'blocking':>10}"
+            f"{'paint KiB':>11}{'later KiB':>11}{'p50 ms':>9}{'p95 ms':>9}"
+        )
+        for page in pages:
+            self.stdout.write(
+                f"{page['route']:<28}{page['layout']:<8}"
+                f"{_kib(page['html_gzip']):>10}{len(page['blocking']):>10}"
+                f"{_kib(page['first_paint_gzip']):>11}"
+                f"{_kib(page['deferred_gzip']):>11}"
+                f"{page['p50_ms']:>9.1f}{page['p95_ms']:>9.1f}"
+            )
+        self.stdout.write(
+            "Sizes are gzip compressed; paint is the HTML plus the files "
+            "that block the first paint, later is what loads after it"
+        )
+
+    def report_comparison(self, rows):
+        if not rows:
+            return
+        self.stdout.write(
+            f"{'route':<28}{'full KiB':>10}{'slim KiB':>10}{'change':>9}"
+            f"{'full ms':>9}{'slim ms':>9}"
+        )
+        for row in rows:
+            old = row["old_first_paint_gzip"]
+            change = (
+                (row["new_first_paint_gzip"] - old) / old * 100 if old
+                else 0.0
+            )
+            self.stdout.write(
+                f"{row['route']:<28}{_kib(old):>10}"
+                f"{_kib(row['new_first_paint_gzip']):>10}{change:>+8.1f}%"
+                f"{row['old_p50_ms']:>9.1f}{row['new_p50_ms']:>9.1f}"
+            )
@@ -0,0 +1,172 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import benchmark
+from kitchen.models import Dish
+from kitchen.urls import urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and p50/p95/p99 latency of every kitchen route "
+        "through the WSGI or ASGI application"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interface", choices=["wsgi", "asgi"], default="wsgi"
+        )
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--requests", type=int, default=50,
+            help="Measured requests per route"
+        )
+        parser.add_argument(
+            "--warmup", type=int, default=5,
+            help="Unmeasured requests per route before measuring"
+        )
+        parser.add_argument(
+            "--routes", nargs="+", metavar="NAME",
+            help="Only measure these url names"
+        )
+        parser.add_argument(
+            "--versus-async", action="store_true",
+            help="Measure the read routes and their async twins side by "
+                 "side through the ASGI application"
+        )
+        parser.add_argument(
+            "--no-posts", action="store_true",
+            help="Skip the dish-add, dish-remove and "
+                 "dish-update-ingredient POST flows"
+        )
+        parser.add_argument(
+            "--username",
+            help=f"Cook to log in as, defaults to a "
+                 f"'{benchmark.BENCHMARK_USER}' manager created on first use"
+        )
+        parser.add_argument("--label", default="", help="Stored with results")
+        parser.add_argument("--output", help="Write JSON results here")
+        parser.add_argument(
+            "--baseline", help="Compare this run with an earlier --output"
+        )
+        parser.add_argument(
+            "--compare", nargs=2, metavar=("OLD", "NEW"),
+            help="Only compare two saved results"
+        )
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="p95 growth in percent that counts as a regression"
+        )
+        parser.add_argument(
+            "--fail-on-regression", action="store_true",
+            help="Exit with an error when a route regressed"
+        )
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            old, new = (self.load(path) for path in options["compare"])
+            self.report_comparison(old, new, options)
+            return
+
+        if not Dish.objects.exists():
+            raise CommandError(
+                "The database has no dishes, run seed_kitchen first"
+            )
+        objects = benchmark.pick_objects()
+        if options["versus_async"]:
+            routes = benchmark.async_twins(urlpatterns, options["routes"])
+            probes = benchmark.build_probes(
+                urlpatterns, objects, routes=routes, posts=False
+            )
+            # Alternate sync and async so both see the same warm caches
+            probes.sort(key=lambda probe: routes.index(probe.route))
+            options["interface"] = "asgi"
+        else:
+            probes = benchmark.build_probes(
+                urlpatterns, objects,
+                routes=options["routes"], posts=not options["no_posts"],
+            )
+        if not probes:
+            raise CommandError("No routes matched")
+        session = benchmark.Session(self.get_user(options["username"]))
+        driver = benchmark.get_driver(options["interface"], session)
+
+        results = benchmark.run(
+            driver, probes,
+            requests=options["requests"],
+            concurrency=options["concurrency"],
+            warmup=options["warmup"],
+            label=options["label"],
+        )
+        self.report(results)
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options["versus_async"]:
+            self.report_comparison(
+                *benchmark.split_async(results), options,
+                labels=("sync", "async"),
+            )
+        if options["baseline"]:
+            self.report_comparison(
+                self.load(options["baseline"]), results, options
+            )
+
+    def get_user(self, username):
+        try:
+            return benchmark.benchmark_user(username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No cook named '{username}'")
+
+    def load(self, path):
+        try:
+            with open(path) as file:
+                return json.load(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read results from {path}: {error}")
+
+    def report(self, results):
+        meta = results["meta"]
+        self.stdout.write(
+            f"{meta['interface']}, concurrency {meta['concurrency']}, "
+            f"{meta['requests']} requests per route, {meta['database']} "
+            f"with {meta['rows']['dishes']} dishes"
+        )
+        self.stdout.write(
+            f"{'route':<28}{'method':<7}{'rps':>9}{'p50 ms':>9}"
+            f"{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}"
+        )
+        for row in results["routes"]:
+            line = (
+                f"{row['route']:<28}{row['method']:<7}"
+                f"{row['throughput_rps']:>9.1f}{row['p50_ms']:>9.1f}"
+                f"{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}"
+                f"{row['errors']:>8}"
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if row["errors"] else line
+            )
+
+    def report_comparison(self, old, new, options, labels=("old", "new")):
+        rows = benchmark.compare(old, new, threshold=options["threshold"])
+        before, after = labels
+        self.stdout.write(
+            f"{'route':<36}{before + ' p95':>11}{after + ' p95':>11}"
+            f"{'change':>9}{before + ' rps':>11}{after + ' rps':>11}"
+        )
+        for row in rows:
+            line = (
+                f"{row['key']:<36}{row['old_p95_ms']:>11.1f}"
+                f"{row['new_p95_ms']:>11.1f}{row['p95_change']:>+8.1f}%"
+                f"{row['old_rps']:>11.1f}{row['new_rps']:>11.1f}"
+            )
+            self.stdout.write(
+                self.style.ERROR(line) if row["regressed"] else line
+            )
+        regressed = [row["key"] for row in rows if row["regressed"]]
+        if regressed and options["fail_on_regression"]:
+            raise CommandError(f"Regressed: {', '.join(regressed)}")
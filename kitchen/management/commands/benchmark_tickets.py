@@ -0,0 +1,191 @@
+import json
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+
+from kitchen import tickets
+from kitchen.benchmark import PERCENTILES
+from kitchen.models import Dish, DishType, OrderTicket
+from kitchen.stats import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Enqueue tickets and let concurrent stations claim and complete "
+        "them, reporting claims per second and checking none is claimed "
+        "twice"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=2000)
+        parser.add_argument(
+            "--stations", type=int, default=8,
+            help="Concurrent claimers, one thread and connection each"
+        )
+        parser.add_argument(
+            "--batch", type=int, default=1,
+            help="Tickets taken per claim"
+        )
+        parser.add_argument(
+            "--min-rate", type=float, default=None,
+            help="Fail when fewer tickets per second are claimed"
+        )
+        parser.add_argument("--output", help="Write the result as JSON")
+        parser.add_argument(
+            "--retries", type=int, default=1000,
+            help="Give up after this many lock timeouts in a row"
+        )
+        parser.add_argument(
+            "--keep", action="store_true",
+            help="Keep the benchmark tickets, and the dish and cook made "
+                 "for them, instead of deleting them"
+        )
+
+    def run_stations(self, cook, created_pks, options):
+        claimed = Counter()
+        latencies = []
+        errors = Counter()
+        lock = threading.Lock()
+        failures = []
+
+        def attempt(call, *args):
+            # Lock timeouts are counted and retried up to --retries times
+            for _retry in range(options["retries"] + 1):
+                try:
+                    return call(*args)
+                except OperationalError as error:
+                    last_error = error
+                    with lock:
+                        errors[str(error)] += 1
+                    time.sleep(0.001)
+            raise CommandError(
+                f"Gave up after {options['retries']} retries: {last_error}"
+            )
+
+        def station(number):
+            own_latencies, own_claimed = [], []
+            try:
+                while True:
+                    started = time.perf_counter()
+                    batch = attempt(
+                        tickets.claim, cook, f"bench-{number}",
+                        options["batch"],
+                    )
+                    own_latencies.append(time.perf_counter() - started)
+                    if not batch:
+                        break
+                    pks = [ticket.pk for ticket in batch]
+                    own_claimed.extend(pks)
+                    attempt(tickets.complete, cook, pks)
+            except CommandError as error:
+                with lock:
+                    failures.append(error)
+            finally:
+                connections.close_all()
+                with lock:
+                    latencies.extend(own_latencies)
+                    claimed.update(own_claimed)
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=station, args=(number,))
+            for number in range(options["stations"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        if failures:
+            raise failures[0]
+
+        latencies.sort()
+        twice = sorted(pk for pk, count in claimed.items() if count > 1)
+        result = {
+            "vendor": connection.vendor,
+            "skip_locked": connection.features
+            .has_select_for_update_skip_locked,
+            "stations": options["stations"],
+            "batch": options["batch"],
+            "tickets": len(created_pks),
+            "claimed": sum(claimed.values()),
+            "claimed_twice": len(twice),
+            "errors": dict(errors),
+            "seconds": wall,
+            "tickets_per_second": sum(claimed.values()) / wall,
+        }
+        for percent in PERCENTILES:
+            result[f"claim_p{percent}_ms"] = (
+                percentile(latencies, percent) * 1000
+            )
+        return result
+
+    def handle(self, *args, **options):
+        if tickets.queued().exists():
+            raise CommandError(
+                "Real tickets are queued, run the benchmark on an idle queue"
+            )
+        # Rows made for the benchmark only, deleted with its tickets
+        fixtures = []
+        cook, created = get_user_model().objects.get_or_create(
+            username="benchmark_station"
+        )
+        if created:
+            fixtures.append(cook)
+        dish = Dish.objects.first()
+        if dish is None:
+            dishtype, created = DishType.objects.get_or_create(
+                name="Benchmark"
+            )
+            if created:
+                fixtures.append(dishtype)
+            dish = Dish.objects.create(
+                name="Benchmark dish",
+                description="Created by benchmark_tickets",
+                price=1,
+                dishtype=dishtype,
+            )
+            fixtures.insert(0, dish)
+        created_pks = []
+        try:
+            created = OrderTicket.objects.bulk_create(
+                OrderTicket(dish=dish, note="benchmark")
+                for _num in range(options["tickets"])
+            )
+            created_pks = [ticket.pk for ticket in created]
+            connection.close()
+            result = self.run_stations(cook, created_pks, options)
+        finally:
+            if not options["keep"]:
+                OrderTicket.objects.filter(pk__in=created_pks).delete()
+                for row in fixtures:
+                    row.delete()
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(result, output, indent=2)
+        self.stdout.write(
+            f"{result['claimed']}/{result['tickets']} tickets claimed by "
+            f"{result['stations']} stations in {result['seconds']:.2f}s: "
+            f"{result['tickets_per_second']:.0f} tickets/s, claim p50 "
+            f"{result['claim_p50_ms']:.1f} ms, p95 "
+            f"{result['claim_p95_ms']:.1f} ms ({connection.vendor}, "
+            f"{'SKIP LOCKED' if result['skip_locked'] else 'conditional'})"
+        )
+        if (result["claimed_twice"]
+                or result["claimed"] != result["tickets"]):
+            raise CommandError(
+                f"{result['claimed_twice']} tickets claimed twice, "
+                f"{result['tickets'] - result['claimed']} never claimed"
+            )
+        if (options["min_rate"] is not None
+                and result["tickets_per_second"] < options["min_rate"]):
+            raise CommandError(
+                f"{result['tickets_per_second']:.0f} tickets/s is below "
+                f"--min-rate {options['min_rate']:.0f}"
+            )
+        self.stdout.write(self.style.SUCCESS("No ticket was claimed twice"))
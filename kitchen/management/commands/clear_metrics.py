@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from kitchen import metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the request metrics files in KITCHEN_METRICS_DIR, run "
+        "before the server starts its workers"
+    )
+
+    def handle(self, *args, **options):
+        directory = getattr(settings, "KITCHEN_METRICS_DIR", None)
+        if not directory:
+            self.stdout.write("KITCHEN_METRICS_DIR is not set")
+            return
+        deleted = metrics.clear_directory(directory)
+        self.stdout.write(f"Deleted {deleted} metrics files")
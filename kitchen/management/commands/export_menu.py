@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import menu_export
+
+
+class Command(BaseCommand):
+    help = "Stream dishes or cooks as CSV or JSON lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument("export", choices=list(menu_export.EXPORTS))
+        parser.add_argument(
+            "--format", choices=list(menu_export.FORMATS), default="csv"
+        )
+        parser.add_argument(
+            "--output", help="File to write, defaults to stdout"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int,
+            default=menu_export.DEFAULT_CHUNK_SIZE,
+            help="Rows fetched and prefetched per query"
+        )
+
+    def handle(self, *args, **options):
+        chunks = menu_export.stream(
+            options["export"], options["format"], options["chunk_size"]
+        )
+        if not options["output"]:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+        try:
+            output = open(
+                options["output"], "w", encoding="utf-8", newline=""
+            )
+        except OSError as error:
+            raise CommandError(f"Cannot write {options['output']}: {error}")
+        with output:
+            for chunk in chunks:
+                output.write(chunk)
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import fragments
+
+
+class Command(BaseCommand):
+    help = (
+        "Show hit/miss counts of the generation-keyed fragment cache, "
+        "over the KITCHEN_FRAGMENT_STATS_SAMPLE share of renders"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Zero the counters after"
+        )
+
+    def handle(self, *args, **options):
+        stats = fragments.stats()
+        if not stats:
+            self.stdout.write("No cached fragments rendered yet")
+        for name, counts in stats.items():
+            total = counts["hit"] + counts["miss"]
+            ratio = counts["hit"] / total if total else 0
+            self.stdout.write(
+                f"{name}: {counts['hit']} hits, {counts['miss']} misses "
+                f"({ratio:.0%} hit rate)"
+            )
+        if options["reset"]:
+            fragments.reset_stats()
@@ -0,0 +1,66 @@
+import csv
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen.menu_import import (
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    MenuImporter,
+    guess_format,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import dishes with their dish type, price, ingredients and cooks "
+        "from a CSV or JSON lines file"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - for stdin")
+        parser.add_argument(
+            "--format", choices=FORMATS,
+            help="Defaults to jsonl for .jsonl/.ndjson files, csv otherwise"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--merge", action="store_true",
+            help="Add cooks and ingredients instead of replacing them"
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or guess_format(path)
+        importer = MenuImporter(
+            batch_size=options["batch_size"], merge=options["merge"]
+        )
+        try:
+            if path == "-":
+                report = importer.run(read_rows(sys.stdin, file_format))
+            else:
+                try:
+                    stream = open(path, encoding="utf-8-sig", newline="")
+                except OSError as error:
+                    raise CommandError(f"Cannot open {path}: {error}")
+                with stream:
+                    report = importer.run(read_rows(stream, file_format))
+        except (UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(
+                f"Cannot read {path}: {error}. "
+                f"{importer.report.imported} dishes were imported before"
+            )
+
+        for line, message in report.errors:
+            self.stderr.write(f"line {line}: {message}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(
+                f"... and {report.error_count - len(report.errors)} more"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {report.rows} rows: {report.created} dishes created, "
+            f"{report.updated} updated, {report.error_count} rejected"
+        ))
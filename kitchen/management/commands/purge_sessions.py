@@ -0,0 +1,43 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired sessions in small batches, so that each DELETE "
+        "only holds its locks briefly"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause", type=float, default=0.0,
+            help="Seconds to wait between batches",
+        )
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, "get_model_class"):
+            self.stdout.write(
+                f"{settings.SESSION_ENGINE} keeps no session rows to purge"
+            )
+            return
+        expired = store.get_model_class().objects.filter(
+            expire_date__lt=timezone.now()
+        )
+        deleted = 0
+        while True:
+            keys = list(
+                expired.values_list("pk", flat=True)[:options["chunk_size"]]
+            )
+            if not keys:
+                break
+            # Cached copies expire from the cache on their own
+            deleted += expired.filter(pk__in=keys).delete()[0]
+            if options["pause"]:
+                time.sleep(options["pause"])
+        self.stdout.write(f"Deleted {deleted} expired sessions")
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import counters
+
+
+class Command(BaseCommand):
+    help = "Recount cooks, dishes, dish types and ingredients from scratch"
+
+    def handle(self, *args, **options):
+        counters.rebuild()
+        for name, count in sorted(counters.get_counts().items()):
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS("Counters rebuilt"))
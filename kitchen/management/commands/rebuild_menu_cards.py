@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from kitchen import menu_cards
+from kitchen.models import MenuCard
+
+
+class Command(BaseCommand):
+    help = "Regenerate the denormalised menu card of every dish"
+
+    def handle(self, *args, **options):
+        menu_cards.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {MenuCard.objects.count()} menu cards"
+        ))
@@ -0,0 +1,338 @@
+import io
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from kitchen import (
+    counters,
+    fragments,
+    ingredient_sets,
+    live,
+    menu_cards,
+)
+from kitchen.models import Cook, Dish, DishType, Ingredient
+
+
+ADJECTIVES = [
+    "Spicy", "Smoked", "Crispy", "Roasted", "Grilled", "Braised", "Fresh",
+    "Creamy", "Tangy", "Golden", "Rustic", "Charred", "Sweet", "Herbed",
+]
+BASES = [
+    "Tomato", "Mushroom", "Chicken", "Beef", "Salmon", "Lentil", "Pumpkin",
+    "Duck", "Shrimp", "Tofu", "Lamb", "Eggplant", "Potato", "Pork",
+]
+FORMS = [
+    "Soup", "Salad", "Risotto", "Stew", "Tart", "Curry", "Burger", "Pasta",
+    "Skewers", "Bowl", "Pie", "Sandwich", "Gratin", "Dumplings",
+]
+DISH_TYPES = [
+    "Starter", "Soup", "Salad", "Main", "Side", "Dessert", "Breakfast",
+    "Snack", "Drink", "Sauce",
+]
+INGREDIENTS = [
+    "salt", "pepper", "olive oil", "butter", "garlic", "onion", "flour",
+    "egg", "milk", "cream", "sugar", "lemon", "parsley", "thyme", "basil",
+    "rice", "tomato", "carrot", "celery", "potato", "chili", "ginger",
+    "cheese", "honey", "vinegar", "mustard", "paprika", "cumin", "wine",
+]
+FIRST_NAMES = [
+    "Anna", "Ben", "Chloe", "David", "Elena", "Felix", "Grace", "Hugo",
+    "Iris", "Jonas", "Kira", "Liam", "Mila", "Noah", "Olga", "Pavel",
+]
+LAST_NAMES = [
+    "Smith", "Kowalski", "Rossi", "Müller", "Dubois", "Novak", "Garcia",
+    "Ivanenko", "Larsen", "Silva", "Nagy", "Horvat", "Berg", "Costa",
+]
+
+
+def weights_for(size, distribution, skew):
+    if distribution == "zipf":
+        return [1 / (rank ** skew) for rank in range(1, size + 1)]
+    return [1] * size
+
+
+def pick_distinct(rng, population, cum_weights, mean):
+    """Pick about ``mean`` distinct members, at least one."""
+    count = max(1, min(len(population), round(rng.gauss(mean, mean / 3))))
+    return set(rng.choices(population, cum_weights=cum_weights, k=count))
+
+
+def accumulate(weights):
+    total = 0
+    cumulative = []
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+    return cumulative
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large dish/dish type/ingredient/cook graph for "
+        "benchmarks, using bulk inserts and Postgres COPY when available"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dishes", type=int, default=1000)
+        parser.add_argument("--dishtypes", type=int, default=20)
+        parser.add_argument("--ingredients", type=int, default=500)
+        parser.add_argument("--cooks", type=int, default=100)
+        parser.add_argument(
+            "--ingredients-per-dish", type=float, default=4,
+            help="Mean number of ingredients linked to a dish"
+        )
+        parser.add_argument(
+            "--cooks-per-dish", type=float, default=2,
+            help="Mean number of cooks assigned to a dish"
+        )
+        parser.add_argument(
+            "--distribution", choices=["uniform", "zipf"], default="zipf",
+            help="How ingredient, cook and dish type popularity is spread"
+        )
+        parser.add_argument(
+            "--skew", type=float, default=1.0,
+            help="Exponent of the zipf distribution"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--prefix", default="seed",
+            help="Prefix of generated names, must not be in use yet"
+        )
+        parser.add_argument(
+            "--password", default="seed12345",
+            help="Password of every generated cook, hashed only once"
+        )
+        parser.add_argument("--random-seed", type=int, default=None)
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="Use bulk_create even on Postgres"
+        )
+
+    def handle(self, *args, **options):
+        if Dish.objects.filter(
+            name__startswith=f"{options['prefix']} "
+        ).exists():
+            raise CommandError(
+                f"Names with prefix '{options['prefix']}' already exist, "
+                f"pass another --prefix"
+            )
+        self.rng = random.Random(options["random_seed"])
+        self.batch_size = options["batch_size"]
+        self.use_copy = (
+            connection.vendor == "postgresql" and not options["no_copy"]
+        )
+        self.now = timezone.now()
+        started = time.perf_counter()
+
+        with transaction.atomic():
+            dishtype_ids = self.create_dishtypes(options)
+            ingredient_ids = self.create_ingredients(options)
+            cook_ids = self.create_cooks(options)
+            dish_ids = self.create_dishes(options, dishtype_ids)
+            self.link(options, dish_ids, ingredient_ids, cook_ids)
+
+        # Bulk inserts send no post_save, refresh what signals maintain
+        counters.rebuild()
+        menu_cards.rebuild()
+        ingredient_sets.invalidate()
+        fragments.bump("dishtype", "ingredient", "cook", "dish")
+        live.publish(live.RELOAD)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(dish_ids)} dishes, {len(dishtype_ids)} dish types, "
+            f"{len(ingredient_ids)} ingredients and {len(cook_ids)} cooks "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def insert(self, model, objects, columns):
+        """Insert ``objects`` and return their primary keys in order."""
+        objects = list(objects)
+        if not self.use_copy:
+            created = []
+            for start in range(0, len(objects), self.batch_size):
+                created.extend(model.objects.bulk_create(
+                    objects[start:start + self.batch_size]
+                ))
+            return [obj.pk for obj in created]
+
+        self.copy(
+            model._meta.db_table,
+            [model._meta.get_field(name).column for name in columns],
+            ([getattr(obj, name) for name in columns] for obj in objects),
+        )
+        # COPY reports no ids, read them back by the unique first column
+        key = columns[0]
+        pks = {}
+        for start in range(0, len(objects), self.batch_size):
+            batch = objects[start:start + self.batch_size]
+            pks.update(model.objects.filter(
+                **{f"{key}__in": [getattr(obj, key) for obj in batch]}
+            ).values_list(key, "pk"))
+        return [pks[getattr(obj, key)] for obj in objects]
+
+    def copy(self, table, columns, rows):
+        def escape(value):
+            if value is None:
+                return "\\N"
+            return (
+                str(value).replace("\\", "\\\\").replace("\t", "\\t")
+                .replace("\n", "\\n").replace("\r", "\\r")
+            )
+
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        buffer = io.StringIO()
+        pending = 0
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            for row in rows:
+                buffer.write("\t".join(escape(value) for value in row))
+                buffer.write("\n")
+                pending += 1
+                if pending == self.batch_size:
+                    self.flush(raw, sql, buffer)
+                    buffer, pending = io.StringIO(), 0
+            if pending:
+                self.flush(raw, sql, buffer)
+
+    @staticmethod
+    def flush(raw, sql, buffer):
+        buffer.seek(0)
+        if hasattr(raw, "copy_expert"):
+            # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:
+            # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+    def create_dishtypes(self, options):
+        prefix = options["prefix"]
+        names = [
+            f"{prefix} {DISH_TYPES[num % len(DISH_TYPES)]} {num}"
+            for num in range(options["dishtypes"])
+        ]
+        return self.insert(
+            DishType,
+            (DishType(name=name, updated_at=self.now) for name in names),
+            ["name", "updated_at"],
+        )
+
+    def create_ingredients(self, options):
+        prefix = options["prefix"]
+        return self.insert(
+            Ingredient,
+            (
+                Ingredient(
+                    name=f"{prefix} {INGREDIENTS[num % len(INGREDIENTS)]} "
+                         f"{num}",
+                    updated_at=self.now,
+                )
+                for num in range(options["ingredients"])
+            ),
+            ["name", "updated_at"],
+        )
+
+    def create_cooks(self, options):
+        prefix = options["prefix"]
+        password = make_password(options["password"])
+        rng = self.rng
+        return self.insert(
+            Cook,
+            (
+                Cook(
+                    username=f"{prefix}_cook_{num}",
+                    password=password,
+                    first_name=rng.choice(FIRST_NAMES),
+                    last_name=rng.choice(LAST_NAMES),
+                    years_of_experience=rng.randint(0, 30),
+                    date_joined=self.now,
+                    updated_at=self.now,
+                )
+                for num in range(options["cooks"])
+            ),
+            [
+                "username", "password", "first_name", "last_name",
+                "years_of_experience", "date_joined", "updated_at",
+                "email", "is_staff", "is_active", "is_superuser",
+            ],
+        )
+
+    def create_dishes(self, options, dishtype_ids):
+        prefix = options["prefix"]
+        rng = self.rng
+        cum_weights = accumulate(weights_for(
+            len(dishtype_ids), options["distribution"], options["skew"]
+        ))
+        dishtypes = rng.choices(
+            dishtype_ids, cum_weights=cum_weights, k=options["dishes"]
+        )
+        return self.insert(
+            Dish,
+            (
+                Dish(
+                    name=f"{prefix} {rng.choice(ADJECTIVES)} "
+                         f"{rng.choice(BASES)} {rng.choice(FORMS)} {num}",
+                    description=f"{rng.choice(ADJECTIVES)} "
+                                f"{rng.choice(BASES).lower()} "
+                                f"{rng.choice(FORMS).lower()}, "
+                                f"house recipe no. {num}",
+                    price=round(rng.uniform(3, 60), 2),
+                    dishtype_id=dishtype_id,
+                    updated_at=self.now,
+                )
+                for num, dishtype_id in enumerate(dishtypes)
+            ),
+            ["name", "description", "price", "dishtype_id", "updated_at"],
+        )
+
+    def link(self, options, dish_ids, ingredient_ids, cook_ids):
+        rng = self.rng
+        distribution, skew = options["distribution"], options["skew"]
+        if ingredient_ids:
+            cum_weights = accumulate(
+                weights_for(len(ingredient_ids), distribution, skew)
+            )
+            self.insert_links(
+                Ingredient.dishes.through,
+                ["dish_id", "ingredient_id"],
+                (
+                    (dish_id, ingredient_id)
+                    for dish_id in dish_ids
+                    for ingredient_id in pick_distinct(
+                        rng, ingredient_ids, cum_weights,
+                        options["ingredients_per_dish"],
+                    )
+                ),
+            )
+        if cook_ids:
+            cum_weights = accumulate(
+                weights_for(len(cook_ids), distribution, skew)
+            )
+            self.insert_links(
+                Dish.cooks.through,
+                ["dish_id", "cook_id"],
+                (
+                    (dish_id, cook_id)
+                    for dish_id in dish_ids
+                    for cook_id in pick_distinct(
+                        rng, cook_ids, cum_weights, options["cooks_per_dish"]
+                    )
+                ),
+            )
+
+    def insert_links(self, through, columns, pairs):
+        if self.use_copy:
+            self.copy(through._meta.db_table, columns, pairs)
+            return
+        batch = []
+        for pair in pairs:
+            batch.append(through(**dict(zip(columns, pair))))
+            if len(batch) == self.batch_size:
+                through.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            through.objects.bulk_create(batch)
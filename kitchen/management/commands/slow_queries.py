@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from kitchen import slow_queries
+
+SORT_KEYS = {"total": "total_ms", "count": "count", "p95": "p95_ms"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Summarise the slow query log by total time, count and p95, per "
+        "query fingerprint or per view"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--log",
+            help="Log file to read, KITCHEN_SLOW_QUERY_LOG by default",
+        )
+        parser.add_argument(
+            "--by", choices=["fingerprint", "view"], default="fingerprint"
+        )
+        parser.add_argument(
+            "--sort", choices=list(SORT_KEYS), default="total"
+        )
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        path = options["log"] or slow_queries.get_config()["path"]
+        if not path:
+            raise CommandError(
+                "Set KITCHEN_SLOW_QUERY_LOG or pass --log to choose a log"
+            )
+        rows = slow_queries.summarize(
+            slow_queries.read_entries(path), by=options["by"]
+        )
+        if not rows:
+            self.stdout.write(f"No slow queries logged in {path}")
+            return
+        rows.sort(key=lambda row: row[SORT_KEYS[options["sort"]]],
+                  reverse=True)
+
+        by_view = options["by"] == "view"
+        self.stdout.write(
+            f"{options['by']:<36}{'count':>7}{'total ms':>11}"
+            f"{'mean ms':>10}{'p95 ms':>10}  "
+            f"{'fingerprints' if by_view else 'views'}"
+        )
+        for row in rows[:options["limit"]]:
+            related = row["fingerprint" if by_view else "view"]
+            self.stdout.write(
+                f"{str(row['key']):<36}{row['count']:>7}"
+                f"{row['total_ms']:>11.1f}{row['mean_ms']:>10.1f}"
+                f"{row['p95_ms']:>10.1f}  "
+                + ", ".join(f"{name} ({count})" for name, count in related)
+            )
+            if not by_view:
+                self.stdout.write(f"    {row['sql']}")
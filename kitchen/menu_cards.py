@@ -0,0 +1,110 @@
+"""
+Maintenance of the denormalised ``MenuCard`` read model.
+
+Every write that changes what a dish row shows ends in ``refresh`` for the
+affected dishes, which rebuilds their cards with three reads and one
+upsert per chunk. Signals cover saves, deletes and ``m2m_changed``; bulk
+writers that bypass signals call ``refresh_for`` or ``rebuild`` themselves.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+
+from kitchen.models import Cook, Dish, DishType, Ingredient, MenuCard
+
+
+CHUNK_SIZE = 1000
+
+CARD_FIELDS = [
+    "name", "description", "price", "dishtype", "dishtype_name",
+    "ingredient_names", "cook_ids", "cook_usernames", "updated_at",
+]
+
+
+def enabled():
+    """Whether dish list and detail pages read from the cards."""
+    return getattr(settings, "KITCHEN_MENU_CARDS", False)
+
+
+def _chunks(values, size=CHUNK_SIZE):
+    values = sorted(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def refresh(dish_pks):
+    """Rebuild the cards of ``dish_pks``, dropping those of deleted dishes."""
+    for chunk in _chunks(set(dish_pks)):
+        dishes = (
+            Dish.objects.filter(pk__in=chunk)
+            .select_related("dishtype")
+            .only("name", "description", "price", "dishtype__name")
+        )
+        ingredients = defaultdict(list)
+        for dish_pk, name in (
+            Ingredient.dishes.through.objects.filter(dish_id__in=chunk)
+            .order_by("ingredient__name")
+            .values_list("dish_id", "ingredient__name")
+        ):
+            ingredients[dish_pk].append(name)
+        cooks = defaultdict(list)
+        for dish_pk, cook_pk, username in (
+            Dish.cooks.through.objects.filter(dish_id__in=chunk)
+            .order_by("cook__username")
+            .values_list("dish_id", "cook_id", "cook__username")
+        ):
+            cooks[dish_pk].append((cook_pk, username))
+
+        cards = [
+            MenuCard(
+                dish_id=dish.pk,
+                name=dish.name,
+                description=dish.description,
+                price=dish.price,
+                dishtype_id=dish.dishtype_id,
+                dishtype_name=dish.dishtype.name,
+                ingredient_names=ingredients[dish.pk],
+                cook_ids=[pk for pk, _username in cooks[dish.pk]],
+                cook_usernames=[username for _pk, username in cooks[dish.pk]],
+            )
+            for dish in dishes
+        ]
+        MenuCard.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=["dish"],
+            update_fields=CARD_FIELDS,
+        )
+        gone = set(chunk) - {card.dish_id for card in cards}
+        if gone:
+            MenuCard.objects.filter(dish_id__in=gone).delete()
+
+
+def dishes_of(model, pks):
+    """Primary keys of the dishes whose cards show one of ``pks``."""
+    if issubclass(model, Dish):
+        return set(pks)
+    if issubclass(model, DishType):
+        queryset = Dish.objects.filter(dishtype_id__in=pks)
+        return set(queryset.values_list("pk", flat=True))
+    if issubclass(model, Ingredient):
+        queryset = Ingredient.dishes.through.objects.filter(
+            ingredient_id__in=pks
+        )
+    elif issubclass(model, Cook):
+        queryset = Dish.cooks.through.objects.filter(cook_id__in=pks)
+    else:
+        return set()
+    return set(queryset.values_list("dish_id", flat=True))
+
+
+def refresh_for(model, pks):
+    refresh(dishes_of(model, pks))
+
+
+def rebuild():
+    """Regenerate every card, chunk by chunk."""
+    MenuCard.objects.exclude(
+        dish_id__in=Dish.objects.values("pk")
+    ).delete()
+    refresh(Dish.objects.values_list("pk", flat=True))
@@ -0,0 +1,130 @@
+"""
+Streaming CSV and JSON lines exports of dishes and cooks.
+
+Rows come from ``QuerySet.iterator(chunk_size=...)``, which runs the
+prefetches once per chunk, so only one chunk of objects and their related
+names is in memory at a time. Dish rows use the columns that
+``kitchen.menu_import`` reads, so an export can be imported elsewhere.
+"""
+import csv
+import json
+
+from django.contrib.auth.models import Group
+from django.db.models import Prefetch
+
+from kitchen.menu_import import join_names
+from kitchen.models import Cook, Dish, Ingredient
+
+
+FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson; charset=utf-8",
+}
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def dish_rows(chunk_size):
+    dishes = (
+        Dish.objects.order_by("pk")
+        .select_related("dishtype")
+        .only("name", "description", "price", "dishtype__name")
+        .prefetch_related(
+            Prefetch("ingredients", Ingredient.objects.only("name")),
+            Prefetch("cooks", Cook.objects.only("username")),
+        )
+    )
+    for dish in dishes.iterator(chunk_size=chunk_size):
+        yield {
+            "name": dish.name,
+            "description": dish.description,
+            "price": str(dish.price),
+            "dish_type": dish.dishtype.name,
+            "ingredients": [
+                ingredient.name for ingredient in dish.ingredients.all()
+            ],
+            "cooks": [cook.username for cook in dish.cooks.all()],
+        }
+
+
+def cook_rows(chunk_size):
+    cooks = (
+        Cook.objects.order_by("pk")
+        .only(
+            "username", "first_name", "last_name", "email",
+            "years_of_experience",
+        )
+        .prefetch_related(
+            Prefetch("groups", Group.objects.only("name")),
+            Prefetch("dishes", Dish.objects.only("name")),
+        )
+    )
+    for cook in cooks.iterator(chunk_size=chunk_size):
+        yield {
+            "username": cook.username,
+            "first_name": cook.first_name,
+            "last_name": cook.last_name,
+            "email": cook.email,
+            "years_of_experience": cook.years_of_experience,
+            "groups": [group.name for group in cook.groups.all()],
+            "dishes": [dish.name for dish in cook.dishes.all()],
+        }
+
+
+EXPORTS = {
+    "dishes": (
+        dish_rows,
+        ["name", "description", "price", "dish_type", "ingredients",
+         "cooks"],
+    ),
+    "cooks": (
+        cook_rows,
+        ["username", "first_name", "last_name", "email",
+         "years_of_experience", "groups", "dishes"],
+    ),
+}
+
+
+class _Line:
+    """File-like target that hands back what csv.writer writes."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows, columns):
+    writer = csv.writer(_Line())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([
+            join_names(row[column])
+            if isinstance(row[column], list) else row[column]
+            for column in columns
+        ])
+
+
+def _jsonl_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
+
+
+def stream(name, file_format="csv", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the export as text, one string per ``chunk_size`` rows. A CSV
+    header goes out on its own before the first query runs.
+    """
+    rows_for, columns = EXPORTS[name]
+    rows = rows_for(chunk_size)
+    if file_format == "csv":
+        lines = _csv_lines(rows, columns)
+        yield next(lines)
+    else:
+        lines = _jsonl_lines(rows)
+
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) == chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
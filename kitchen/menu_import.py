@@ -0,0 +1,296 @@
+"""
+Streaming import of dishes from CSV or JSON lines.
+
+Rows are read one at a time and written in batches, so memory use is
+bounded by the batch size and the name -> pk maps of dish types,
+ingredients and cooks, never by the size of the file.
+
+Every row describes one dish::
+
+    name,description,price,dish_type,ingredients,cooks
+    Borscht,Beetroot soup,8.50,Soup,beetroot;potato;dill,anna;ben
+
+In CSV files ``ingredients`` (names) and ``cooks`` (usernames) are
+separated by ``;``, and a ``;`` or ``\\`` inside a name is escaped with
+``\\``. In JSON lines they are lists. Missing dish types and ingredients
+are created, unknown cooks reject the row. Dishes are matched by name and
+updated in place.
+"""
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from kitchen import (
+    counters,
+    fragments,
+    ingredient_sets,
+    live,
+    menu_cards,
+)
+from kitchen.bulk import bulk_set_m2m
+from kitchen.models import Cook, Dish, DishType, Ingredient
+
+
+FORMATS = ("csv", "jsonl")
+LIST_SEPARATOR = ";"
+ESCAPE = "\\"
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+
+class RowError(Exception):
+    pass
+
+
+def guess_format(filename):
+    if filename.lower().endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return "csv"
+
+
+def read_rows(stream, file_format="csv"):
+    """Yield ``(line, row, error)`` for every record of a text stream."""
+    if file_format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as error:
+            yield line, None, f"Invalid JSON: {error}"
+            continue
+        if not isinstance(row, dict):
+            yield line, None, "Expected a JSON object"
+            continue
+        yield line, row, None
+
+
+def join_names(names):
+    """One CSV cell of ``names``, read back by ``split_names``."""
+    return LIST_SEPARATOR.join(
+        name.replace(ESCAPE, ESCAPE * 2)
+        .replace(LIST_SEPARATOR, ESCAPE + LIST_SEPARATOR)
+        for name in names
+    )
+
+
+def _split_cell(value):
+    names, name, escaped = [], [], False
+    for char in value:
+        if escaped:
+            name.append(char)
+            escaped = False
+        elif char == ESCAPE:
+            escaped = True
+        elif char == LIST_SEPARATOR:
+            names.append("".join(name))
+            name = []
+        else:
+            name.append(char)
+    if escaped:
+        name.append(ESCAPE)
+    names.append("".join(name))
+    return names
+
+
+def split_names(value):
+    """``None`` leaves a relation untouched, an empty value clears it."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = _split_cell(value)
+    elif not isinstance(value, list):
+        raise RowError("Expected a list of names")
+    return list(dict.fromkeys(
+        str(name).strip() for name in value if str(name).strip()
+    ))
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.error_count = 0
+        self.errors = []
+
+    @property
+    def imported(self):
+        return self.created + self.updated
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+class MenuImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, merge=False):
+        self.batch_size = batch_size
+        self.merge = merge
+        self.report = ImportReport()
+        self.dishtypes = dict(DishType.objects.values_list("name", "pk"))
+        self.ingredients = dict(Ingredient.objects.values_list("name", "pk"))
+        self.cooks = dict(Cook.objects.values_list("username", "pk"))
+        self.batch = {}
+
+    def run(self, rows):
+        """
+        Import ``rows`` batch by batch. When reading the file fails
+        midway the error is raised, the batches written before it stay
+        committed and ``report`` counts them.
+        """
+        try:
+            for line, row, error in rows:
+                self.report.rows += 1
+                if error:
+                    self.report.add_error(line, error)
+                    continue
+                try:
+                    cleaned = self.clean(row)
+                except RowError as error:
+                    self.report.add_error(line, str(error))
+                    continue
+                # A later row for the same dish wins, as it would one by one
+                self.batch.pop(cleaned["name"], None)
+                self.batch[cleaned["name"]] = cleaned
+                if len(self.batch) >= self.batch_size:
+                    self.flush()
+            self.flush()
+        finally:
+            if self.report.imported:
+                self.refresh_derived()
+        return self.report
+
+    def refresh_derived(self):
+        counters.rebuild(["dishes", "dishtypes", "ingredients"])
+        ingredient_sets.invalidate()
+        fragments.bump("dish", "dishtype", "ingredient", "cook")
+        live.publish(live.RELOAD)
+
+    def clean(self, row):
+        def field(name):
+            value = row.get(name)
+            if value is None or isinstance(value, str):
+                value = (value or "").strip()
+            try:
+                return Dish._meta.get_field(name).clean(value, None)
+            except ValidationError as error:
+                raise RowError(f"{name}: {'; '.join(error.messages)}")
+
+        cleaned = {
+            "name": field("name"),
+            "description": str(row.get("description") or ""),
+            "price": field("price"),
+            "dish_type": str(row.get("dish_type") or "").strip(),
+            "ingredients": split_names(row.get("ingredients")),
+            "cooks": split_names(row.get("cooks")),
+        }
+        if not cleaned["dish_type"]:
+            raise RowError("dish_type is required")
+        for name in [cleaned["dish_type"], *(cleaned["ingredients"] or [])]:
+            if len(name) > 255:
+                raise RowError(f"Name longer than 255 characters: {name}")
+        unknown = [
+            username for username in cleaned["cooks"] or []
+            if username not in self.cooks
+        ]
+        if unknown:
+            raise RowError(f"Unknown cooks: {', '.join(unknown)}")
+        return cleaned
+
+    def create_missing(self, model, mapping, names):
+        missing = [
+            name for name in dict.fromkeys(names) if name not in mapping
+        ]
+        if not missing:
+            return
+        # Upserting keeps a concurrent import of the same names harmless
+        created = model.objects.bulk_create(
+            [model(name=name) for name in missing],
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["updated_at"],
+        )
+        mapping.update((obj.name, obj.pk) for obj in created if obj.pk)
+        if any(obj.pk is None for obj in created):
+            mapping.update(
+                model.objects.filter(name__in=missing)
+                .values_list("name", "pk")
+            )
+
+    def flush(self):
+        if not self.batch:
+            return
+        rows = list(self.batch.values())
+        self.batch = {}
+        with transaction.atomic():
+            self.create_missing(
+                DishType, self.dishtypes, [row["dish_type"] for row in rows]
+            )
+            self.create_missing(
+                Ingredient, self.ingredients,
+                [name for row in rows for name in row["ingredients"] or []],
+            )
+            names = [row["name"] for row in rows]
+            existing = set(
+                Dish.objects.filter(name__in=names)
+                .values_list("name", flat=True)
+            )
+            dishes = Dish.objects.bulk_create(
+                [
+                    Dish(
+                        name=row["name"],
+                        description=row["description"],
+                        price=row["price"],
+                        dishtype_id=self.dishtypes[row["dish_type"]],
+                    )
+                    for row in rows
+                ],
+                update_conflicts=True,
+                unique_fields=["name"],
+                update_fields=["description", "price", "dishtype",
+                               "updated_at"],
+            )
+            if any(dish.pk is None for dish in dishes):
+                pks = dict(
+                    Dish.objects.filter(name__in=names)
+                    .values_list("name", "pk")
+                )
+                for dish in dishes:
+                    dish.pk = pks[dish.name]
+
+            self.link(dishes, rows, "cooks", Cook, self.cooks)
+            self.link(
+                dishes, rows, "ingredients", Ingredient, self.ingredients
+            )
+            menu_cards.refresh(dish.pk for dish in dishes)
+        self.report.updated += len(existing)
+        self.report.created += len(rows) - len(existing)
+
+    def link(self, dishes, rows, field_name, model, mapping):
+        targets = {
+            dish.pk: [mapping[name] for name in row[field_name]]
+            for dish, row in zip(dishes, rows)
+            if row[field_name] is not None
+        }
+        added, removed = bulk_set_m2m(
+            dishes, field_name, targets,
+            add_only=self.merge, send_signals=False,
+        )
+        # What the per-dish m2m_changed receivers would do, once per batch
+        touched = set()
+        for changes in (added, removed):
+            for pks in changes.values():
+                touched.update(pks)
+        if touched:
+            model.objects.filter(pk__in=touched).update(
+                updated_at=timezone.now()
+            )
@@ -0,0 +1,384 @@
+"""
+Request metrics per URL name, exposed as Prometheus text on ``/metrics``.
+
+``MetricsMiddleware`` times every request and records, labelled with the
+namespaced URL name of the matched route:
+
+* ``kitchen_http_requests_total`` by method and status code
+* ``kitchen_http_request_duration_seconds``, a latency histogram
+* ``kitchen_db_queries_per_request`` and ``kitchen_db_query_seconds_total``
+* ``kitchen_template_render_seconds`` for ``TemplateResponse`` views
+
+Queries are counted by an execute wrapper added to every database
+connection, which only records while a request is being measured.
+
+Without ``KITCHEN_METRICS_DIR`` the values live in the memory of the
+process. With it, each process keeps its values in its own mmap'ed file
+there and ``/metrics`` adds up the files of every gunicorn worker: a
+worker never waits for another, the only lock guards its own file
+against its own threads. ``manage.py clear_metrics`` empties the
+directory, run it before the server starts so the files of earlier
+workers are not added up again.
+
+``/metrics`` requires ``KITCHEN_METRICS_TOKEN`` as a bearer token and is
+only open without one when ``DEBUG`` is on.
+"""
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from django.views import generic
+
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+METRICS = {
+    "kitchen_http_requests_total": (
+        "counter", "Requests by URL name, method and status code.", None,
+    ),
+    "kitchen_http_request_duration_seconds": (
+        "histogram", "Time to answer a request.", LATENCY_BUCKETS,
+    ),
+    "kitchen_db_queries_per_request": (
+        "histogram", "Database queries made by a request.", QUERY_BUCKETS,
+    ),
+    "kitchen_db_query_seconds_total": (
+        "counter", "Time spent in database queries.", None,
+    ),
+    "kitchen_template_render_seconds": (
+        "histogram", "Time to render the template of a request.",
+        LATENCY_BUCKETS,
+    ),
+}
+
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+UNMATCHED = "unmatched"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+FILE_PATTERN = "metrics_*.db"
+
+
+class MemoryStore:
+    """Values of this process, for a single worker and the tests."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = defaultdict(float)
+
+    def add(self, key, amount):
+        with self.lock:
+            self.values[key] += amount
+
+    def collect(self):
+        with self.lock:
+            return dict(self.values)
+
+
+_HEADER = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+
+
+def _entries(data):
+    """
+    ``(key, position of its value)`` in a metrics file: the used size,
+    then entries of a key length, the key padded to 8 bytes and a double.
+    """
+    if len(data) < _HEADER.size:
+        return
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    pos = _HEADER.size
+    while pos + _LENGTH.size <= used:
+        length = _LENGTH.unpack_from(data, pos)[0]
+        start = pos + _LENGTH.size
+        value_pos = start + length + (-(_LENGTH.size + length) % 8)
+        if value_pos + _VALUE.size > used:
+            break
+        yield data[start:start + length].decode(), value_pos
+        pos = value_pos + _VALUE.size
+
+
+class FileStore:
+    """
+    Values of this process in ``metrics_<pid>.db`` of ``directory``.
+
+    An entry is written before the used size grows past it and a value is
+    one aligned 8-byte write, so readers in other processes never see a
+    half-written entry and need no lock.
+    """
+    initial_size = 64 * 1024
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def _open(self):
+        # Reopened after a fork, each worker writes to its own file
+        self.pid = os.getpid()
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"metrics_{self.pid}.db")
+        self.file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT), "r+b")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.initial_size:
+            self.file.truncate(self.initial_size)
+            size = self.initial_size
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.used = _HEADER.unpack_from(self.map, 0)[0] or _HEADER.size
+        # A pid reused from an earlier worker keeps adding to its values
+        self.positions = dict(_entries(self.map[:self.used]))
+
+    def _grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        self.map.close()
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padding = -(_LENGTH.size + len(encoded)) % 8
+        end = (
+            self.used + _LENGTH.size + len(encoded) + padding + _VALUE.size
+        )
+        if end > len(self.map):
+            self._grow(end)
+        _LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + _LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        pos = start + len(encoded) + padding
+        _VALUE.pack_into(self.map, pos, 0.0)
+        self.used = end
+        _HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = pos
+        return pos
+
+    def add(self, key, amount):
+        with self.lock:
+            if self.pid != os.getpid():
+                self._open()
+            pos = self.positions.get(key)
+            if pos is None:
+                pos = self._append(key)
+            value = _VALUE.unpack_from(self.map, pos)[0]
+            _VALUE.pack_into(self.map, pos, value + amount)
+
+    def collect(self):
+        totals = defaultdict(float)
+        pattern = os.path.join(self.directory, FILE_PATTERN)
+        for path in glob.glob(pattern):
+            try:
+                with open(path, "rb") as file:
+                    data = file.read()
+            except FileNotFoundError:
+                continue
+            for key, pos in _entries(data):
+                totals[key] += _VALUE.unpack_from(data, pos)[0]
+        return dict(totals)
+
+
+_store = None
+_store_dir = None
+_store_lock = threading.Lock()
+
+
+def clear_directory(directory):
+    """Delete the metrics files in ``directory``, return how many."""
+    paths = glob.glob(os.path.join(directory, FILE_PATTERN))
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return len(paths)
+
+
+def get_store():
+    global _store, _store_dir
+    directory = getattr(settings, "KITCHEN_METRICS_DIR", None)
+    with _store_lock:
+        if _store is None or _store_dir != directory:
+            _store = FileStore(directory) if directory else MemoryStore()
+            _store_dir = directory
+        return _store
+
+
+def _key(name, labels, le=None):
+    return json.dumps([name, sorted(labels.items()), le])
+
+
+def _increment(store, name, labels, amount=1):
+    store.add(_key(name, labels), amount)
+
+
+def _observe(store, name, labels, value):
+    """Count ``value`` in its bucket; buckets add up when exposed."""
+    buckets = METRICS[name][2]
+    le = next((bound for bound in buckets if value <= bound), "+Inf")
+    store.add(_key(name + "_bucket", labels, le), 1)
+    store.add(_key(name + "_sum", labels), value)
+    store.add(_key(name + "_count", labels), 1)
+
+
+class RequestStats:
+    """What one request spent, filled in while it runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.render_seconds = None
+
+
+_current = ContextVar("kitchen_metrics_request", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.query_seconds += time.perf_counter() - started
+
+
+def instrument(connection):
+    """Add the query counter to ``connection`` once."""
+    if count_query not in connection.execute_wrappers:
+        # First, so that execute_wrapper() blocks pop their own wrapper
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish_request(request, response, stats, token):
+    _current.reset(token)
+    seconds = time.perf_counter() - stats.started
+    match = getattr(request, "resolver_match", None)
+    url_name = match.view_name if match is not None else UNMATCHED
+    method = request.method if request.method in METHODS else "other"
+
+    store = get_store()
+    route = {"url_name": url_name}
+    _increment(store, "kitchen_http_requests_total", dict(
+        route, method=method, status=str(response.status_code)
+    ))
+    _observe(
+        store, "kitchen_http_request_duration_seconds",
+        dict(route, method=method), seconds,
+    )
+    _observe(store, "kitchen_db_queries_per_request", route, stats.queries)
+    _increment(
+        store, "kitchen_db_query_seconds_total", route, stats.query_seconds
+    )
+    if stats.render_seconds is not None:
+        _observe(
+            store, "kitchen_template_render_seconds", route,
+            stats.render_seconds,
+        )
+
+
+def time_rendering(response, stats):
+    """Record how long ``response`` takes to render in ``stats``."""
+    started = time.perf_counter()
+
+    def rendered(response):
+        stats.render_seconds = time.perf_counter() - started
+
+    response.add_post_render_callback(rendered)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", r"\\").replace('"', r"\"")
+            .replace("\n", r"\n"),
+        )
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    return repr(int(value)) if float(value).is_integer() else repr(value)
+
+
+def exposition(values=None):
+    """The collected values in the Prometheus text format."""
+    if values is None:
+        values = get_store().collect()
+    series = defaultdict(dict)
+    for key, value in values.items():
+        name, labels, le = json.loads(key)
+        series[name][(tuple(map(tuple, labels)), le)] = value
+
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            for (labels, _), value in sorted(series[name].items()):
+                lines.append(
+                    f"{name}{_format_labels(labels)} {_format_value(value)}"
+                )
+            continue
+        counted = series[name + "_bucket"]
+        for (labels, _), count in sorted(series[name + "_count"].items()):
+            cumulative = 0
+            for bound in buckets + ("+Inf",):
+                cumulative += counted.get((labels, bound), 0)
+                le = bound if bound == "+Inf" else _format_value(bound)
+                lines.append("{}_bucket{} {}".format(
+                    name,
+                    _format_labels(labels + (("le", le),)),
+                    _format_value(cumulative),
+                ))
+            total = series[name + "_sum"].get((labels, None), 0)
+            lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_value(total)}"
+            )
+            lines.append(
+                f"{name}_count{_format_labels(labels)} "
+                f"{_format_value(count)}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+class MetricsView(generic.View):
+    """
+    The metrics of every worker for Prometheus. Scrapes must send
+    ``KITCHEN_METRICS_TOKEN`` as a bearer token, without a token they are
+    only allowed with ``DEBUG`` on.
+    """
+
+    def get(self, request):
+        token = getattr(settings, "KITCHEN_METRICS_TOKEN", None)
+        if not token:
+            if not settings.DEBUG:
+                return HttpResponseForbidden()
+        elif not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"
+        ):
+            return HttpResponseForbidden()
+        return HttpResponse(exposition(), content_type=CONTENT_TYPE)
@@ -0,0 +1,129 @@
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoise
+
+from kitchen import metrics, slow_queries
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoise):
+    """
+    WhiteNoise that also runs as async middleware.
+
+    The upstream class is sync only, so under ASGI Django hands every
+    request to a thread for it and back to the event loop for the rest of
+    the chain. Static files are looked up in memory, only the autorefresh
+    lookup of ``DEBUG`` touches the disk and is moved to a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, status, queries and template render time of each
+    request for ``/metrics``, see kitchen.metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # A sync hook would cost async views a trip to a thread
+            self.process_template_response = (
+                self.aprocess_template_response
+            )
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        stats, token = metrics.start_request()
+        request.kitchen_metrics = stats
+        response = self.get_response(request)
+        metrics.finish_request(request, response, stats, token)
+        return response
+
+    async def __acall__(self, request):
+        stats, token = metrics.start_request()
+        request.kitchen_metrics = stats
+        response = await self.get_response(request)
+        metrics.finish_request(request, response, stats, token)
+        return response
+
+    def time_rendering(self, request, response):
+        stats = getattr(request, "kitchen_metrics", None)
+        if stats is not None:
+            metrics.time_rendering(response, stats)
+        return response
+
+    def process_template_response(self, request, response):
+        return self.time_rendering(request, response)
+
+    async def aprocess_template_response(self, request, response):
+        return self.time_rendering(request, response)
+
+
+class SlowQueryMiddleware:
+    """
+    Lets the slow query log attribute queries to the view of the request,
+    see kitchen.slow_queries. Left out of the chain unless
+    ``KITCHEN_SLOW_QUERY_LOG`` is set.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not slow_queries.get_config()["path"]:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = slow_queries.start_request(
+            request, slow_queries.get_config()
+        )
+        try:
+            return self.get_response(request)
+        finally:
+            slow_queries.finish_request(token)
+
+    async def __acall__(self, request):
+        token = slow_queries.start_request(
+            request, slow_queries.get_config()
+        )
+        try:
+            return await self.get_response(request)
+        finally:
+            slow_queries.finish_request(token)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:59
+
+from django.db import migrations, models
+
+
+COUNTED_MODELS = {
+    "cooks": "Cook",
+    "dishes": "Dish",
+    "dishtypes": "DishType",
+    "ingredients": "Ingredient",
+}
+
+
+def populate_counters(apps, schema_editor):
+    EntityCounter = apps.get_model("kitchen", "EntityCounter")
+    for name, model_name in COUNTED_MODELS.items():
+        model = apps.get_model("kitchen", model_name)
+        EntityCounter.objects.update_or_create(
+            name=name, defaults={"count": model.objects.count()}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kitchen", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EntityCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=64, unique=True)),
+                ("count", models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
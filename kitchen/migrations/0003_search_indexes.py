@@ -0,0 +1,73 @@
+from django.db import migrations
+
+from kitchen import fts
+
+
+# Indexes are built outside of a transaction so that CREATE INDEX
+# CONCURRENTLY can run on Postgres without locking the tables.
+SEARCH_COLUMNS = {
+    "kitchen_dishtype": ["name"],
+    "kitchen_dish": ["name", "description"],
+    "kitchen_ingredient": ["name"],
+    "kitchen_cook": ["username"],
+}
+
+
+def postgres_forwards(schema_editor):
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS "
+                f"{table}_{column}_trgm ON {table} "
+                f"USING gin ((UPPER({column}::text)) gin_trgm_ops)"
+            )
+
+
+def postgres_backwards(schema_editor):
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            schema_editor.execute(
+                f"DROP INDEX CONCURRENTLY IF EXISTS {table}_{column}_trgm"
+            )
+
+
+def sqlite_forwards(schema_editor):
+    for table, columns in SEARCH_COLUMNS.items():
+        for sql in fts.create_statements(table, columns):
+            schema_editor.execute(sql)
+
+
+def sqlite_backwards(schema_editor):
+    for table in SEARCH_COLUMNS:
+        for sql in fts.drop_statements(table):
+            schema_editor.execute(sql)
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        postgres_forwards(schema_editor)
+    elif vendor == "sqlite":
+        sqlite_forwards(schema_editor)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "postgresql":
+        postgres_backwards(schema_editor)
+    elif vendor == "sqlite":
+        sqlite_backwards(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("kitchen", "0002_entitycounter"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:37
+
+import django.db.models.deletion
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def populate_menu_cards(apps, schema_editor):
+    Dish = apps.get_model("kitchen", "Dish")
+    MenuCard = apps.get_model("kitchen", "MenuCard")
+    ingredients = defaultdict(list)
+    for dish_pk, name in Dish.ingredients.through.objects.order_by(
+        "ingredient__name"
+    ).values_list("dish_id", "ingredient__name"):
+        ingredients[dish_pk].append(name)
+    cooks = defaultdict(list)
+    for dish_pk, cook_pk, username in Dish.cooks.through.objects.order_by(
+        "cook__username"
+    ).values_list("dish_id", "cook_id", "cook__username"):
+        cooks[dish_pk].append((cook_pk, username))
+    MenuCard.objects.bulk_create(
+        [
+            MenuCard(
+                dish_id=dish.pk,
+                name=dish.name,
+                description=dish.description,
+                price=dish.price,
+                dishtype_id=dish.dishtype_id,
+                dishtype_name=dish.dishtype.name,
+                ingredient_names=ingredients[dish.pk],
+                cook_ids=[pk for pk, _username in cooks[dish.pk]],
+                cook_usernames=[username for _pk, username in cooks[dish.pk]],
+            )
+            for dish in Dish.objects.select_related("dishtype").iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("kitchen", "0004_updated_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MenuCard",
+            fields=[
+                (
+                    "dish",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="menu_card",
+                        serialize=False,
+                        to="kitchen.dish",
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=255)),
+                ("description", models.TextField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("dishtype_name", models.CharField(max_length=255)),
+                ("ingredient_names", models.JSONField(default=list)),
+                ("cook_ids", models.JSONField(default=list)),
+                ("cook_usernames", models.JSONField(default=list)),
+                ("updated_at", models.DateTimeField(auto_now=True, db_index=True)),
+                (
+                    "dishtype",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="kitchen.dishtype",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.RunPython(populate_menu_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+
+# The unique constraint of the auto-created link table already indexes
+# (ingredient_id, dish_id). Ingredient filters on dish lists probe it the
+# other way round, per dish, so add the (dish_id, ingredient_id) index.
+# Built outside of a transaction for CREATE INDEX CONCURRENTLY on Postgres.
+TABLE = "kitchen_ingredient_dishes"
+INDEX = "kitchen_ingredient_dishes_dish_ingredient"
+
+
+def create_link_index(apps, schema_editor):
+    concurrently = (
+        "CONCURRENTLY "
+        if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX} "
+        f"ON {TABLE} (dish_id, ingredient_id)"
+    )
+
+
+def drop_link_index(apps, schema_editor):
+    concurrently = (
+        "CONCURRENTLY "
+        if schema_editor.connection.vendor == "postgresql" else ""
+    )
+    schema_editor.execute(f"DROP INDEX {concurrently}IF EXISTS {INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ("kitchen", "0005_menucard"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_link_index, drop_link_index),
+    ]
@@ -1,20 +1,237 @@
-from django.contrib.auth.mixins import AccessMixin
+import hashlib
+
+from django.contrib.auth.mixins import AccessMixin, LoginRequiredMixin
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from kitchen import counters, menu_export
+from kitchen.group_cache import aget_user_group_names, get_user_group_names
+from kitchen.models import EntityCounter
+from kitchen.pagination import paginate_by_cursor
 
 
 class GroupRequiredMixin(AccessMixin):
+    """
+    Allows cooks of ``group_required``. Views whose handlers are
+    coroutines are checked with the async auth API and group cache.
+    """
     group_required = ["trainee", "employee", "manager"]
 
+    def has_group_permission(self, user):
+        if user.is_superuser:
+            # Superuser skips group check
+            return True
+        user_groups = get_user_group_names(user)
+        return any(group in user_groups for group in self.group_required)
+
+    async def ahas_group_permission(self, user):
+        if user.is_superuser:
+            return True
+        user_groups = await aget_user_group_names(user)
+        return any(group in user_groups for group in self.group_required)
+
     def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+
         if not request.user.is_authenticated:
             return self.handle_no_permission()
 
-        if request.user.is_superuser:
-            # Superuser skips group check
-            return super().dispatch(request, *args, **kwargs)
+        if not self.has_group_permission(request.user):
+            return self.handle_no_permission()
+
+        return super().dispatch(request, *args, **kwargs)
 
-        user_groups = request.user.groups.values_list('name', flat=True)
+    async def adispatch(self, request, *args, **kwargs):
+        # Resolved here, so that request.user read by the sync mixins
+        # further down and by the templates needs no query
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
 
-        if not any(group in user_groups for group in self.group_required):
+        if not await self.ahas_group_permission(request.user):
             return self.handle_no_permission()
 
-        return super().dispatch(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for views whose handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(
+            request, *args, **kwargs
+        )
+
+
+class CursorPaginationMixin:
+    """
+    Keyset pagination for ListViews, set ``pagination_mode = "offset"``
+    on a view to fall back to Django's page-number pagination.
+    """
+    pagination_mode = "cursor"
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.pagination_mode != "cursor":
+            return super().paginate_queryset(queryset, page_size)
+        paginator, page = paginate_by_cursor(
+            queryset, page_size, self.request.GET.get(self.cursor_kwarg)
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class ConditionalGetMixin:
+    """
+    Answers ``If-None-Match`` / ``If-Modified-Since`` with 304 before any
+    template is rendered.
+
+    Detail views aggregate ``updated_at`` and counts of the object and of
+    the relations in ``conditional_related`` in one query. List views use
+    max(updated_at) and count of the filtered queryset, plus the table-wide
+    max(updated_at) of ``conditional_related_models`` shown in the rows.
+    """
+    conditional_related = []
+    conditional_related_models = []
+
+    def _detail_query(self):
+        queryset = self.get_queryset().filter(
+            pk=self.kwargs.get(self.pk_url_kwarg)
+        ).order_by()
+        aggregates = {
+            "updated": Max("updated_at"),
+            "count": Count("pk", distinct=True),
+        }
+        for index, path in enumerate(self.conditional_related):
+            aggregates[f"updated_{index}"] = Max(f"{path}__updated_at")
+            aggregates[f"count_{index}"] = Count(path, distinct=True)
+        return queryset, aggregates
+
+    @staticmethod
+    def _detail_timestamps(state):
+        return [
+            value for key, value in state.items()
+            if key.startswith("updated")
+        ]
+
+    def get_detail_state(self):
+        queryset, aggregates = self._detail_query()
+        state = queryset.aggregate(**aggregates)
+        return state, self._detail_timestamps(state)
+
+    async def aget_detail_state(self):
+        queryset, aggregates = self._detail_query()
+        state = await queryset.aaggregate(**aggregates)
+        return state, self._detail_timestamps(state)
+
+    def _list_counter(self):
+        # Deletions do not leave an updated_at behind, the counter does
+        return EntityCounter.objects.filter(
+            name=counters.counter_name(self.model)
+        ).values_list("updated_at", flat=True)
+
+    def get_list_state(self):
+        state = self.get_queryset().order_by().aggregate(
+            updated=Max("updated_at"), count=Count("pk")
+        )
+        timestamps = [state["updated"], self._list_counter().first()]
+        for index, model in enumerate(self.conditional_related_models):
+            updated = model.objects.aggregate(
+                updated=Max("updated_at")
+            )["updated"]
+            state[f"updated_{index}"] = updated
+            timestamps.append(updated)
+        return state, timestamps
+
+    async def aget_list_state(self):
+        state = await self.get_queryset().order_by().aaggregate(
+            updated=Max("updated_at"), count=Count("pk")
+        )
+        timestamps = [state["updated"], await self._list_counter().afirst()]
+        for index, model in enumerate(self.conditional_related_models):
+            updated = (await model.objects.aaggregate(
+                updated=Max("updated_at")
+            ))["updated"]
+            state[f"updated_{index}"] = updated
+            timestamps.append(updated)
+        return state, timestamps
+
+    def _is_detail(self):
+        return getattr(self, "pk_url_kwarg", None) in self.kwargs
+
+    def _validators(self, state, timestamps):
+        # The rendered page also shows the signed in cook and a CSRF token
+        user = self.request.user
+        state["user"] = (user.pk, getattr(user, "updated_at", None))
+        get_token(self.request)
+        state["csrf"] = self.request.META["CSRF_COOKIE"]
+        etag = quote_etag(hashlib.md5(
+            repr(sorted(state.items())).encode(), usedforsecurity=False
+        ).hexdigest())
+        timestamps = [value for value in timestamps if value is not None]
+        last_modified = (
+            int(max(timestamps).timestamp()) if timestamps else None
+        )
+        return etag, last_modified
+
+    def get_conditional_state(self):
+        if self._is_detail():
+            state, timestamps = self.get_detail_state()
+        else:
+            state, timestamps = self.get_list_state()
+        return self._validators(state, timestamps)
+
+    async def aget_conditional_state(self):
+        if self._is_detail():
+            state, timestamps = await self.aget_detail_state()
+        else:
+            state, timestamps = await self.aget_list_state()
+        return self._validators(state, timestamps)
+
+    def patch_conditional_headers(self, response, etag, last_modified):
+        response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault(
+                "Last-Modified", http_date(last_modified)
+            )
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_conditional_state()
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return self.patch_conditional_headers(response, etag, last_modified)
+
+
+class StreamingExportMixin:
+    """Stream ``export_name`` from kitchen.menu_export as a download."""
+    export_name = None
+    chunk_size = menu_export.DEFAULT_CHUNK_SIZE
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.GET.get("format", "csv")
+        if file_format not in menu_export.FORMATS:
+            raise Http404("Unknown export format")
+        filename = (
+            f"{self.export_name}-{timezone.now():%Y%m%d}.{file_format}"
+        )
+        response = StreamingHttpResponse(
+            menu_export.stream(self.export_name, file_format, self.chunk_size),
+            content_type=menu_export.FORMATS[file_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+            },
+        )
+        patch_cache_control(response, private=True, no_store=True)
+        return response
@@ -6,6 +6,7 @@ from django.urls import reverse
 
 class DishType(models.Model):
     name = models.CharField(max_length=255, unique=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -27,6 +28,7 @@ class Dish(models.Model):
         settings.AUTH_USER_MODEL,
         related_name="dishes"
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -38,6 +40,7 @@ class Dish(models.Model):
 class Ingredient(models.Model):
     name = models.CharField(max_length=255, unique=True)
     dishes = models.ManyToManyField(Dish, related_name="ingredients")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -48,9 +51,119 @@ class Ingredient(models.Model):
 
 class Cook(AbstractUser):
     years_of_experience = models.IntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["username", ]
 
     def get_absolute_url(self):
         return reverse("kitchen:cook-detail", kwargs={"pk": self.pk})
+
+
+class EntityCounter(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+    count = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.count}"
+
+
+class VisitCounter(models.Model):
+    """Home page visits of a cook, written in batches by kitchen.visits."""
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        primary_key=True,
+        related_name="visit_counter",
+        on_delete=models.CASCADE
+    )
+    visits = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.visits}"
+
+
+class MenuCard(models.Model):
+    """
+    One denormalised row per dish for list and detail pages, kept in step
+    with Dish and its relations by kitchen.menu_cards.
+    """
+    dish = models.OneToOneField(
+        Dish,
+        primary_key=True,
+        related_name="menu_card",
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255, db_index=True)
+    description = models.TextField()
+    price = models.DecimalField(decimal_places=2, max_digits=10)
+    dishtype = models.ForeignKey(
+        DishType,
+        related_name="+",
+        on_delete=models.CASCADE
+    )
+    dishtype_name = models.CharField(max_length=255)
+    ingredient_names = models.JSONField(default=list)
+    cook_ids = models.JSONField(default=list)
+    cook_usernames = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ["name", ]
+
+
+class OrderTicket(models.Model):
+    """One dish ordered by the floor, claimed and cooked by a station."""
+    QUEUED = "queued"
+    IN_PROGRESS = "in_progress"
+    DONE = "done"
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (IN_PROGRESS, "In progress"),
+        (DONE, "Done"),
+    ]
+
+    dish = models.ForeignKey(
+        Dish,
+        related_name="tickets",
+        on_delete=models.CASCADE
+    )
+    quantity = models.PositiveSmallIntegerField(default=1)
+    note = models.CharField(max_length=255, blank=True)
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=QUEUED
+    )
+    cook = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="tickets",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL
+    )
+    station = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    done_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.pk} {self.quantity} x {self.dish_id} ({self.status})"
+
+    class Meta:
+        ordering = ["created_at", "id"]
+        indexes = [
+            # Claims scan the oldest queued tickets only
+            models.Index(
+                fields=["created_at", "id"],
+                condition=models.Q(status="queued"),
+                name="kitchen_ticket_queue_idx",
+            ),
+            models.Index(
+                fields=["cook", "status"],
+                name="kitchen_ticket_cook_idx",
+            ),
+        ]
@@ -0,0 +1,216 @@
+"""
+Page weight and render time of the kitchen pages in each layout.
+
+The kitchen pages extend ``layouts/kitchen.html``. For the "full" run a
+locmem template loader serves the theme's ``layouts/base.html`` with its
+pre-loader under that name instead, so both shells wrap the same pages
+and data. Icons are inline SVG in both, the full shell still loads the
+whole Font Awesome stylesheet.
+
+What blocks the first paint is the HTML and the stylesheets and scripts
+it loads without ``defer``, ``async`` or ``rel="preload"``. Static files
+are weighed as WhiteNoise serves them, gzip compressed. Render times
+come from requests through the WSGI application, as in
+``kitchen.benchmark``.
+"""
+import gzip
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.test.utils import override_settings
+
+from kitchen import assets, benchmark
+from kitchen.stats import percentile
+
+
+FULL_LAYOUT = (
+    "{% extends 'layouts/base.html' %}"
+    "{% block header %}{% include 'includes/pre-loader.html' %}"
+    "{{ block.super }}{% endblock header %}"
+)
+
+# None keeps layouts/kitchen.html
+LAYOUTS = {"full": FULL_LAYOUT, "slim": None}
+
+
+class PageParser(HTMLParser):
+    """The stylesheets, scripts and inline CSS of a page."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocking = []
+        self.deferred = []
+        self.inline_css = 0
+        self.noscript = 0
+        self.in_style = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "noscript":
+            self.noscript += 1
+        elif tag == "style":
+            self.in_style = True
+        elif self.noscript:
+            # Only loaded with scripts disabled
+            return
+        elif tag == "link" and attrs.get("href"):
+            rel = (attrs.get("rel") or "").split()
+            if "stylesheet" in rel and attrs.get("media") != "print":
+                self.blocking.append(attrs["href"])
+            elif "preload" in rel and attrs.get("as") in ("style", "script"):
+                self.deferred.append(attrs["href"])
+        elif tag == "script" and attrs.get("src"):
+            if (
+                "defer" in attrs or "async" in attrs
+                or attrs.get("type") == "module"
+            ):
+                self.deferred.append(attrs["src"])
+            else:
+                self.blocking.append(attrs["src"])
+
+    def handle_endtag(self, tag):
+        if tag == "noscript":
+            self.noscript = max(self.noscript - 1, 0)
+        elif tag == "style":
+            self.in_style = False
+
+    def handle_data(self, data):
+        if self.in_style:
+            self.inline_css += len(data.strip().encode())
+
+
+def template_settings(layout):
+    """``TEMPLATES`` that render the kitchen pages in ``layout``."""
+    loaders = [
+        "django.template.loaders.filesystem.Loader",
+        "django.template.loaders.app_directories.Loader",
+    ]
+    if LAYOUTS[layout] is not None:
+        loaders.insert(0, (
+            "django.template.loaders.locmem.Loader",
+            {"layouts/kitchen.html": LAYOUTS[layout]},
+        ))
+    engines = []
+    for engine in settings.TEMPLATES:
+        options = dict(
+            engine.get("OPTIONS", {}),
+            # Cached in both layouts, as in production
+            loaders=[("django.template.loaders.cached.Loader", loaders)],
+        )
+        engines.append(dict(engine, APP_DIRS=False, OPTIONS=options))
+    return engines
+
+
+def static_path(url, unhashed):
+    """The static file served at ``url``, None for other URLs."""
+    if not url.startswith(settings.STATIC_URL):
+        return None
+    name = unquote(url[len(settings.STATIC_URL):].split("?")[0])
+    return unhashed.get(name, name)
+
+
+def _gzip_bytes(paths):
+    total = 0
+    for path in paths:
+        size = assets.asset_size(path)
+        if size is not None:
+            total += size[1]
+    return total
+
+
+def weigh(body):
+    """Weights in bytes of one page, from its HTML."""
+    parser = PageParser()
+    parser.feed(body.decode("utf-8"))
+    # Hashed names from the manifest storage, back to the source files
+    unhashed = {
+        hashed: name for name, hashed
+        in getattr(staticfiles_storage, "hashed_files", {}).items()
+    }
+    blocking = [static_path(url, unhashed) for url in parser.blocking]
+    deferred = [static_path(url, unhashed) for url in parser.deferred]
+    html_gzip = len(gzip.compress(body))
+    blocking_gzip = _gzip_bytes(path for path in blocking if path)
+    return {
+        "html_bytes": len(body),
+        "html_gzip": html_gzip,
+        "inline_css": parser.inline_css,
+        "blocking": [path or url for path, url in zip(
+            blocking, parser.blocking
+        )],
+        "blocking_gzip": blocking_gzip,
+        "deferred_gzip": _gzip_bytes(path for path in deferred if path),
+        "first_paint_gzip": html_gzip + blocking_gzip,
+    }
+
+
+def page_probes(urlpatterns, objects, routes=None):
+    """GET probes of the routes that may render a page."""
+    probes = []
+    for pattern in urlpatterns:
+        if pattern.name.startswith((benchmark.ASYNC_PREFIX, "api-")):
+            continue
+        try:
+            probes += benchmark.build_probes(
+                [pattern], objects, routes=routes, posts=False
+            )
+        except LookupError:
+            # Actions on objects the benchmark does not pick, the tickets
+            continue
+    return probes
+
+
+def is_page(status, headers, body):
+    return (
+        status == 200 and body is not None
+        and headers.get("Content-Type", "").startswith("text/html")
+    )
+
+
+def run(driver, probes, requests=20, warmup=3):
+    """
+    Weigh and time every page in each layout, one page after the other
+    so both layouts see the same warm caches.
+    """
+    pages = []
+    for probe in probes:
+        for layout in LAYOUTS:
+            with override_settings(TEMPLATES=template_settings(layout)):
+                status, headers, body = driver.fetch(probe)
+                if not is_page(status, headers, body):
+                    break
+                if warmup:
+                    driver.run(probe, warmup, 1)
+                timings, _wall = driver.run(probe, requests, 1)
+            latencies = sorted(latency for latency, _status in timings)
+            pages.append(dict(
+                weigh(body),
+                route=probe.route,
+                path=probe.path,
+                layout=layout,
+                p50_ms=percentile(latencies, 50) * 1000,
+                p95_ms=percentile(latencies, 95) * 1000,
+            ))
+    return pages
+
+
+def compare(pages, before="full", after="slim"):
+    """Rows of ``after`` next to ``before`` for each page in both."""
+    old = {page["route"]: page for page in pages if page["layout"] == before}
+    rows = []
+    for page in pages:
+        if page["layout"] != after or page["route"] not in old:
+            continue
+        base = old[page["route"]]
+        rows.append({
+            "route": page["route"],
+            "old_first_paint_gzip": base["first_paint_gzip"],
+            "new_first_paint_gzip": page["first_paint_gzip"],
+            "old_blocking": len(base["blocking"]),
+            "new_blocking": len(page["blocking"]),
+            "old_p50_ms": base["p50_ms"],
+            "new_p50_ms": page["p50_ms"],
+        })
+    return rows
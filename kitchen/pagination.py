@@ -0,0 +1,204 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values, direction):
+    payload = json.dumps(
+        {"v": values, "d": direction},
+        cls=DjangoJSONEncoder,
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values, direction = payload["v"], payload["d"]
+    except (
+        binascii.Error,
+        UnicodeDecodeError,
+        ValueError,
+        KeyError,
+        TypeError,
+    ):
+        raise InvalidCursor(cursor)
+    if direction not in ("next", "prev") or not isinstance(values, list):
+        raise InvalidCursor(cursor)
+    return values, direction
+
+
+class CursorPage(Sequence):
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} objects>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.cursor_for(self.object_list[-1], "next")
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.cursor_for(self.object_list[0], "prev")
+
+
+class CursorPaginator:
+    """
+    Keyset paginator ordered by the queryset's own ``order_by()`` of
+    field and annotation names (search results ranked best first), else
+    the model's ``Meta.ordering``, plus ``pk``.
+
+    Pages are fetched with ``WHERE (ordering) > (cursor) LIMIT n + 1``,
+    so neither a ``COUNT(*)`` nor an ``OFFSET`` scan is needed.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        if ordering is None:
+            ordering = queryset.query.order_by
+            if not all(isinstance(field, str) for field in ordering):
+                ordering = None
+        ordering = list(ordering or queryset.model._meta.ordering)
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            ordering.append("pk")
+        self.keys = [
+            (field.lstrip("-"), field.startswith("-")) for field in ordering
+        ]
+
+    def _key_field(self, name):
+        opts = self.queryset.model._meta
+        if name == "pk":
+            return opts.pk
+        try:
+            return opts.get_field(name)
+        except FieldDoesNotExist:
+            return self.queryset.query.annotations[name].output_field
+
+    def _clean(self, cursor, values):
+        """
+        The cursor's values converted by their key fields, a tampered
+        cursor must not reach the query as a dict, a list or junk text.
+        """
+        if len(values) != len(self.keys):
+            raise InvalidCursor(cursor)
+        cleaned = []
+        for (name, _), value in zip(self.keys, values):
+            if value is None or isinstance(value, (dict, list)):
+                raise InvalidCursor(cursor)
+            try:
+                cleaned.append(self._key_field(name).to_python(value))
+            except (ValidationError, TypeError, ValueError):
+                raise InvalidCursor(cursor)
+        return cleaned
+
+    def cursor_for(self, obj, direction):
+        values = [getattr(obj, field) for field, _ in self.keys]
+        return encode_cursor(values, direction)
+
+    def _seek(self, values, reverse):
+        condition = Q()
+        for index, (field, descending) in enumerate(self.keys):
+            lookup = "lt" if descending != reverse else "gt"
+            step = Q(**{f"{field}__{lookup}": values[index]})
+            for previous in range(index):
+                step &= Q(**{self.keys[previous][0]: values[previous]})
+            condition |= step
+        return condition
+
+    def _order(self, reverse):
+        return [
+            f"-{field}" if descending != reverse else field
+            for field, descending in self.keys
+        ]
+
+    def _query(self, cursor):
+        """
+        The rows of one page plus one, and whether they run backwards
+        (``None`` on the first page).
+        """
+        if not cursor:
+            return self.queryset.order_by(*self._order(False))[
+                :self.per_page + 1
+            ], None
+
+        values, direction = decode_cursor(cursor)
+        values = self._clean(cursor, values)
+        reverse = direction == "prev"
+        return self.queryset.filter(self._seek(values, reverse)).order_by(
+            *self._order(reverse)
+        )[:self.per_page + 1], reverse
+
+    def _page(self, rows, reverse):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse is None:
+            return CursorPage(rows, self, has_more, False)
+        if reverse:
+            rows.reverse()
+            return CursorPage(rows, self, True, has_more)
+        return CursorPage(rows, self, has_more, True)
+
+    def page(self, cursor=None):
+        queryset, reverse = self._query(cursor)
+        return self._page(list(queryset), reverse)
+
+    async def apage(self, cursor=None):
+        queryset, reverse = self._query(cursor)
+        return self._page([row async for row in queryset], reverse)
+
+
+def paginate_by_cursor(queryset, per_page, cursor):
+    paginator = CursorPaginator(queryset, per_page)
+    try:
+        page = paginator.page(cursor)
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
+    return paginator, page
+
+
+async def apaginate_by_cursor(queryset, per_page, cursor):
+    paginator = CursorPaginator(queryset, per_page)
+    try:
+        page = await paginator.apage(cursor)
+    except InvalidCursor:
+        raise Http404("Invalid cursor.")
+    return paginator, page
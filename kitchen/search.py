@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.db.models import F, FloatField, Func, OuterRef, Q, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+
+from kitchen import fts
+from kitchen.models import Cook, Dish, DishType, Ingredient
+
+
+SEARCH_FIELDS = {
+    DishType: ["name"],
+    Dish: ["name", "description"],
+    Ingredient: ["name"],
+    Cook: ["username"],
+}
+
+
+class SearchBackend:
+    """Plain ``icontains`` matching, works on every database."""
+
+    # How rank() orders the "rank" it annotates, best match first
+    rank_order = None
+
+    def fields_for(self, model, fields=None):
+        return fields or SEARCH_FIELDS[model]
+
+    def filter(self, queryset, term, fields=None):
+        fields = self.fields_for(queryset.model, fields)
+        condition = Q()
+        for field in fields:
+            condition |= Q(**{f"{field}__icontains": term})
+        return queryset.filter(condition)
+
+    def rank(self, queryset, term, fields=None):
+        return self.filter(queryset, term, fields)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    ``icontains`` served by the ``pg_trgm`` GIN indexes on ``UPPER(field)``,
+    matches are ranked with ``SearchRank`` over the same fields.
+    """
+
+    rank_order = "-rank"
+
+    def rank(self, queryset, term, fields=None):
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        fields = self.fields_for(queryset.model, fields)
+        weights = ["A", "B", "C", "D"]
+        vector = SearchVector(fields[0], weight=weights[0])
+        for field, weight in zip(fields[1:], weights[1:]):
+            vector += SearchVector(field, weight=weight)
+        query = SearchQuery(term, search_type="websearch")
+        # SearchRank is a real, as double precision the rank round-trips
+        # through a pagination cursor and compares equal to itself
+        return self.filter(queryset, term, fields).annotate(
+            rank=Cast(SearchRank(vector, query), FloatField())
+        ).order_by(self.rank_order, *queryset.model._meta.ordering)
+
+
+class SQLiteFTSSearchBackend(SearchBackend):
+    """
+    Substring matching through the trigram FTS5 shadow tables created by
+    migration ``0003_search_indexes``. Terms shorter than a trigram fall
+    back to ``icontains``.
+    """
+
+    min_term_length = 3
+    # bm25() is negative, better matches sort first in ascending order
+    rank_order = "rank"
+
+    def match(self, model, term, fields):
+        table = fts.fts_table(model._meta.db_table)
+        phrase = '"' + term.replace('"', '""') + '"'
+        return table, "{%s} : %s" % (" ".join(fields), phrase)
+
+    def filter(self, queryset, term, fields=None):
+        if len(term) < self.min_term_length:
+            return super().filter(queryset, term, fields)
+        fields = self.fields_for(queryset.model, fields)
+        table, match = self.match(queryset.model, term, fields)
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s", [match]
+        ))
+
+    def rank(self, queryset, term, fields=None):
+        if len(term) < self.min_term_length:
+            return super().rank(queryset, term, fields)
+        model = queryset.model
+        fields = self.fields_for(model, fields)
+        table, match = self.match(model, term, fields)
+        # Renders as "... MATCH %s AND rowid = <pk>", with the pk column
+        # under whatever alias the query gives the table
+        bm25 = Func(
+            Value(match),
+            F("pk"),
+            template=(
+                f"(SELECT bm25({table}) FROM {table} "
+                f"WHERE {table} MATCH %(expressions)s)"
+            ),
+            arg_joiner=" AND rowid = ",
+            output_field=FloatField(),
+        )
+        return self.filter(queryset, term, fields).annotate(
+            rank=bm25
+        ).order_by(self.rank_order, *model._meta.ordering)
+
+
+def install_sqlite_fts(connection):
+    """
+    (Re)create the FTS5 shadow tables and their sync triggers.
+
+    SQLite migrations that alter a table rebuild it and drop its triggers,
+    so this runs after every ``migrate`` and repopulates what it restores.
+    """
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        triggers = {row[0] for row in cursor.fetchall()}
+        for model, fields in SEARCH_FIELDS.items():
+            table = model._meta.db_table
+            if fts.trigger_names(table) <= triggers:
+                continue
+            columns = [model._meta.get_field(field).column for field in fields]
+            for sql in fts.create_statements(
+                table, columns, model._meta.pk.column
+            ):
+                cursor.execute(sql)
+
+
+def get_search_backend():
+    return import_string(
+        getattr(
+            settings,
+            "KITCHEN_SEARCH_BACKEND",
+            "kitchen.search.SearchBackend",
+        )
+    )()
+
+
+def search(queryset, term, fields=None):
+    """Rows of ``queryset`` matching ``term``, best match first."""
+    return get_search_backend().rank(queryset, term, fields)
+
+
+def search_related(queryset, model, term, field="pk"):
+    """
+    Rows of ``queryset`` whose ``field`` holds the pk of a ``model`` row
+    matching ``term``, best match first.
+    """
+    backend = get_search_backend()
+    matches = backend.rank(model.objects.all(), term)
+    queryset = queryset.filter(**{f"{field}__in": matches.values("pk")})
+    if "rank" not in matches.query.annotations:
+        # Not ranked, short terms on SQLite
+        return queryset
+    return queryset.annotate(rank=Subquery(
+        matches.filter(pk=OuterRef(field)).values("rank")[:1]
+    )).order_by(backend.rank_order, *queryset.model._meta.ordering)
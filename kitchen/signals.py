@@ -1,9 +1,243 @@
-from django.db.models.signals import post_migrate
+from django.db.models.signals import (
+    post_migrate,
+    post_save,
+    pre_delete,
+    post_delete,
+    m2m_changed,
+)
+from django.db import connections
+from django.db.backends.signals import connection_created
 from django.dispatch import receiver
+from django.utils import timezone
 from django.contrib.auth.models import Group
 
+from kitchen import (
+    counters,
+    fragments,
+    group_cache,
+    ingredient_sets,
+    live,
+    menu_cards,
+    metrics,
+    slow_queries,
+)
+from kitchen.ingredient_filters import install_sqlite_functions
+from kitchen.search import install_sqlite_fts
+from kitchen.models import Cook, Dish, DishType, Ingredient
+
 
 @receiver(post_migrate)
 def create_default_groups(sender, **kwargs):
     for group_name in ["trainee", "employee", "manager"]:
         Group.objects.get_or_create(name=group_name)
+
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using="default", **kwargs):
+    if sender.name == "kitchen":
+        install_sqlite_fts(connections[using])
+
+
+@receiver(connection_created)
+def register_sqlite_functions(sender, connection, **kwargs):
+    install_sqlite_functions(connection)
+
+
+@receiver(connection_created)
+def count_request_queries(sender, connection, **kwargs):
+    metrics.instrument(connection)
+    slow_queries.instrument(connection)
+
+
+def increment_entity_counter(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.adjust(counters.counter_name(sender), 1)
+
+
+def decrement_entity_counter(sender, instance, **kwargs):
+    counters.adjust(counters.counter_name(sender), -1)
+
+
+def bump_fragment_generation(sender, update_fields=None, **kwargs):
+    # Logins only save last_login, which no fragment shows
+    if update_fields != {"last_login"}:
+        fragments.bump(sender._meta.model_name)
+
+
+# Connected per model: a sender-less post_delete receiver would stop the
+# deletion collector from fast-deleting rows of every other model.
+for counted_model in counters.COUNTED_MODELS.values():
+    post_save.connect(increment_entity_counter, sender=counted_model)
+    post_delete.connect(decrement_entity_counter, sender=counted_model)
+    post_save.connect(bump_fragment_generation, sender=counted_model)
+    post_delete.connect(bump_fragment_generation, sender=counted_model)
+
+
+@receiver(m2m_changed, sender=Cook.groups.through)
+def invalidate_cook_groups(sender, instance, action, reverse, pk_set,
+                           **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        group_cache.invalidate_user(instance)
+    elif pk_set:
+        for cook_pk in pk_set:
+            group_cache.invalidate_user_pk(cook_pk)
+    else:
+        # group.user_set.clear() does not say which cooks were affected
+        group_cache.invalidate_all()
+
+
+@receiver(post_save, sender=Cook)
+@receiver(post_delete, sender=Cook)
+def invalidate_saved_cook_groups(sender, instance, **kwargs):
+    # Covers primary keys reused after a delete or a rolled back insert
+    if kwargs.get("created", True):
+        group_cache.invalidate_user(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_names(sender, instance, **kwargs):
+    group_cache.invalidate_all()
+
+
+def _relation_columns(through, instance):
+    source = target = None
+    for field in through._meta.fields:
+        if not field.is_relation:
+            continue
+        if field.related_model is type(instance) and source is None:
+            source = field
+        else:
+            target = field
+    return source, target
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+@receiver(m2m_changed, sender=Ingredient.dishes.through)
+@receiver(m2m_changed, sender=Cook.groups.through)
+def touch_related_rows(sender, instance, action, model, pk_set, **kwargs):
+    """Bump ``updated_at`` on both sides of a changed relation."""
+    if action == "pre_clear":
+        source, target = _relation_columns(sender, instance)
+        instance._cleared_pks = set(
+            sender.objects.filter(
+                **{source.attname: instance.pk}
+            ).values_list(target.attname, flat=True)
+        )
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_cleared_pks", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    now = timezone.now()
+    for touched_model, pks in [(type(instance), {instance.pk}),
+                               (model, pk_set)]:
+        if pks and any(
+            field.name == "updated_at" for field in touched_model._meta.fields
+        ):
+            touched_model.objects.filter(pk__in=pks).update(updated_at=now)
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+@receiver(m2m_changed, sender=Ingredient.dishes.through)
+def bump_relation_generations(sender, instance, action, model, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        fragments.bump(type(instance)._meta.model_name, model._meta.model_name)
+
+
+@receiver(post_save, sender=Dish)
+def refresh_saved_dish_card(sender, instance, raw=False, **kwargs):
+    if not raw:
+        menu_cards.refresh([instance.pk])
+
+
+@receiver(post_save, sender=DishType)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Cook)
+def refresh_renamed_cards(sender, instance, created, raw=False,
+                          update_fields=None, **kwargs):
+    # New rows are on no card yet, logins only save last_login
+    name = "username" if issubclass(sender, Cook) else "name"
+    if created or raw or (
+        update_fields is not None and name not in update_fields
+    ):
+        return
+    menu_cards.refresh_for(sender, [instance.pk])
+
+
+@receiver(pre_delete, sender=Ingredient)
+@receiver(pre_delete, sender=Cook)
+def remember_card_dishes(sender, instance, **kwargs):
+    # The through rows are gone by the time post_delete is sent
+    instance._menu_card_dishes = menu_cards.dishes_of(sender, [instance.pk])
+
+
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Cook)
+def refresh_cards_after_delete(sender, instance, **kwargs):
+    menu_cards.refresh(instance.__dict__.pop("_menu_card_dishes", ()))
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+@receiver(m2m_changed, sender=Ingredient.dishes.through)
+def refresh_linked_cards(sender, instance, action, pk_set, **kwargs):
+    if isinstance(instance, Dish):
+        if action in ("post_add", "post_remove", "post_clear"):
+            menu_cards.refresh([instance.pk])
+    elif action == "pre_clear":
+        instance._menu_card_cleared = menu_cards.dishes_of(
+            type(instance), [instance.pk]
+        )
+    elif action == "post_clear":
+        menu_cards.refresh(instance.__dict__.pop("_menu_card_cleared", ()))
+    elif action in ("post_add", "post_remove"):
+        menu_cards.refresh(pk_set)
+
+
+@receiver(m2m_changed, sender=Ingredient.dishes.through)
+def update_ingredient_sets(sender, instance, action, pk_set, **kwargs):
+    ingredient_sets.links_changed(instance, action, pk_set)
+
+
+@receiver(post_delete, sender=Dish)
+def drop_dish_ingredient_set(sender, instance, **kwargs):
+    dish_pk = instance.pk
+    ingredient_sets.on_commit(lambda index: index.drop_dish(dish_pk))
+
+
+@receiver(post_delete, sender=Ingredient)
+def drop_ingredient_from_sets(sender, instance, **kwargs):
+    ingredient_pk = instance.pk
+    ingredient_sets.on_commit(
+        lambda index: index.drop_ingredient(ingredient_pk)
+    )
+
+
+def publish_live_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        live.publish_for(sender, [instance.pk])
+
+
+for live_model in (Dish, DishType, Ingredient):
+    post_save.connect(publish_live_change, sender=live_model)
+    post_delete.connect(publish_live_change, sender=live_model)
+
+
+@receiver(post_delete, sender=Cook)
+def publish_live_cook_removal(sender, instance, **kwargs):
+    live.publish("assignment", [instance.pk])
+
+
+@receiver(m2m_changed, sender=Dish.cooks.through)
+@receiver(m2m_changed, sender=Ingredient.dishes.through)
+def publish_live_links(sender, instance, action, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    topic = "assignment" if sender is Dish.cooks.through else "ingredient"
+    if isinstance(instance, Dish):
+        live.publish(topic, pk_set or (), [instance.pk])
+    else:
+        live.publish(topic, [instance.pk], pk_set or ())
@@ -0,0 +1,232 @@
+"""
+Opt-in log of slow queries, attributed to the view that issued them.
+
+Set ``KITCHEN_SLOW_QUERY_LOG`` to a file path to turn it on. An execute
+wrapper on every database connection times the queries made while
+``SlowQueryMiddleware`` handles a request; those slower than
+``KITCHEN_SLOW_QUERY_MS`` are sampled at ``KITCHEN_SLOW_QUERY_SAMPLE``
+into the file, one JSON object per line, rotated at
+``KITCHEN_SLOW_QUERY_LOG_BYTES`` with ``KITCHEN_SLOW_QUERY_LOG_BACKUPS``
+older files kept.
+
+Queries are logged as fingerprints, with literals and placeholders
+replaced by ``?`` and ``IN`` lists and multi-row ``VALUES`` folded, so
+that the same query with other parameters groups together and no
+parameter values reach the log. ``python manage.py slow_queries``
+summarises the log.
+"""
+import glob
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.utils import timezone
+
+from kitchen.stats import percentile
+
+
+DEFAULT_THRESHOLD_MS = 100
+DEFAULT_LOG_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 5
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s|\?")
+_NUMBER = re.compile(r"(?<![\w\"])-?\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_ROWS = re.compile(r"(\(\?(?:, \?)*\))(?:, \(\?(?:, \?)*\))+")
+
+
+def normalize(sql):
+    """``sql`` with its values replaced, the same for any parameters."""
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _ROWS.sub(r"\1, ...", sql)
+
+
+def fingerprint(normalized):
+    return hashlib.md5(
+        normalized.encode(), usedforsecurity=False
+    ).hexdigest()[:16]
+
+
+def view_label(request):
+    """The view class of the resolved route, or its function name."""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return None
+    view = getattr(match.func, "view_class", match.func)
+    return getattr(view, "__qualname__", match.view_name)
+
+
+class QueryLog:
+    """Appends entries to a rotating JSONL file, from any thread."""
+
+    def __init__(self, path, max_bytes, backups):
+        self.path = path
+        self.logger = logging.Logger("kitchen.slow_queries")
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups,
+            encoding="utf-8", delay=True,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger.addHandler(handler)
+
+    def write(self, entry):
+        self.logger.info(json.dumps(entry, separators=(",", ":")))
+
+    def close(self):
+        for handler in self.logger.handlers:
+            handler.close()
+
+
+_log = None
+_log_config = None
+_log_lock = threading.Lock()
+
+
+def get_config():
+    return {
+        "path": getattr(settings, "KITCHEN_SLOW_QUERY_LOG", None),
+        "threshold_ms": getattr(
+            settings, "KITCHEN_SLOW_QUERY_MS", DEFAULT_THRESHOLD_MS
+        ),
+        "sample": getattr(settings, "KITCHEN_SLOW_QUERY_SAMPLE", 1.0),
+        "max_bytes": getattr(
+            settings, "KITCHEN_SLOW_QUERY_LOG_BYTES", DEFAULT_LOG_BYTES
+        ),
+        "backups": getattr(
+            settings, "KITCHEN_SLOW_QUERY_LOG_BACKUPS", DEFAULT_LOG_BACKUPS
+        ),
+    }
+
+
+def get_log(config):
+    global _log, _log_config
+    with _log_lock:
+        if _log is None or _log_config != config:
+            if _log is not None:
+                _log.close()
+            _log = QueryLog(
+                config["path"], config["max_bytes"], config["backups"]
+            )
+            _log_config = config
+        return _log
+
+
+class RequestQueries:
+    """The request being handled, read when one of its queries is slow."""
+
+    def __init__(self, request, config):
+        self.request = request
+        self.config = config
+        self.threshold = config["threshold_ms"] / 1000
+
+
+_current = ContextVar("kitchen_slow_queries_request", default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        if seconds >= current.threshold and (
+            random.random() < current.config["sample"]
+        ):
+            record(current, sql, seconds, many, context["connection"].alias)
+
+
+def record(current, sql, seconds, many, alias):
+    normalized = normalize(sql)
+    get_log(current.config).write({
+        "time": timezone.now().isoformat(),
+        "fingerprint": fingerprint(normalized),
+        "sql": normalized,
+        "ms": round(seconds * 1000, 3),
+        "view": view_label(current.request),
+        "method": current.request.method,
+        "many": many,
+        "database": alias,
+    })
+
+
+def instrument(connection):
+    """Add the query timer to ``connection`` once."""
+    if time_query not in connection.execute_wrappers:
+        # First, so that execute_wrapper() blocks pop their own wrapper
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def start_request(request, config):
+    return _current.set(RequestQueries(request, config))
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def log_files(path):
+    """``path`` and its rotated backups, oldest first."""
+    backups = [
+        name for name in glob.glob(glob.escape(path) + ".*")
+        if name.rsplit(".", 1)[1].isdigit()
+    ]
+    backups.sort(key=lambda name: int(name.rsplit(".", 1)[1]), reverse=True)
+    return backups + [path]
+
+
+def read_entries(path):
+    for name in log_files(path):
+        try:
+            with open(name, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # Cut short by a crash or a rotation
+                        continue
+        except FileNotFoundError:
+            continue
+
+
+def summarize(entries, by="fingerprint"):
+    """
+    Rows of count, total, mean and p95 time per fingerprint or per view,
+    the most expensive first.
+    """
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[entry[by]].append(entry)
+    rows = []
+    for key, found in groups.items():
+        times = sorted(entry["ms"] for entry in found)
+        total = sum(times)
+        other = "view" if by == "fingerprint" else "fingerprint"
+        rows.append({
+            "key": key,
+            "count": len(times),
+            "total_ms": total,
+            "mean_ms": total / len(times),
+            "p95_ms": percentile(times, 95),
+            "sql": found[-1]["sql"],
+            # The views issuing a fingerprint, or the fingerprints of a view
+            other: Counter(entry[other] for entry in found).most_common(),
+        })
+    rows.sort(key=lambda row: row["total_ms"], reverse=True)
+    return rows
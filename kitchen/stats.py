@@ -0,0 +1,10 @@
+"""Summary statistics shared by the benchmarks and the slow query log."""
+import math
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(rank, 1) - 1]
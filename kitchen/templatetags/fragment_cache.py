@@ -0,0 +1,56 @@
+from django import template
+from django.core.cache import cache
+
+from kitchen import fragments
+
+register = template.Library()
+
+
+class GenerationCacheNode(template.Node):
+    def __init__(self, nodelist, name, labels, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.labels = labels
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        labels = self.labels.resolve(context).split()
+        key = fragments.fragment_key(
+            name, labels, [value.resolve(context) for value in self.vary_on]
+        )
+        content = cache.get(key)
+        if content is None:
+            fragments.record(name, "miss")
+            content = self.nodelist.render(context)
+            cache.set(key, content, fragments.timeout())
+        else:
+            fragments.record(name, "hit")
+        return content
+
+
+@register.tag("generation_cache")
+def do_generation_cache(parser, token):
+    """
+    Cache a fragment until one of the listed models changes::
+
+        {% generation_cache "dish_rows" "dish dishtype" request.GET %}
+          ...
+        {% endgeneration_cache %}
+
+    The first argument names the fragment, the second lists the model
+    names whose generation numbers key it, the rest are vary-on values.
+    """
+    nodelist = parser.parse(("endgeneration_cache",))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{tokens[0]}' tag requires a fragment name and model names."
+        )
+    return GenerationCacheNode(
+        nodelist,
+        parser.compile_filter(tokens[1]),
+        parser.compile_filter(tokens[2]),
+        [parser.compile_filter(value) for value in tokens[3:]],
+    )
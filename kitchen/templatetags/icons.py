@@ -0,0 +1,43 @@
+import functools
+import re
+
+from django import template
+from django.contrib.staticfiles import finders
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+ICON_DIR = "vendor/@fortawesome/fontawesome-free/svgs"
+SHAPE = re.compile(r'viewBox="(?P<box>[^"]+)"><path d="(?P<path>[^"]+)"')
+
+
+@functools.lru_cache(maxsize=None)
+def icon_shape(family, name):
+    """``(viewBox, path)`` of a Font Awesome icon, read once."""
+    source = finders.find(f"{ICON_DIR}/{family}/{name}.svg")
+    if source is None:
+        raise template.TemplateSyntaxError(f"No {family} icon '{name}'")
+    with open(source, encoding="utf-8") as file:
+        match = SHAPE.search(file.read())
+    return match["box"], match["path"]
+
+
+@register.simple_tag
+def icon(name, family="solid", **attrs):
+    """
+    A Font Awesome icon as inline SVG, sized and coloured like the text::
+
+        {% icon "angle-down" class="ms-1" %}
+        {% icon "github" "brands" %}
+
+    A page ships the few icons it shows instead of the icon stylesheet
+    and fonts.
+    """
+    box, path = icon_shape(family, name)
+    return format_html(
+        '<svg{} viewBox="{}" width="1em" height="1em" fill="currentColor" '
+        'style="vertical-align:-.125em" aria-hidden="true" '
+        'focusable="false"><path d="{}"/></svg>',
+        flatatt(attrs), box, path,
+    )
@@ -2,6 +2,10 @@ from django import template
 
 register = template.Library()
 
+# Page numbers and cursors are two ways of addressing the same page,
+# setting one of them drops the other from the query string.
+EXCLUSIVE_PARAMS = {"page": "cursor", "cursor": "page"}
+
 
 @register.simple_tag
 def query_transform(request, **kwargs):
@@ -9,6 +13,8 @@ def query_transform(request, **kwargs):
     for key, value in kwargs.items():
         if value is not None:
             updated[key] = value
+            if key in EXCLUSIVE_PARAMS:
+                updated.pop(EXCLUSIVE_PARAMS[key], 0)
         else:
             updated.pop(key, 0)
     return updated.urlencode()
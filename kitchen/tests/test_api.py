@@ -0,0 +1,193 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.urls import reverse
+
+from kitchen import counters
+from kitchen.models import DishType, Dish, Ingredient
+
+DISH_API_URL = reverse("kitchen:api-dish-list")
+
+
+class PublicApiTest(TestCase):
+    def test_login_required(self):
+        response = self.client.get(DISH_API_URL)
+        self.assertEqual(response.status_code, 401)
+
+
+class PrivateApiTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+        self.dishtype = DishType.objects.create(name="Soup")
+        self.ingredients = [
+            Ingredient.objects.create(name=f"Ingredient {num}")
+            for num in range(3)
+        ]
+        self.dishes = []
+        for num in range(6):
+            dish = Dish.objects.create(
+                name=f"Dish {num}",
+                description="description dish test",
+                price=10,
+                dishtype=self.dishtype,
+            )
+            dish.cooks.add(self.user)
+            dish.ingredients.add(*self.ingredients)
+            self.dishes.append(dish)
+
+    def post_json(self, url, data, method="post"):
+        return getattr(self.client, method)(
+            url, data=json.dumps(data), content_type="application/json"
+        )
+
+    def test_sparse_fields_and_bulk_fetch(self):
+        ids = ",".join(str(dish.id) for dish in self.dishes)
+        # user, dishes with dish type, cooks, ingredients; the session
+        # comes from the cache
+        with self.assertNumQueries(4):
+            response = self.client.get(DISH_API_URL, {
+                "ids": ids,
+                "fields": "id,dishtype_name,cooks,ingredients",
+            })
+        results = response.json()["results"]
+        self.assertEqual(len(results), 6)
+        self.assertEqual(results[0], {
+            "id": self.dishes[0].id,
+            "dishtype_name": "Soup",
+            "cooks": [self.user.id],
+            "ingredients": sorted(
+                ingredient.id for ingredient in self.ingredients
+            ),
+        })
+
+        response = self.client.get(DISH_API_URL, {"fields": "secret"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_cursor_pagination(self):
+        response = self.client.get(DISH_API_URL, {"limit": 4})
+        body = response.json()
+        self.assertEqual(len(body["results"]), 4)
+        response = self.client.get(
+            DISH_API_URL, {"limit": 4, "cursor": body["next"]}
+        )
+        self.assertEqual(
+            [dish["name"] for dish in response.json()["results"]],
+            ["Dish 4", "Dish 5"],
+        )
+
+    def test_detail(self):
+        response = self.client.get(
+            reverse("kitchen:api-dish-detail", args=[self.dishes[0].id]),
+            {"fields": "name,price"},
+        )
+        self.assertEqual(response.json(), {"name": "Dish 0", "price": "10.00"})
+
+    def test_bulk_create_and_update(self):
+        response = self.post_json(DISH_API_URL, [
+            {
+                "name": f"New dish {num}",
+                "description": "bulk",
+                "price": "12.50",
+                "dishtype": self.dishtype.id,
+                "ingredients": [self.ingredients[0].id],
+            }
+            for num in range(3)
+        ])
+        self.assertEqual(response.status_code, 201)
+        created = Dish.objects.filter(name__startswith="New dish")
+        self.assertEqual(created.count(), 3)
+        self.assertEqual(
+            list(created[0].ingredients.all()), [self.ingredients[0]]
+        )
+        self.assertEqual(counters.get_counts()["dishes"], 9)
+
+        response = self.post_json(DISH_API_URL, [
+            {"id": dish.id, "price": "7", "cooks": []}
+            for dish in created
+        ], method="patch")
+        self.assertEqual(response.status_code, 200)
+        for dish in created.all():
+            self.assertEqual(dish.price, 7)
+            self.assertFalse(dish.cooks.exists())
+
+    def test_invalid_objects_rejected(self):
+        response = self.post_json(DISH_API_URL, [
+            {"name": "No price", "description": "x",
+             "dishtype": self.dishtype.id},
+            {"name": "Bad type", "description": "x", "price": 1,
+             "dishtype": 9999},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"0", "1"})
+        self.assertFalse(Dish.objects.filter(name="No price").exists())
+
+    def test_malformed_ids_rejected(self):
+        response = self.post_json(DISH_API_URL, [
+            {"name": "Text type", "description": "x", "price": 1,
+             "dishtype": "abc"},
+            {"name": "Scalar cooks", "description": "x", "price": 1,
+             "dishtype": self.dishtype.id, "cooks": self.user.id},
+            {"name": "Text ingredients", "description": "x", "price": 1,
+             "dishtype": [self.dishtype.id],
+             "ingredients": [self.ingredients[0].id, "abc", {"id": 1}]},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual(list(errors["0"]), ["dishtype"])
+        self.assertEqual(list(errors["1"]), ["cooks"])
+        self.assertEqual(
+            sorted(errors["2"]), ["dishtype", "ingredients"]
+        )
+        self.assertFalse(Dish.objects.filter(description="x").exists())
+
+        response = self.post_json(DISH_API_URL, [
+            {"id": self.dishes[0].id, "dishtype": True},
+            {"id": self.dishes[1].id, "ingredients": "1,2"},
+        ], method="patch")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()["errors"]), {"0", "1"})
+
+    def test_patch_ids_must_be_integers(self):
+        for pk in [True, 1.9, str(self.dishes[0].id), None]:
+            with self.subTest(pk=pk):
+                response = self.post_json(DISH_API_URL, [
+                    {"id": pk, "price": "7"},
+                ], method="patch")
+                self.assertEqual(response.status_code, 400)
+        self.dishes[0].refresh_from_db()
+        self.assertEqual(self.dishes[0].price, 10)
+
+    def test_conflict_hides_database_message(self):
+        response = self.post_json(DISH_API_URL, [
+            {"name": "Twin", "description": "x", "price": 1,
+             "dishtype": self.dishtype.id}
+            for _num in range(2)
+        ])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(
+            response.json()["error"], "Conflicts with existing data"
+        )
+        self.assertFalse(Dish.objects.filter(name="Twin").exists())
+
+    def test_write_requires_group(self):
+        response = self.post_json(reverse("kitchen:api-cook-list"), [
+            {"username": "new_cook", "password": "pass_new_cook"},
+        ])
+        self.assertEqual(response.status_code, 403)
+        self.user.groups.add(Group.objects.get(name="manager"))
+        response = self.post_json(reverse("kitchen:api-cook-list"), [
+            {"username": "new_cook", "password": "pass_new_cook"},
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(
+            get_user_model().objects.get(
+                username="new_cook"
+            ).check_password("pass_new_cook")
+        )
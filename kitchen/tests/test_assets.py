@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from kitchen import assets
+
+FONTS = "vendor/@fortawesome/fontawesome-free/webfonts/"
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "kitchen.assets.CompressedManifestStorage",
+    },
+}
+
+
+class ReferencedAssetsTest(SimpleTestCase):
+    def test_follows_templates_and_stylesheets(self):
+        wanted = assets.referenced_assets()
+        self.assertIn("css/pixel.css", wanted)
+        self.assertIn("assets/js/kitchen-live.js", wanted)
+        # Loaded by the Font Awesome stylesheet, not by a template
+        self.assertIn(FONTS + "fa-solid-900.woff2", wanted)
+        self.assertNotIn("scss/pixel.scss", wanted)
+
+    def test_css_references(self):
+        text = (
+            'a { background: url("../img/bg.png?v=2#top"); }\n'
+            "b { background: url(data:image/png;base64,AAAA); }\n"
+            "@import 'https://fonts.example.com/css';\n"
+            "@import '/static/css/extra.css';\n"
+            "/*# sourceMappingURL=pixel.css.map */"
+        )
+        self.assertEqual(
+            assets.asset_references("css/pixel.css", text),
+            {"img/bg.png", "css/extra.css", "css/pixel.css.map"},
+        )
+
+    def test_finders_list_only_referenced_files(self):
+        wanted = assets.referenced_assets()
+        theme = [
+            path for path, _ in
+            finders.get_finder(
+                "kitchen.assets.PrunedAppDirectoriesFinder"
+            ).list([])
+            if not path.startswith("admin/")
+        ]
+        project = [
+            path for path, _ in
+            finders.get_finder("kitchen.assets.PrunedFileSystemFinder").list(
+                []
+            )
+        ]
+        self.assertTrue(project)
+        self.assertTrue(set(project + theme) <= wanted)
+        # Unlisted files are still found for runserver
+        self.assertIsNotNone(finders.find("scss/pixel.scss"))
+
+    def test_pages_include_their_layout(self):
+        pages = assets.page_assets()
+        self.assertIn("css/pixel.css", pages["kitchen/dish_list.html"])
+        self.assertIn(
+            "assets/js/kitchen-live.js", pages["kitchen/dish_list.html"]
+        )
+        self.assertNotIn("includes/navigation.html", pages)
+        self.assertIn("pages/about.html", pages)
+
+
+class CollectStaticTest(SimpleTestCase):
+    def test_collects_hashed_and_compressed_files(self):
+        with tempfile.TemporaryDirectory() as root:
+            with override_settings(STATIC_ROOT=root, STORAGES=STORAGES):
+                call_command(
+                    "collectstatic", interactive=False, verbosity=0
+                )
+            with open(os.path.join(root, "staticfiles.json")) as file:
+                paths = json.load(file)["paths"]
+            self.assertNotIn("scss/pixel.scss", paths)
+            hashed = paths["assets/js/jarallax.min.js"]
+            self.assertNotEqual(hashed, "assets/js/jarallax.min.js")
+            self.assertTrue(
+                os.path.exists(os.path.join(root, hashed + ".gz"))
+            )
+            # The theme does not ship this source map
+            with open(os.path.join(root, hashed)) as file:
+                self.assertNotIn("sourceMappingURL", file.read())
+
+    def test_report(self):
+        out = StringIO()
+        call_command("asset_report", "kitchen/index.html", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith("kitchen/index.html"))
+        raw, gzipped = (float(value) for value in lines[1].split()[2:4])
+        self.assertLess(gzipped, raw)
@@ -0,0 +1,195 @@
+import time
+from io import StringIO
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from kitchen import assignment
+from kitchen.models import DishType, Dish, Ingredient, MenuCard
+
+ASSIGNMENT_URL = reverse("kitchen:cook-assignment")
+
+
+class BalanceTest(TestCase):
+    def test_heavy_dishes_are_spread(self):
+        chosen, loads = assignment.balance([5, 1, 1, 1, 1, 1], [1, 1])
+        self.assertEqual(sorted(loads.tolist()), [5, 5])
+        self.assertNotEqual(chosen[0][0], chosen[1][0])
+
+    def test_experience_takes_a_larger_share(self):
+        _chosen, loads = assignment.balance([1] * 8, [1, 3])
+        self.assertEqual(loads.tolist(), [2, 6])
+
+    def test_distinct_cooks_per_dish(self):
+        chosen, _loads = assignment.balance([1, 2, 3], [1, 1, 1], 2)
+        self.assertEqual(chosen.shape, (3, 2))
+        for row in chosen:
+            self.assertEqual(len(set(row.tolist())), 2)
+
+    def test_current_cooks_are_kept_when_balanced(self):
+        current = {0: np.array([1]), 1: np.array([0])}
+        chosen, _loads = assignment.balance([1, 1], [1, 1], current=current)
+        self.assertEqual(chosen.ravel().tolist(), [1, 0])
+
+    def test_thousands_of_dishes(self):
+        rng = np.random.default_rng(1)
+        weights = rng.integers(1, 12, 5000)
+        capacity = assignment.capacities(rng.integers(0, 30, 300).tolist())
+        started = time.perf_counter()
+        _chosen, loads = assignment.balance(weights, capacity)
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(loads.sum(), weights.sum())
+        shares = loads / capacity
+        self.assertLess(shares.max() / shares.mean(), 4 / 3)
+
+
+class AssignmentTest(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.junior = user_model.objects.create_user(
+            username="junior", password="junior_test", years_of_experience=0
+        )
+        self.senior = user_model.objects.create_user(
+            username="senior", password="senior_test", years_of_experience=10
+        )
+        self.manager = user_model.objects.create_user(
+            username="manager", password="manager_test"
+        )
+        self.manager.groups.add(Group.objects.get(name="manager"))
+        self.junior.groups.add(Group.objects.get(name="employee"))
+        self.senior.groups.add(Group.objects.get(name="employee"))
+        dishtype = DishType.objects.create(name="Main")
+        salt = Ingredient.objects.create(name="salt")
+        self.dishes = []
+        for num in range(6):
+            dish = Dish.objects.create(
+                name=f"Dish {num}", description="test", price=10,
+                dishtype=dishtype,
+            )
+            dish.ingredients.add(salt)
+            dish.cooks.add(self.junior)
+            self.dishes.append(dish)
+
+    def assigned(self, cook):
+        return Dish.cooks.through.objects.filter(cook=cook).count()
+
+    def test_plan_and_apply(self):
+        plan = assignment.plan(
+            cooks=assignment.eligible_cooks(["employee"])
+        )
+        self.assertEqual(
+            [(cook.username, cook.current_dishes, cook.planned_dishes)
+             for cook in plan.cooks],
+            [("junior", 6, 2), ("senior", 0, 4)],
+        )
+        self.assertGreater(plan.spread_current, plan.spread_planned)
+
+        changed = assignment.apply(plan)
+        self.assertEqual(len(changed), 4)
+        self.assertEqual(
+            (self.assigned(self.junior), self.assigned(self.senior)), (2, 4)
+        )
+        self.assertEqual(
+            MenuCard.objects.filter(cook_usernames=["senior"]).count(), 4
+        )
+        again = assignment.plan(
+            cooks=assignment.eligible_cooks(["employee"])
+        )
+        self.assertEqual(again.changed, [])
+
+    def test_cooks_outside_the_plan_are_listed(self):
+        self.dishes[0].cooks.add(self.manager)
+        plan = assignment.plan(
+            cooks=assignment.eligible_cooks(["employee"])
+        )
+        self.assertIn(self.dishes[0].pk, plan.changed)
+        self.assertEqual(
+            [(cook.username, cook.dishes) for cook in plan.dropped],
+            [("manager", 1)],
+        )
+        out = StringIO()
+        call_command("assign_cooks", "--group", "employee", stdout=out)
+        self.assertIn("manager is not in the plan and lost 1 dishes",
+                      out.getvalue())
+        self.assertEqual(self.assigned(self.manager), 0)
+
+    def test_view_lists_dropped_cooks(self):
+        self.junior.is_active = False
+        self.junior.save()
+        self.client.force_login(self.manager)
+        response = self.client.get(ASSIGNMENT_URL)
+        self.assertContains(response, "applying takes them off their dishes")
+        response = self.client.post(ASSIGNMENT_URL, {
+            "cooks_per_dish": 1, "plan": response.context["plan"].digest
+        })
+        self.assertContains(response, "taken off their dishes")
+        self.assertEqual(
+            [(cook.username, cook.dishes)
+             for cook in response.context["dropped"]],
+            [("junior", 6)],
+        )
+
+    def test_dry_run_command_writes_nothing(self):
+        out = StringIO()
+        call_command(
+            "assign_cooks", "--dry-run", "--group", "employee", stdout=out
+        )
+        self.assertIn("Dry run: 6 dishes over 2 cooks", out.getvalue())
+        self.assertEqual(self.assigned(self.junior), 6)
+
+        call_command("assign_cooks", "--group", "employee", stdout=out)
+        self.assertEqual(self.assigned(self.senior), 4)
+
+    def test_view_previews_and_applies(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(ASSIGNMENT_URL, {"cooks_per_dish": 2})
+        self.assertEqual(len(response.context["plan"].targets[
+            self.dishes[0].pk
+        ]), 2)
+        self.assertEqual(self.assigned(self.senior), 0)
+
+        response = self.client.get(ASSIGNMENT_URL, {"cooks_per_dish": 1})
+        digest = response.context["plan"].digest
+        self.assertContains(response, f'value="{digest}"')
+        response = self.client.post(ASSIGNMENT_URL, {
+            "cooks_per_dish": 1, "plan": digest
+        })
+        self.assertContains(response, "Reassigned")
+        self.assertGreater(self.assigned(self.manager), 0)
+        self.assertEqual(Dish.cooks.through.objects.count(), 6)
+
+    def test_view_applies_only_the_previewed_plan(self):
+        self.client.force_login(self.manager)
+        response = self.client.get(ASSIGNMENT_URL, {"cooks_per_dish": 1})
+        digest = response.context["plan"].digest
+
+        # A new cook joins between the preview and the apply
+        get_user_model().objects.create_user(
+            username="newcomer", password="newcomer_test"
+        )
+        response = self.client.post(ASSIGNMENT_URL, {
+            "cooks_per_dish": 1, "plan": digest
+        })
+        self.assertContains(response, "The plan has changed since the preview")
+        self.assertIsNone(response.context.get("applied"))
+        self.assertEqual(self.assigned(self.junior), 6)
+
+        # Applying the plan shown now goes through
+        response = self.client.post(ASSIGNMENT_URL, {
+            "cooks_per_dish": 1, "plan": response.context["plan"].digest
+        })
+        self.assertContains(response, "Reassigned")
+        # Asking for another number of cooks than previewed is refused too
+        response = self.client.post(ASSIGNMENT_URL, {
+            "cooks_per_dish": 2, "plan": response.context["plan"].digest
+        })
+        self.assertContains(response, "The plan has changed since the preview")
+
+    def test_view_needs_manager(self):
+        self.client.force_login(self.junior)
+        response = self.client.get(ASSIGNMENT_URL)
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,143 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+from django.views import View
+
+from kitchen import visits
+from kitchen.middleware import WhiteNoiseMiddleware
+from kitchen.mixins import GroupRequiredMixin
+from kitchen.models import DishType, Dish, Ingredient
+
+
+class ManagerOnlyView(GroupRequiredMixin, View):
+    group_required = ["manager"]
+
+    async def get(self, request):
+        return HttpResponse(request.user.username)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        visits.clear()
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+        dishtype = DishType.objects.create(name="Soup")
+        salt = Ingredient.objects.create(name="Salt")
+        for name in ("Borscht", "Ramen", "Gazpacho"):
+            dish = Dish.objects.create(
+                name=name, description="test", price=10, dishtype=dishtype
+            )
+            if name != "Gazpacho":
+                dish.ingredients.add(salt)
+        self.dish = dish
+        self.dish.cooks.add(self.user)
+
+    def assertSameAsSync(self, name, args=None, data=None, key="object"):
+        sync = self.client.get(reverse(f"kitchen:{name}", args=args), data)
+        asynchronous = self.client.get(
+            reverse(f"kitchen:async-{name}", args=args), data
+        )
+        self.assertEqual(asynchronous.status_code, 200)
+        self.assertEqual(
+            asynchronous.templates[0].name, sync.templates[0].name
+        )
+        if key == "object":
+            self.assertEqual(asynchronous.context[key], sync.context[key])
+        else:
+            self.assertEqual(
+                list(asynchronous.context[key]), list(sync.context[key])
+            )
+        return asynchronous
+
+    def test_lists_match_the_sync_views(self):
+        self.assertSameAsSync("dish-type-list", key="dishtype_list")
+        self.assertSameAsSync("ingredient-list", key="ingredient_list")
+        self.assertSameAsSync("cook-list", key="cook_list")
+        response = self.assertSameAsSync(
+            "dish-list", data={"with_ingredients": "salt"}, key="dish_list"
+        )
+        self.assertEqual(len(response.context["dish_list"]), 2)
+
+    def test_cursor_pages(self):
+        for num in range(6):
+            Ingredient.objects.create(name=f"Spice {num}")
+        url = reverse("kitchen:async-ingredient-list")
+        first = self.client.get(url).context["page_obj"]
+        self.assertTrue(first.has_next())
+        second = self.client.get(url, {"cursor": first.next_cursor})
+        self.assertEqual(len(second.context["ingredient_list"]), 2)
+        self.assertEqual(
+            self.client.get(url, {"cursor": "nonsense"}).status_code, 404
+        )
+
+    def test_details_match_the_sync_views(self):
+        self.assertSameAsSync("dish-detail", args=[self.dish.pk])
+        self.assertSameAsSync(
+            "dish-type-detail", args=[self.dish.dishtype_id]
+        )
+        response = self.assertSameAsSync("cook-detail", args=[self.user.pk])
+        self.assertEqual(response.context["cook_group"], "employee")
+        self.assertEqual(
+            self.client.get(
+                reverse("kitchen:async-dish-detail", args=[0])
+            ).status_code,
+            404,
+        )
+
+    def test_conditional_get(self):
+        url = reverse("kitchen:async-dish-list")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304
+        )
+        Dish.objects.filter(pk=self.dish.pk).delete()
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    def test_index_counts_visits(self):
+        url = reverse("kitchen:async-index")
+        self.assertEqual(self.client.get(url).context["num_dishes"], 3)
+        self.assertEqual(self.client.get(url).context["num_visits"], 1)
+
+    def test_login_required(self):
+        self.client.logout()
+        for name in ("async-index", "async-dish-list"):
+            response = self.client.get(reverse(f"kitchen:{name}"))
+            self.assertEqual(response.status_code, 302)
+            self.assertIn("login", response["Location"])
+
+    async def test_group_required_in_async_mode(self):
+        view = ManagerOnlyView.as_view()
+        self.assertTrue(iscoroutinefunction(view))
+        request = AsyncRequestFactory().get("/")
+
+        async def auser():
+            return await get_user_model().objects.aget(username="cook")
+
+        request.auser = auser
+        with self.assertRaises(PermissionDenied):
+            await view(request)
+
+        manager = await Group.objects.aget(name="manager")
+        await (await auser()).groups.aadd(manager)
+        response = await view(request)
+        self.assertContains(response, "cook")
+
+
+class AsyncWhiteNoiseTest(TestCase):
+    async def test_passes_other_paths_through(self):
+        async def get_response(request):
+            return HttpResponse("view")
+
+        middleware = WhiteNoiseMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(AsyncRequestFactory().get("/dishes/"))
+        self.assertContains(response, "view")
@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TransactionTestCase
+
+from kitchen import benchmark, stats
+from kitchen.models import DishType, Dish, Ingredient
+from kitchen.urls import urlpatterns
+
+
+class PercentileTest(SimpleTestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(stats.percentile(values, 50), 50)
+        self.assertEqual(stats.percentile(values, 95), 95)
+        self.assertEqual(stats.percentile(values, 99), 99)
+        self.assertEqual(stats.percentile([7], 99), 7)
+        self.assertEqual(stats.percentile([], 50), 0.0)
+
+    def test_compare_flags_p95_growth(self):
+        def result(p95):
+            return {"routes": [{
+                "route": "dish-list",
+                "method": "GET",
+                "p95_ms": p95,
+                "throughput_rps": 100.0,
+            }]}
+
+        self.assertTrue(
+            benchmark.compare(result(10.0), result(20.0))[0]["regressed"]
+        )
+        self.assertFalse(
+            benchmark.compare(result(10.0), result(10.5))[0]["regressed"]
+        )
+        # Below the noise floor in milliseconds
+        self.assertFalse(
+            benchmark.compare(result(0.2), result(0.6))[0]["regressed"]
+        )
+
+
+class BenchmarkRunTest(TransactionTestCase):
+    def setUp(self):
+        dishtype = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=dishtype,
+        )
+        Ingredient.objects.create(name="Beetroot")
+        self.user = get_user_model().objects.create_user(
+            username="manager",
+            password="manager_test",
+        )
+        self.user.groups.add(Group.objects.get(name="manager"))
+        self.dish.cooks.add(self.user)
+
+    def probes(self, *routes):
+        return benchmark.build_probes(
+            urlpatterns, benchmark.pick_objects(), routes=routes
+        )
+
+    def test_wsgi_and_asgi_serve_logged_in_pages(self):
+        probes = self.probes("dish-list", "dish-detail")
+        session = benchmark.Session(self.user)
+        for interface in ("wsgi", "asgi"):
+            driver = benchmark.get_driver(interface, session)
+            results = benchmark.run(
+                driver, probes, requests=4, concurrency=2, warmup=1
+            )
+            self.assertEqual(results["meta"]["interface"], interface)
+            for row in results["routes"]:
+                self.assertEqual(row["statuses"], {"200": 4}, row["route"])
+                self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+                self.assertGreater(row["throughput_rps"], 0)
+
+    def test_post_flow_passes_csrf(self):
+        probes = self.probes("dish-remove")
+        self.assertEqual([probe.method for probe in probes], ["GET", "POST"])
+        driver = benchmark.get_driver("wsgi", benchmark.Session(self.user))
+        results = benchmark.run(driver, probes, requests=2, warmup=0)
+        self.assertEqual(results["routes"][1]["statuses"], {"302": 2})
+        self.assertFalse(self.dish.cooks.exists())
+
+    def test_command_writes_and_compares_results(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "run.json")
+            call_command(
+                "benchmark_routes",
+                routes=["index"],
+                requests=2,
+                warmup=0,
+                output=output,
+                stdout=StringIO(),
+            )
+            with open(output) as file:
+                results = json.load(file)
+            self.assertEqual(results["routes"][0]["route"], "index")
+            self.assertEqual(results["routes"][0]["statuses"], {"200": 2})
+
+            results["routes"][0]["p95_ms"] = 0.001
+            baseline = os.path.join(directory, "baseline.json")
+            with open(baseline, "w") as file:
+                json.dump(results, file)
+            with self.assertRaises(CommandError):
+                call_command(
+                    "benchmark_routes",
+                    compare=[baseline, output],
+                    threshold=0,
+                    fail_on_regression=True,
+                    stdout=StringIO(),
+                )
+
+    def test_versus_async_pairs_routes_with_their_twins(self):
+        self.assertEqual(
+            benchmark.async_twins(urlpatterns, ["dish-list"]),
+            ["dish-list", "async-dish-list"],
+        )
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "run.json")
+            call_command(
+                "benchmark_routes",
+                versus_async=True,
+                routes=["dish-list", "cook-detail"],
+                requests=2,
+                warmup=0,
+                output=output,
+                stdout=out,
+            )
+            with open(output) as file:
+                results = json.load(file)
+        self.assertEqual(results["meta"]["interface"], "asgi")
+        self.assertEqual(
+            [row["route"] for row in results["routes"]],
+            ["dish-list", "async-dish-list",
+             "cook-detail", "async-cook-detail"],
+        )
+        for row in results["routes"]:
+            self.assertEqual(row["statuses"], {"200": 2}, row["route"])
+        self.assertIn("async p95", out.getvalue())
+        self.assertIn("GET cook-detail", out.getvalue())
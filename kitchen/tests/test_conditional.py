@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from kitchen.models import DishType, Dish, Ingredient
+
+DISH_LIST_URL = reverse("kitchen:dish-list")
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.client.force_login(self.user)
+        self.dishtype = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=self.dishtype,
+        )
+        self.detail_url = reverse("kitchen:dish-detail", args=[self.dish.id])
+
+    def assertNotModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertTemplateNotUsed(response, "kitchen/dish_detail.html")
+        self.assertTemplateNotUsed(response, "kitchen/dish_list.html")
+
+    def assertModified(self, url, etag):
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_detail_revalidates_on_relation_change(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        self.assertNotModified(self.detail_url, etag)
+
+        ingredient = Ingredient.objects.create(name="Beetroot")
+        ingredient.dishes.add(self.dish)
+        etag = self.assertModified(self.detail_url, etag)
+        self.assertNotModified(self.detail_url, etag)
+
+        ingredient.name = "Red beet"
+        ingredient.save()
+        etag = self.assertModified(self.detail_url, etag)
+
+        self.dish.cooks.add(self.user)
+        self.assertModified(self.detail_url, etag)
+
+    def test_list_revalidates_on_create_delete_and_related_rename(self):
+        response = self.client.get(DISH_LIST_URL)
+        self.assertTrue(response.has_header("Last-Modified"))
+        etag = response["ETag"]
+        self.assertNotModified(DISH_LIST_URL, etag)
+
+        self.dishtype.name = "Soups"
+        self.dishtype.save()
+        etag = self.assertModified(DISH_LIST_URL, etag)
+
+        self.dish.delete()
+        self.assertModified(DISH_LIST_URL, etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        response = self.client.get(
+            self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, 304)
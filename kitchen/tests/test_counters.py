@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kitchen import counters
+from kitchen.models import DishType, Dish, Ingredient, EntityCounter
+
+
+class EntityCounterTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.client.force_login(self.user)
+
+    def test_counters_follow_create_and_delete(self):
+        dishtype = DishType.objects.create(name="Soup")
+        dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=dishtype,
+        )
+        Ingredient.objects.create(name="Beetroot")
+        self.assertEqual(
+            counters.get_counts(),
+            {"cooks": 1, "dishes": 1, "dishtypes": 1, "ingredients": 1},
+        )
+
+        dish.save()
+        self.assertEqual(counters.get_counts()["dishes"], 1)
+
+        dishtype.delete()
+        counts = counters.get_counts()
+        self.assertEqual(counts["dishtypes"], 0)
+        self.assertEqual(counts["dishes"], 0)
+
+    def test_rebuild_counters_command(self):
+        DishType.objects.create(name="Soup")
+        EntityCounter.objects.all().delete()
+        call_command("rebuild_counters", stdout=StringIO())
+        self.assertEqual(
+            EntityCounter.objects.get(name="dishtypes").count, 1
+        )
+
+    def test_index_reads_counters(self):
+        DishType.objects.create(name="Soup")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("kitchen:index"))
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries)
+        )
+        self.assertEqual(response.context["num_dishtypes"], 1)
+        self.assertEqual(response.context["num_cooks"], 1)
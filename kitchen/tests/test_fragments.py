@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen import fragments
+from kitchen.models import DishType, Dish
+
+DISH_LIST_URL = reverse("kitchen:dish-list")
+
+
+@override_settings(KITCHEN_FRAGMENT_STATS_SAMPLE=1)
+class FragmentCacheTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.client.force_login(user)
+        self.dishtype = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=self.dishtype,
+        )
+        self.user = user
+        fragments.reset_stats()
+
+    def dish_rows_stats(self):
+        return fragments.stats().get("dish_rows", {"hit": 0, "miss": 0})
+
+    def test_fragment_reused_until_model_changes(self):
+        self.client.get(DISH_LIST_URL)
+        response = self.client.get(DISH_LIST_URL)
+        self.assertContains(response, "Borscht")
+        self.assertEqual(self.dish_rows_stats(), {"hit": 1, "miss": 1})
+
+        self.dishtype.name = "Soups"
+        self.dishtype.save()
+        response = self.client.get(DISH_LIST_URL)
+        self.assertContains(response, "Soups")
+        self.assertEqual(self.dish_rows_stats(), {"hit": 1, "miss": 2})
+
+    def test_relation_change_invalidates_detail_fragment(self):
+        url = reverse("kitchen:dish-detail", args=[self.dish.id])
+        self.client.get(url)
+        cook = get_user_model().objects.create_user(
+            username="second_cook",
+            password="cook_test",
+        )
+        self.dish.cooks.add(cook)
+        self.assertContains(self.client.get(url), "second_cook")
+
+    def test_stats_command(self):
+        self.client.get(DISH_LIST_URL)
+        out = StringIO()
+        call_command("fragment_cache_stats", "--reset", stdout=out)
+        self.assertIn("dish_rows: 0 hits, 1 misses", out.getvalue())
+        self.assertEqual(self.dish_rows_stats(), {"hit": 0, "miss": 0})
+
+    @override_settings(KITCHEN_FRAGMENT_STATS_SAMPLE=0)
+    def test_stats_sampled(self):
+        self.client.get(DISH_LIST_URL)
+        self.assertEqual(self.dish_rows_stats(), {"hit": 0, "miss": 0})
+
+    def test_login_keeps_cook_fragments(self):
+        before = fragments.generations(["cook"])
+        self.client.login(username="cook", password="cook_test")
+        self.assertEqual(fragments.generations(["cook"]), before)
+        self.user.first_name = "Olena"
+        self.user.save()
+        self.assertNotEqual(fragments.generations(["cook"]), before)
+
+    def test_bumped_again_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dishtype.save()
+            # Another request renders the committed rows meanwhile
+            during = fragments.generations(["dishtype"])
+        self.assertNotEqual(fragments.generations(["dishtype"]), during)
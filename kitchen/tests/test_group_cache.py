@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+
+from kitchen import group_cache
+from kitchen.group_cache import get_user_group_names
+
+
+class GroupCacheTest(TestCase):
+    def setUp(self):
+        self.cook = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.manager = Group.objects.get(name="manager")
+        self.cook.groups.add(self.manager)
+
+    def fresh_cook(self):
+        return get_user_model().objects.get(pk=self.cook.pk)
+
+    def test_cached_across_requests(self):
+        self.assertEqual(get_user_group_names(self.fresh_cook()), ["manager"])
+        cook = self.fresh_cook()
+        with self.assertNumQueries(0):
+            get_user_group_names(cook)
+
+    def test_invalidated_on_membership_change(self):
+        get_user_group_names(self.fresh_cook())
+        trainee = Group.objects.get(name="trainee")
+        self.cook.groups.add(trainee)
+        self.assertEqual(
+            sorted(get_user_group_names(self.fresh_cook())),
+            ["manager", "trainee"],
+        )
+        trainee.user_set.remove(self.cook)
+        self.assertEqual(get_user_group_names(self.fresh_cook()), ["manager"])
+        self.manager.user_set.clear()
+        self.assertEqual(get_user_group_names(self.fresh_cook()), [])
+
+    def test_invalidated_on_group_rename(self):
+        get_user_group_names(self.fresh_cook())
+        self.manager.name = "chef"
+        self.manager.save()
+        self.assertEqual(get_user_group_names(self.fresh_cook()), ["chef"])
+
+    def test_invalidated_again_on_commit(self):
+        get_user_group_names(self.fresh_cook())
+        trainee = Group.objects.get(name="trainee")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cook.groups.add(trainee)
+            self.manager.name = "chef"
+            self.manager.save()
+            # Another request caches the committed groups meanwhile
+            group_cache.cache.set(
+                group_cache._user_key(self.cook.pk, group_cache._version()),
+                [(self.manager.pk, "manager")],
+            )
+        self.assertEqual(
+            sorted(get_user_group_names(self.fresh_cook())),
+            ["chef", "trainee"],
+        )
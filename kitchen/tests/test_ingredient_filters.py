@@ -0,0 +1,122 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen.ingredient_filters import (
+    filter_dishes,
+    resolve_names,
+    split_names,
+)
+from kitchen.models import DishType, Dish, Ingredient
+
+DISH_LIST_URL = reverse("kitchen:dish-list")
+DISH_API_URL = reverse("kitchen:api-dish-list")
+
+
+class IngredientFilterTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="waiter", password="waiter_test"
+        )
+        self.client.force_login(self.user)
+        dishtype = DishType.objects.create(name="Main")
+        self.nuts = Ingredient.objects.create(name="Walnuts")
+        self.shrimp = Ingredient.objects.create(name="shrimp")
+        self.truffle = Ingredient.objects.create(name="truffle")
+        self.dishes = {}
+        for name, ingredients in [
+            ("Pesto pasta", [self.nuts]),
+            ("Prawn risotto", [self.shrimp, self.truffle]),
+            ("Truffle fries", [self.truffle]),
+            ("Plain rice", []),
+        ]:
+            dish = Dish.objects.create(
+                name=name, description="test", price=10, dishtype=dishtype
+            )
+            dish.ingredients.add(*ingredients)
+            self.dishes[name] = dish
+
+    def names(self, response):
+        return sorted(dish.name for dish in response.context["dish_list"])
+
+    def test_filter_dishes(self):
+        dishes = filter_dishes(
+            Dish.objects.all(),
+            include=[{self.truffle.pk}],
+            exclude=[self.nuts.pk, self.shrimp.pk],
+        )
+        self.assertEqual([dish.name for dish in dishes], ["Truffle fries"])
+        self.assertFalse(filter_dishes(Dish.objects.all(), [set()]).exists())
+
+    def test_resolve_names_ignores_case(self):
+        self.assertEqual(
+            resolve_names(["walnuts", "caviar"]), [{self.nuts.pk}, set()]
+        )
+
+    def test_non_ascii_names_ignore_case(self):
+        apfel = Ingredient.objects.create(name="ÄPFEL")
+        self.assertEqual(
+            resolve_names(split_names("äpfel, Äpfel")), [{apfel.pk}]
+        )
+
+    def test_list_view(self):
+        response = self.client.get(
+            DISH_LIST_URL, {"without_ingredients": "walnuts, Shrimp"}
+        )
+        self.assertEqual(
+            self.names(response), ["Plain rice", "Truffle fries"]
+        )
+        response = self.client.get(
+            DISH_LIST_URL, {"with_ingredients": "truffle"}
+        )
+        self.assertEqual(
+            self.names(response), ["Prawn risotto", "Truffle fries"]
+        )
+
+    def test_unknown_ingredient(self):
+        response = self.client.get(
+            DISH_LIST_URL, {"with_ingredients": "caviar"}
+        )
+        self.assertEqual(self.names(response), [])
+        self.assertContains(response, "No dishes match this search.")
+        response = self.client.get(
+            DISH_LIST_URL, {"without_ingredients": "caviar"}
+        )
+        self.assertEqual(len(response.context["dish_list"]), 4)
+
+    @override_settings(KITCHEN_MENU_CARDS=True)
+    def test_list_view_with_menu_cards(self):
+        response = self.client.get(DISH_LIST_URL, {
+            "name": "r",
+            "with_ingredients": "truffle",
+            "without_ingredients": "shrimp",
+        })
+        self.assertEqual(self.names(response), ["Truffle fries"])
+
+    def test_api(self):
+        response = self.client.get(DISH_API_URL, {
+            "with_ingredients": f"{self.truffle.pk}",
+            "without_ingredients": f"{self.shrimp.pk},{self.nuts.pk}",
+        })
+        self.assertEqual(
+            [dish["name"] for dish in response.json()["results"]],
+            ["Truffle fries"],
+        )
+        response = self.client.get(
+            DISH_API_URL, {"without_ingredients": "nuts"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_link_table_is_indexed_both_ways(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, "kitchen_ingredient_dishes"
+            )
+        composite = {
+            tuple(constraint["columns"])
+            for constraint in constraints.values()
+            if constraint["index"] or constraint["unique"]
+        }
+        self.assertIn(("dish_id", "ingredient_id"), composite)
+        self.assertIn(("ingredient_id", "dish_id"), composite)
@@ -0,0 +1,174 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from kitchen import ingredient_sets
+from kitchen.ingredient_sets import IngredientSetIndex
+from kitchen.models import DishType, Dish, Ingredient
+
+
+def matched(matches):
+    return [(found.dish_id, sorted(found.missing)) for found in matches]
+
+
+class IngredientSetIndexTest(TestCase):
+    def test_match_and_near_match(self):
+        index = IngredientSetIndex([1, 2, 3], [10, 20, 30])
+        index.link(1, 10)
+        index.link(2, 10)
+        index.link(2, 20)
+        index.link(2, 30)
+
+        self.assertEqual(matched(index.match([10])), [(1, [])])
+        self.assertEqual(
+            matched(index.match([10, 20], max_missing=1)),
+            [(1, []), (2, [30])],
+        )
+        # Dish 3 has no ingredients and never matches
+        self.assertEqual(
+            matched(index.match([], max_missing=3)),
+            [(1, [10]), (2, [10, 20, 30])],
+        )
+
+    def test_incremental_changes(self):
+        index = IngredientSetIndex([1], [10])
+        index.link(1, 10)
+        index.link(4, 10)
+        index.unlink(1, 10)
+        index.link(1, 20)
+        self.assertEqual(matched(index.match([20])), [(1, [])])
+
+        index.drop_ingredient(20)
+        index.drop_dish(4)
+        self.assertEqual(matched(index.match([10])), [])
+
+    def test_widens_past_one_word(self):
+        ingredient_pks = list(range(1, 151))
+        index = IngredientSetIndex([1], ingredient_pks[:10])
+        for pk in ingredient_pks:
+            index.link(1, pk)
+        self.assertEqual(index.words.shape[1], 4)
+        self.assertEqual(matched(index.match(ingredient_pks)), [(1, [])])
+        self.assertEqual(
+            matched(index.match(ingredient_pks[:-1], max_missing=1)),
+            [(1, [150])],
+        )
+
+
+class IngredientSetSyncTest(TestCase):
+    def setUp(self):
+        self.soup = DishType.objects.create(name="Soup")
+        self.beet = Ingredient.objects.create(name="beetroot")
+        self.dill = Ingredient.objects.create(name="dill")
+        self.borscht = Dish.objects.create(
+            name="Borscht", description="test", price=10, dishtype=self.soup
+        )
+        self.borscht.ingredients.add(self.beet, self.dill)
+        ingredient_sets.invalidate()
+
+    def test_index_is_built_from_the_database(self):
+        self.assertEqual(
+            matched(ingredient_sets.match([self.beet.pk], max_missing=1)),
+            [(self.borscht.pk, [self.dill.pk])],
+        )
+
+    def test_committed_changes_patch_the_index(self):
+        ingredient_sets.match([])
+        index = ingredient_sets._index
+        with self.captureOnCommitCallbacks(execute=True):
+            okroshka = Dish.objects.create(
+                name="Okroshka", description="test", price=8,
+                dishtype=self.soup,
+            )
+            self.dill.dishes.add(okroshka)
+            self.borscht.ingredients.remove(self.beet)
+        self.assertEqual(
+            matched(ingredient_sets.match([self.dill.pk])),
+            [(self.borscht.pk, []), (okroshka.pk, [])],
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.borscht.ingredients.clear()
+            okroshka.delete()
+        self.assertEqual(matched(ingredient_sets.match([self.dill.pk])), [])
+        self.assertIs(ingredient_sets._index, index)
+
+    def test_changes_elsewhere_force_a_rebuild(self):
+        ingredient_sets.match([])
+        # Another process bumped the generation in between
+        ingredient_sets._bump()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beet.delete()
+        self.assertIsNone(ingredient_sets._index)
+        self.assertEqual(
+            matched(ingredient_sets.match([self.dill.pk])),
+            [(self.borscht.pk, [])],
+        )
+
+
+class StockMatchViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.client.force_login(self.user)
+        soup = DishType.objects.create(name="Soup")
+        self.beet = Ingredient.objects.create(name="beetroot")
+        self.dill = Ingredient.objects.create(name="dill")
+        self.borscht = Dish.objects.create(
+            name="Borscht", description="test", price=10, dishtype=soup
+        )
+        self.borscht.ingredients.add(self.beet, self.dill)
+        self.salad = Dish.objects.create(
+            name="Beet salad", description="test", price=6, dishtype=soup
+        )
+        self.salad.ingredients.add(self.beet)
+        ingredient_sets.invalidate()
+
+    def test_page_lists_makeable_and_nearly(self):
+        response = self.client.get(
+            reverse("kitchen:dish-stock-match"),
+            {"ingredients": "Beetroot, ", "max_missing": 1},
+        )
+        self.assertEqual(
+            [dish.name for dish, _missing in response.context["makeable"]],
+            ["Beet salad"],
+        )
+        self.assertEqual(
+            [(dish.name, missing)
+             for dish, missing in response.context["nearly"]],
+            [("Borscht", ["dill"])],
+        )
+        self.assertContains(response, "missing dill")
+
+    def test_page_without_query_shows_form(self):
+        response = self.client.get(reverse("kitchen:dish-stock-match"))
+        self.assertNotIn("makeable", response.context)
+        self.assertContains(response, 'name="ingredients"')
+        # Not a checkbox per ingredient
+        self.assertNotContains(response, 'type="checkbox"')
+
+    def test_page_rejects_unknown_ingredients(self):
+        response = self.client.get(
+            reverse("kitchen:dish-stock-match"),
+            {"ingredients": "beetroot, saffron", "max_missing": 1},
+        )
+        self.assertNotIn("makeable", response.context)
+        self.assertContains(response, "Unknown ingredients: saffron")
+
+    def test_api(self):
+        url = reverse("kitchen:api-dish-stock-match")
+        response = self.client.get(url, {
+            "ingredients": f"{self.beet.pk}",
+            "max_missing": 1,
+            "fields": "id,name",
+        })
+        self.assertEqual(response.json()["results"], [
+            {"id": self.salad.pk, "name": "Beet salad",
+             "missing_ingredients": []},
+            {"id": self.borscht.pk, "name": "Borscht",
+             "missing_ingredients": [self.dill.pk]},
+        ])
+
+        response = self.client.get(url, {"max_missing": 9})
+        self.assertEqual(response.status_code, 400)
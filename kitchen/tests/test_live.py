@@ -0,0 +1,242 @@
+import asyncio
+import json
+import threading
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen import assignment, live
+from kitchen.models import DishType, Dish, Ingredient
+from restaurant_kitchen_service.asgi import application
+
+EVENTS_URL = reverse("kitchen:live-events")
+
+
+class RecordingBroker(live.LocalBroker):
+    published = []
+
+    def publish(self, event):
+        self.published.append(event)
+        super().publish(event)
+
+
+class Stream:
+    """One event stream request driven through the ASGI application."""
+
+    def __init__(self, query, headers=()):
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": EVENTS_URL,
+            "raw_path": EVENTS_URL.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": list(headers),
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        self.status = None
+        self.body = b""
+        self.started = asyncio.Event()
+        self.received = asyncio.Event()
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.started.set()
+        else:
+            self.body += message.get("body", b"")
+            self.received.set()
+
+    def open(self):
+        return asyncio.ensure_future(
+            application(self.scope, self.receive, self.send)
+        )
+
+    async def until(self, text):
+        while text not in self.body:
+            self.received.clear()
+            await self.received.wait()
+
+
+@override_settings(
+    KITCHEN_LIVE_BROKER="kitchen.tests.test_live.RecordingBroker"
+)
+class PublishTest(TestCase):
+    def setUp(self):
+        RecordingBroker.published.clear()
+        self.cook = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.cook.groups.add(Group.objects.get(name="employee"))
+        self.dishtype = DishType.objects.create(name="Soup")
+
+    def topics(self):
+        return [event["topic"] for event in RecordingBroker.published]
+
+    def test_changes_are_published_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            dish = Dish.objects.create(
+                name="Borscht", description="test", price=10,
+                dishtype=self.dishtype,
+            )
+            self.assertEqual(RecordingBroker.published, [])
+        for callback in callbacks:
+            callback()
+        self.assertEqual(RecordingBroker.published, [
+            {"topic": "dish", "ids": [dish.pk], "dishes": [dish.pk]},
+        ])
+
+        RecordingBroker.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            dish.cooks.add(self.cook)
+            salt = Ingredient.objects.create(name="Salt")
+            salt.dishes.add(dish)
+        self.assertEqual(RecordingBroker.published, [
+            {"topic": "assignment", "ids": [self.cook.pk],
+             "dishes": [dish.pk]},
+            {"topic": "ingredient", "ids": [salt.pk], "dishes": []},
+            {"topic": "ingredient", "ids": [salt.pk], "dishes": [dish.pk]},
+        ])
+
+    def test_bulk_assignment_is_published_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            dishes = [
+                Dish.objects.create(
+                    name=f"Dish {num}", description="test", price=10,
+                    dishtype=self.dishtype,
+                )
+                for num in range(3)
+            ]
+        RecordingBroker.published.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.apply(assignment.plan(
+                cooks=assignment.eligible_cooks(["employee"])
+            ))
+        self.assertEqual(self.topics(), ["assignment"])
+        self.assertEqual(
+            RecordingBroker.published[0]["dishes"],
+            sorted(dish.pk for dish in dishes),
+        )
+
+
+class SubscriptionTest(TestCase):
+    async def test_filters_by_topic_and_dish(self):
+        broker = live.LocalBroker()
+        detail = broker.subscribe(["dish", "ingredient"], [1])
+        broker.deliver(live.make_event("dish", [2], [2]))
+        broker.deliver(live.make_event("assignment", [5], [1]))
+        broker.deliver(live.make_event("ingredient", [7]))
+        broker.deliver(live.make_event("dish", [1], [1]))
+        first = await detail.get(1)
+        second = await detail.get(1)
+        self.assertEqual(
+            (first["topic"], first["ids"]), ("ingredient", [7])
+        )
+        self.assertEqual((second["topic"], second["dishes"]), ("dish", [1]))
+        self.assertTrue(detail.queue.empty())
+        broker.unsubscribe(detail)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    async def test_a_slow_stream_gets_a_reload(self):
+        broker = live.LocalBroker()
+        subscription = broker.subscribe()
+        for pk in range(live.QUEUE_SIZE + 5):
+            broker.deliver(live.make_event("dish", [pk], [pk]))
+        await asyncio.sleep(0)
+        events = []
+        while not subscription.queue.empty():
+            events.append(await subscription.get(1))
+        self.assertEqual(events[0]["topic"], "reload")
+        self.assertLess(len(events), live.QUEUE_SIZE)
+
+
+class StreamTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.token = live.make_token(self.user)
+
+    def test_token_view(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("kitchen:live-token"))
+        data = response.json()
+        self.assertEqual(data["url"], EVENTS_URL)
+        self.assertEqual(live.read_token(data["token"]), self.user.pk)
+        self.assertIn("no-store", response["Cache-Control"])
+
+    def test_fallback_outside_the_router(self):
+        response = self.client.get(EVENTS_URL)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertContains(response, f"retry: {live.FALLBACK_RETRY_MS}")
+
+    async def test_rejects_bad_tokens(self):
+        stream = Stream("token=forged")
+        await asyncio.wait_for(stream.open(), 5)
+        self.assertEqual(stream.status, 403)
+
+    async def test_streams_events_until_disconnect(self):
+        stream = Stream(
+            f"token={self.token}&topics=dish,assignment&dish=3",
+            headers=[(b"last-event-id", b"12")],
+        )
+        task = stream.open()
+        await asyncio.wait_for(stream.started.wait(), 5)
+        self.assertEqual(stream.status, 200)
+        await asyncio.wait_for(stream.until(b"retry: "), 5)
+        # A reconnecting screen may have missed events
+        self.assertIn(b"event: reload", stream.body)
+
+        broker = live.get_broker()
+        broker.deliver(live.make_event("ingredient", [1]))
+        broker.deliver(live.make_event("dish", [3], [3]))
+        await asyncio.wait_for(stream.until(b"event: dish"), 5)
+        self.assertNotIn(b"event: ingredient", stream.body)
+        event = stream.body.split(b"event: dish\n")[1]
+        self.assertEqual(
+            json.loads(event.split(b"data: ")[1].split(b"\n")[0]),
+            {"topic": "dish", "ids": [3], "dishes": [3]},
+        )
+
+        stream.disconnected.set()
+        await asyncio.wait_for(task, 5)
+        self.assertEqual(broker.subscriber_count(), 0)
+
+    @override_settings(KITCHEN_LIVE_STREAM_MAX_AGE=0.2)
+    async def test_streams_end_when_their_token_expires(self):
+        stream = Stream(f"token={self.token}")
+        await asyncio.wait_for(stream.open(), 5)
+        self.assertEqual(stream.status, 200)
+        self.assertEqual(live.get_broker().subscriber_count(), 0)
+
+    async def test_idle_streams_hold_no_threads(self):
+        threads = threading.active_count()
+        streams = [Stream(f"token={self.token}") for _ in range(2000)]
+        tasks = [stream.open() for stream in streams]
+        await asyncio.wait_for(asyncio.gather(*(
+            stream.started.wait() for stream in streams
+        )), 30)
+        broker = live.get_broker()
+        self.assertEqual(broker.subscriber_count(), 2000)
+        self.assertLessEqual(threading.active_count(), threads + 1)
+
+        broker.deliver(live.make_event("dishtype", [1]))
+        await asyncio.wait_for(asyncio.gather(*(
+            stream.until(b"event: dishtype") for stream in streams
+        )), 30)
+
+        for stream in streams:
+            stream.disconnected.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), 30)
+        self.assertEqual(broker.subscriber_count(), 0)
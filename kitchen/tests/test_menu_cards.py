@@ -0,0 +1,146 @@
+import io
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kitchen.menu_import import MenuImporter, read_rows
+from kitchen.models import DishType, Dish, Ingredient, MenuCard
+
+
+class MenuCardSyncTest(TestCase):
+    def setUp(self):
+        self.cook = get_user_model().objects.create_user(
+            username="anna", password="anna_test"
+        )
+        self.soup = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=self.soup,
+        )
+        self.beetroot = Ingredient.objects.create(name="beetroot")
+
+    def card(self):
+        return MenuCard.objects.get(pk=self.dish.pk)
+
+    def test_card_follows_dish_and_relations(self):
+        card = self.card()
+        self.assertEqual(
+            (card.name, card.dishtype_name, card.ingredient_names,
+             card.cook_usernames),
+            ("Borscht", "Soup", [], []),
+        )
+
+        self.dish.cooks.add(self.cook)
+        self.beetroot.dishes.add(self.dish)
+        card = self.card()
+        self.assertEqual(card.cook_ids, [self.cook.pk])
+        self.assertEqual(card.cook_usernames, ["anna"])
+        self.assertEqual(card.ingredient_names, ["beetroot"])
+
+        self.dish.ingredients.remove(self.beetroot)
+        self.cook.dishes.clear()
+        card = self.card()
+        self.assertEqual((card.ingredient_names, card.cook_ids), ([], []))
+
+        self.dish.price = 12
+        self.dish.save()
+        self.assertEqual(self.card().price, 12)
+
+    def test_renames_and_deletes_reach_cards(self):
+        self.dish.cooks.add(self.cook)
+        self.dish.ingredients.add(self.beetroot)
+
+        self.soup.name = "Cold soup"
+        self.soup.save()
+        self.beetroot.name = "beet"
+        self.beetroot.save()
+        self.cook.username = "anna_k"
+        self.cook.save()
+        card = self.card()
+        self.assertEqual(card.dishtype_name, "Cold soup")
+        self.assertEqual(card.ingredient_names, ["beet"])
+        self.assertEqual(card.cook_usernames, ["anna_k"])
+
+        self.beetroot.delete()
+        self.cook.delete()
+        card = self.card()
+        self.assertEqual((card.ingredient_names, card.cook_ids), ([], []))
+
+        self.dish.delete()
+        self.assertFalse(MenuCard.objects.exists())
+
+    def test_login_does_not_refresh_cards(self):
+        self.dish.cooks.add(self.cook)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.login(username="anna", password="anna_test")
+        self.assertFalse(
+            any("kitchen_menucard" in query["sql"] for query in queries)
+        )
+
+    def test_import_writes_cards(self):
+        MenuImporter().run(read_rows(io.StringIO(
+            "name,description,price,dish_type,ingredients,cooks\n"
+            "Pelmeni,Dumplings,11,Main,flour;beef,anna\n"
+        ), "csv"))
+        card = MenuCard.objects.get(name="Pelmeni")
+        self.assertEqual(card.ingredient_names, ["beef", "flour"])
+        self.assertEqual(card.cook_usernames, ["anna"])
+
+    def test_rebuild_command(self):
+        MenuCard.objects.all().delete()
+        call_command("rebuild_menu_cards", stdout=StringIO())
+        self.assertEqual(self.card().name, "Borscht")
+
+
+@override_settings(KITCHEN_MENU_CARDS=True)
+class MenuCardViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="employee", password="employee_test"
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+        soup = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Borscht",
+            description="description dish test",
+            price=10,
+            dishtype=soup,
+        )
+        self.dish.cooks.add(self.user)
+        self.dish.ingredients.add(Ingredient.objects.create(name="dill"))
+
+    def test_list_reads_cards(self):
+        response = self.client.get(reverse("kitchen:dish-list"))
+        self.assertIsInstance(response.context["dish_list"][0], MenuCard)
+        self.assertContains(response, "Borscht")
+        self.assertContains(response, "Soup")
+
+        response = self.client.get(
+            reverse("kitchen:dish-list"), {"name": "bors"}
+        )
+        self.assertEqual(len(response.context["dish_list"]), 1)
+
+    def test_detail_reads_one_card(self):
+        url = reverse("kitchen:dish-detail", args=[self.dish.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertIsInstance(response.context["dish"], MenuCard)
+        self.assertContains(response, "dill")
+        self.assertContains(response, "Remove me from this dish")
+        kitchen_tables = {
+            table for query in queries for table in (
+                "kitchen_dish", "kitchen_dishtype", "kitchen_ingredient",
+                "kitchen_dish_cooks", "kitchen_ingredient_dishes",
+            )
+            if f'"{table}"' in query["sql"]
+        }
+        self.assertEqual(kitchen_tables, set())
@@ -0,0 +1,126 @@
+import csv
+import io
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kitchen import menu_export
+from kitchen.menu_import import MenuImporter, read_rows
+from kitchen.models import DishType, Dish, Ingredient
+
+
+class MenuExportTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="manager", password="manager_test"
+        )
+        self.user.groups.add(Group.objects.get(name="manager"))
+        self.client.force_login(self.user)
+
+        dishtype = DishType.objects.create(name="Soup")
+        salt = Ingredient.objects.create(name="salt")
+        for num in range(5):
+            dish = Dish.objects.create(
+                name=f"Soup {num}",
+                description="description, with comma",
+                price=num + 0.5,
+                dishtype=dishtype,
+            )
+            dish.cooks.add(self.user)
+            dish.ingredients.add(
+                salt, Ingredient.objects.create(name=f"herb {num}")
+            )
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_dish_csv_export(self):
+        response = self.client.get(reverse("kitchen:dish-export"))
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0], {
+            "name": "Soup 0",
+            "description": "description, with comma",
+            "price": "0.50",
+            "dish_type": "Soup",
+            "ingredients": "herb 0;salt",
+            "cooks": "manager",
+        })
+
+    def test_dish_export_imports_back(self):
+        text = self.read(self.client.get(reverse("kitchen:dish-export")))
+        Dish.objects.all().delete()
+        report = MenuImporter().run(read_rows(io.StringIO(text), "csv"))
+        self.assertEqual((report.created, report.error_count), (5, 0))
+        self.assertEqual(
+            set(Dish.objects.get(name="Soup 3").ingredients.values_list(
+                "name", flat=True
+            )),
+            {"herb 3", "salt"},
+        )
+
+    def test_separator_in_names_survives_a_round_trip(self):
+        dish = Dish.objects.get(name="Soup 0")
+        dish.ingredients.add(
+            Ingredient.objects.create(name="salt; pepper"),
+            Ingredient.objects.create(name="back\\slash"),
+        )
+        text = self.read(self.client.get(reverse("kitchen:dish-export")))
+        self.assertIn("back\\\\slash;herb 0;salt;salt\\; pepper", text)
+        Dish.objects.all().delete()
+        report = MenuImporter().run(read_rows(io.StringIO(text), "csv"))
+        self.assertEqual(report.error_count, 0)
+        self.assertEqual(
+            set(Dish.objects.get(name="Soup 0").ingredients.values_list(
+                "name", flat=True
+            )),
+            {"herb 0", "salt", "salt; pepper", "back\\slash"},
+        )
+
+    def test_cook_jsonl_export(self):
+        response = self.client.get(
+            reverse("kitchen:cook-export"), {"format": "jsonl"}
+        )
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(rows[0]["username"], "manager")
+        self.assertEqual(rows[0]["groups"], ["manager"])
+        self.assertEqual(len(rows[0]["dishes"]), 5)
+
+    def test_cook_export_requires_manager(self):
+        self.user.groups.set([Group.objects.get(name="employee")])
+        response = self.client.get(reverse("kitchen:cook-export"))
+        self.assertNotEqual(response.status_code, 200)
+
+    def test_unknown_format(self):
+        response = self.client.get(
+            reverse("kitchen:dish-export"), {"format": "xml"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_prefetches_once_per_chunk(self):
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(menu_export.stream("dishes", "csv", chunk_size=2))
+        # Header, then 3 chunks of 2, 2 and 1 dishes
+        self.assertEqual(len(chunks), 4)
+        dish_queries = [
+            query for query in queries
+            if 'FROM "kitchen_dish"' in query["sql"]
+        ]
+        # One dish query plus two prefetches for each of the 3 chunks
+        self.assertEqual(len(queries) - len(dish_queries), 6)
+        self.assertEqual(len(dish_queries), 1)
+
+    def test_command_writes_stdout(self):
+        out = StringIO()
+        call_command("export_menu", "dishes", format="jsonl", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
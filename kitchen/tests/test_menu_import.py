@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kitchen import counters
+from kitchen.menu_import import MenuImporter, read_rows
+from kitchen.models import DishType, Dish, Ingredient
+
+HEADER = "name,description,price,dish_type,ingredients,cooks\n"
+
+
+def import_text(text, file_format="csv", **options):
+    return MenuImporter(**options).run(
+        read_rows(io.StringIO(text), file_format)
+    )
+
+
+class MenuImportTest(TestCase):
+    def setUp(self):
+        self.anna = get_user_model().objects.create_user(
+            username="anna", password="anna_test"
+        )
+        self.ben = get_user_model().objects.create_user(
+            username="ben", password="ben_test"
+        )
+
+    def test_csv_creates_dishes_types_and_links(self):
+        report = import_text(
+            HEADER
+            + "Borscht,Beetroot soup,8.50,Soup,beetroot;potato;dill,anna;ben\n"
+            + "Pelmeni,Dumplings,11,Main,flour;beef,anna\n"
+        )
+        self.assertEqual((report.created, report.updated), (2, 0))
+        self.assertEqual(report.errors, [])
+
+        borscht = Dish.objects.get(name="Borscht")
+        self.assertEqual(borscht.dishtype.name, "Soup")
+        self.assertEqual(str(borscht.price), "8.50")
+        self.assertEqual(
+            set(borscht.ingredients.values_list("name", flat=True)),
+            {"beetroot", "potato", "dill"},
+        )
+        self.assertEqual(set(borscht.cooks.all()), {self.anna, self.ben})
+        self.assertEqual(DishType.objects.count(), 2)
+        self.assertEqual(counters.get_counts()["ingredients"], 5)
+
+    def test_jsonl_updates_existing_dish(self):
+        import_text(HEADER + "Borscht,Soup,8,Soup,beetroot;dill,anna\n")
+        report = import_text(
+            json.dumps({
+                "name": "Borscht",
+                "description": "Beetroot soup",
+                "price": 9.5,
+                "dish_type": "Soup",
+                "ingredients": ["beetroot", "cabbage"],
+                "cooks": ["ben"],
+            }) + "\n",
+            file_format="jsonl",
+        )
+        self.assertEqual((report.created, report.updated), (0, 1))
+        borscht = Dish.objects.get(name="Borscht")
+        self.assertEqual(str(borscht.price), "9.50")
+        self.assertEqual(borscht.description, "Beetroot soup")
+        self.assertEqual(
+            set(borscht.ingredients.values_list("name", flat=True)),
+            {"beetroot", "cabbage"},
+        )
+        self.assertEqual(list(borscht.cooks.all()), [self.ben])
+
+    def test_merge_keeps_existing_links(self):
+        import_text(HEADER + "Borscht,Soup,8,Soup,beetroot,anna\n")
+        import_text(HEADER + "Borscht,Soup,8,Soup,dill,ben\n", merge=True)
+        borscht = Dish.objects.get(name="Borscht")
+        self.assertEqual(
+            set(borscht.ingredients.values_list("name", flat=True)),
+            {"beetroot", "dill"},
+        )
+        self.assertEqual(set(borscht.cooks.all()), {self.anna, self.ben})
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = import_text(
+            HEADER
+            + "Borscht,Soup,cheap,Soup,,\n"
+            + "Pelmeni,Dumplings,11,Main,,nobody\n"
+            + ",Nameless,1,Main,,\n"
+            + "Okroshka,Cold soup,7,Soup,,\n",
+        )
+        self.assertEqual(report.created, 1)
+        self.assertEqual([line for line, _ in report.errors], [2, 3, 4])
+        self.assertIn("price", report.errors[0][1])
+        self.assertIn("nobody", report.errors[1][1])
+        self.assertEqual(
+            list(Dish.objects.values_list("name", flat=True)), ["Okroshka"]
+        )
+
+    def test_query_count_does_not_grow_with_rows(self):
+        def rows(count, prefix):
+            return HEADER + "".join(
+                f"{prefix} dish {num},Food,{num},{prefix} type {num % 3},"
+                f"{prefix} salt;{prefix} ingredient {num},anna\n"
+                for num in range(count)
+            )
+
+        def queries(text):
+            with CaptureQueriesContext(connection) as captured:
+                import_text(text, batch_size=100)
+            return len(captured)
+
+        self.assertEqual(queries(rows(10, "a")), queries(rows(80, "b")))
+
+    def test_command_reads_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "menu.jsonl")
+            with open(path, "w") as file:
+                file.write(json.dumps({
+                    "name": "Borscht",
+                    "price": "8",
+                    "dish_type": "Soup",
+                }) + "\n")
+            out = StringIO()
+            call_command("import_menu", path, stdout=out)
+        self.assertIn("1 dishes created", out.getvalue())
+        self.assertTrue(Dish.objects.filter(name="Borscht").exists())
+
+
+class DishImportViewTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.client.force_login(self.user)
+
+    def upload(self, name="menu.csv"):
+        return self.client.post(reverse("kitchen:dish-import"), {
+            "file": SimpleUploadedFile(
+                name, (HEADER + "Borscht,Soup,8,Soup,beetroot,\n").encode()
+            ),
+        })
+
+    def test_import_requires_manager(self):
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.upload()
+        self.assertFalse(Dish.objects.exists())
+
+    def test_manager_uploads_menu(self):
+        self.user.groups.add(Group.objects.get(name="manager"))
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["report"].created, 1)
+        self.assertTrue(Ingredient.objects.filter(name="beetroot").exists())
+
+    def test_reports_dishes_imported_before_a_csv_error(self):
+        self.user.groups.add(Group.objects.get(name="manager"))
+        rows = "".join(f"Dish {num},,1,Soup,,\n" for num in range(500))
+        too_long = "x" * (csv.field_size_limit() + 1)
+        response = self.client.post(reverse("kitchen:dish-import"), {
+            "file": SimpleUploadedFile(
+                "menu.csv",
+                (HEADER + rows + f"{too_long},,1,Soup,,\n").encode(),
+            ),
+        })
+        self.assertEqual(response.status_code, 200)
+        error = response.context["form"].errors["file"][0]
+        self.assertIn("The file is not valid CSV", error)
+        self.assertIn("The 500 dishes read before the error were imported",
+                      error)
+        self.assertEqual(Dish.objects.count(), 500)
+        self.assertEqual(counters.get_counts()["dishes"], 500)
@@ -0,0 +1,174 @@
+import multiprocessing
+import re
+import tempfile
+from io import StringIO
+
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen import metrics
+from kitchen.middleware import MetricsMiddleware
+from kitchen.models import DishType, Dish
+
+METRICS_URL = reverse("kitchen:metrics")
+
+
+def sample(text, name, **labels):
+    """The value of the ``name`` series with exactly ``labels``."""
+    le = labels.pop("le", None)
+    pairs = sorted(labels.items()) + ([("le", le)] if le else [])
+    wanted = ",".join(f'{label}="{value}"' for label, value in pairs)
+    pattern = re.escape(f"{name}{{{wanted}}}" if wanted else name)
+    found = re.search(rf"^{pattern} (\S+)$", text, re.MULTILINE)
+    return float(found.group(1)) if found else None
+
+
+def add_in_child(directory):
+    with override_settings(KITCHEN_METRICS_DIR=directory):
+        store = metrics.get_store()
+        store.add("child", 2)
+        store.add("shared", 1)
+
+
+class MetricsTest(TestCase):
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.directory = directory
+        self.enterContext(override_settings(
+            KITCHEN_METRICS_DIR=directory,
+            KITCHEN_METRICS_TOKEN="scrape-secret",
+        ))
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+        dishtype = DishType.objects.create(name="Soup")
+        Dish.objects.create(
+            name="Borscht", description="test", price=10, dishtype=dishtype
+        )
+
+    def scrape(self):
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_records_requests_per_url_name(self):
+        self.client.get(reverse("kitchen:dish-list"))
+        self.client.get(reverse("kitchen:dish-list"))
+        self.client.get(reverse("kitchen:dish-detail", args=[0]))
+        text = self.scrape()
+
+        route = {"url_name": "kitchen:dish-list"}
+        self.assertEqual(sample(
+            text, "kitchen_http_requests_total",
+            method="GET", status="200", **route,
+        ), 2)
+        self.assertEqual(sample(
+            text, "kitchen_http_requests_total",
+            method="GET", status="404", url_name="kitchen:dish-detail",
+        ), 1)
+        self.assertEqual(sample(
+            text, "kitchen_http_request_duration_seconds_bucket",
+            le="+Inf", method="GET", **route,
+        ), 2)
+        self.assertEqual(sample(
+            text, "kitchen_template_render_seconds_count", **route
+        ), 2)
+        self.assertEqual(sample(
+            text, "kitchen_db_queries_per_request_bucket", le="0", **route
+        ), 0)
+        self.assertGreater(sample(
+            text, "kitchen_db_query_seconds_total", **route
+        ), 0)
+
+    def test_histogram_buckets_are_cumulative(self):
+        store = metrics.get_store()
+        labels = {"url_name": "kitchen:index"}
+        for queries in (1, 3, 3, 500):
+            metrics._observe(
+                store, "kitchen_db_queries_per_request", labels, queries
+            )
+        text = metrics.exposition()
+        counts = [
+            sample(
+                text, "kitchen_db_queries_per_request_bucket",
+                le=le, **labels,
+            )
+            for le in ("0", "1", "2", "5", "100", "+Inf")
+        ]
+        self.assertEqual(counts, [0, 1, 1, 3, 3, 4])
+        self.assertEqual(sample(
+            text, "kitchen_db_queries_per_request_sum", **labels
+        ), 507)
+
+    async def test_counts_queries_of_async_views(self):
+        await self.async_client.aforce_login(self.user)
+        await self.async_client.get(reverse("kitchen:async-dish-list"))
+        text = metrics.exposition()
+        self.assertEqual(sample(
+            text, "kitchen_db_queries_per_request_bucket",
+            le="0", url_name="kitchen:async-dish-list",
+        ), 0)
+        self.assertEqual(sample(
+            text, "kitchen_template_render_seconds_count",
+            url_name="kitchen:async-dish-list",
+        ), 1)
+
+    def test_async_mode_stays_on_the_event_loop(self):
+        async def get_response(request):
+            pass
+
+        middleware = MetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(
+            iscoroutinefunction(middleware.process_template_response)
+        )
+
+    def test_adds_up_the_files_of_every_worker(self):
+        store = metrics.get_store()
+        store.add("shared", 1)
+        child = multiprocessing.get_context("fork").Process(
+            target=add_in_child, args=(store.directory,)
+        )
+        child.start()
+        child.join(10)
+        self.assertEqual(child.exitcode, 0)
+        store.add("shared", 1)
+        self.assertEqual(store.collect(), {"shared": 3, "child": 2})
+
+    def test_file_grows_past_its_initial_size(self):
+        store = metrics.get_store()
+        for num in range(3000):
+            store.add(f"key {num}", num)
+        self.assertGreater(len(store.map), store.initial_size)
+        values = store.collect()
+        self.assertEqual(len(values), 3000)
+        self.assertEqual(values["key 2999"], 2999)
+
+    def test_token(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        response = self.client.get(
+            METRICS_URL, HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_open_without_token_only_in_debug(self):
+        with override_settings(KITCHEN_METRICS_TOKEN=None):
+            self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+            with override_settings(DEBUG=True):
+                response = self.client.get(METRICS_URL)
+                self.assertEqual(response.status_code, 200)
+
+    def test_clear_metrics_command(self):
+        metrics.get_store().add("stale", 1)
+        out = StringIO()
+        call_command("clear_metrics", stdout=out)
+        self.assertIn("Deleted 1 metrics files", out.getvalue())
+        self.assertEqual(metrics.FileStore(self.directory).collect(), {})
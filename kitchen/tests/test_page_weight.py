@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.template import Context, Template, TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from kitchen import benchmark, page_weight
+from kitchen.models import Dish, DishType
+from kitchen.urls import urlpatterns
+
+
+class SlimLayoutTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+
+    def test_nothing_blocks_the_first_paint(self):
+        response = self.client.get(reverse("kitchen:dish-list"))
+        self.assertTemplateUsed(response, "layouts/kitchen.html")
+        html = response.content.decode()
+        self.assertNotIn("preloader", html)
+        self.assertNotIn("all.min.css", html)
+        self.assertIn(".navbar-main {", html)
+        self.assertIn('rel="preload"', html)
+
+        parser = page_weight.PageParser()
+        parser.feed(html)
+        self.assertEqual(parser.blocking, [])
+        self.assertIn("/static/css/pixel.css", parser.deferred)
+
+    def test_critical_rules_let_menus_open(self):
+        # pixel.css shows dropdowns and collapses with .show, an inlined
+        # !important display: none would keep them closed for good
+        html = self.client.get(reverse("kitchen:dish-list")).content.decode()
+        self.assertIn(".dropdown-menu { display: none; }", html)
+        for line in html.splitlines():
+            if "!important" in line:
+                self.assertNotIn(".dropdown-menu", line)
+                self.assertNotIn(".collapse", line)
+
+    def test_icons_are_inline(self):
+        html = self.client.get(reverse("kitchen:index")).content.decode()
+        self.assertNotIn("fa-", html)
+        self.assertIn('<svg class="text-tertiary" viewBox="0 0 576 512"', html)
+
+    def test_full_layout_for_comparison(self):
+        with override_settings(
+            TEMPLATES=page_weight.template_settings("full")
+        ):
+            response = self.client.get(reverse("kitchen:dish-list"))
+        html = response.content.decode()
+        self.assertIn("preloader", html)
+        self.assertIn("all.min.css", html)
+        self.assertIn("Dishes", html)
+
+
+class IconTest(SimpleTestCase):
+    def test_unknown_icon(self):
+        template = Template('{% load icons %}{% icon "no-such-icon" %}')
+        with self.assertRaises(TemplateSyntaxError):
+            template.render(Context())
+
+    def test_attributes_are_escaped(self):
+        html = Template(
+            '{% load icons %}{% icon "github" "brands" class=extra %}'
+        ).render(Context({"extra": 'me-2" onload="x'}))
+        self.assertIn('class="me-2&quot; onload=&quot;x"', html)
+        self.assertIn('viewBox="0 0 496 512"', html)
+
+
+class PageParserTest(SimpleTestCase):
+    def test_blocking_and_deferred(self):
+        parser = page_weight.PageParser()
+        parser.feed(
+            '<link rel="stylesheet" href="/static/a.css">'
+            '<link rel="stylesheet" href="/static/p.css" media="print">'
+            '<link rel="preload" href="/static/b.css" as="style">'
+            '<noscript><link rel="stylesheet" href="/static/b.css">'
+            "</noscript>"
+            '<script src="/static/c.js"></script>'
+            '<script src="/static/d.js" defer></script>'
+            "<style> body { margin: 0; } </style>"
+        )
+        self.assertEqual(parser.blocking, ["/static/a.css", "/static/c.js"])
+        self.assertEqual(parser.deferred, ["/static/b.css", "/static/d.js"])
+        self.assertEqual(parser.inline_css, len("body { margin: 0; }"))
+
+
+class BenchmarkPagesTest(TransactionTestCase):
+    def setUp(self):
+        Dish.objects.create(
+            name="Borscht", description="test", price=10,
+            dishtype=DishType.objects.create(name="Soup"),
+        )
+
+    def test_pages_only(self):
+        routes = {
+            probe.route for probe in page_weight.page_probes(
+                urlpatterns, benchmark.pick_objects()
+            )
+        }
+        self.assertIn("dish-list", routes)
+        self.assertNotIn("async-dish-list", routes)
+        self.assertNotIn("api-dish-list", routes)
+
+    def test_command_compares_layouts(self):
+        out = StringIO()
+        call_command(
+            "benchmark_pages",
+            routes=["dish-list", "live-events", "metrics"],
+            requests=2,
+            warmup=0,
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        rows = [line.split() for line in lines[1:3]]
+        self.assertEqual(
+            [row[:2] for row in rows],
+            [["dish-list", "full"], ["dish-list", "slim"]],
+        )
+        # Eleven stylesheets and scripts block the full layout
+        self.assertEqual([row[3] for row in rows], ["11", "0"])
+        self.assertLess(float(rows[1][4]), float(rows[0][4]))
+        # The stream and the metrics are not pages
+        self.assertNotIn("live-events", out.getvalue())
+        self.assertNotIn("metrics ", out.getvalue())
@@ -0,0 +1,109 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, RequestFactory
+from django.urls import reverse
+
+from kitchen.models import DishType
+from kitchen.pagination import CursorPaginator, InvalidCursor, encode_cursor
+from kitchen.templatetags.query_transform import query_transform
+from kitchen.views import DishTypeListView
+
+DISH_TYPE_LIST_URL = reverse("kitchen:dish-type-list")
+TAMPERED_CURSORS = {
+    "kitchen:dish-list": [
+        [{"a": 1}, 1],
+        ["x", "notint"],
+        ["x", None],
+        [None, None],
+    ],
+    "kitchen:cook-list": [["a", "abc"]],
+}
+
+
+class CursorPaginatorTest(TestCase):
+    def setUp(self):
+        for num in range(12):
+            DishType.objects.create(name=f"Dishtype {num:02}")
+        self.paginator = CursorPaginator(DishType.objects.all(), 5)
+
+    def test_walk_forward_and_back(self):
+        first = self.paginator.page()
+        self.assertFalse(first.has_previous())
+        self.assertTrue(first.has_next())
+
+        second = self.paginator.page(first.next_cursor)
+        third = self.paginator.page(second.next_cursor)
+        self.assertEqual(
+            [dishtype.name for dishtype in third],
+            ["Dishtype 10", "Dishtype 11"],
+        )
+        self.assertFalse(third.has_next())
+
+        back = self.paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        self.assertTrue(back.has_previous())
+        self.assertEqual(
+            list(self.paginator.page(back.previous_cursor)), list(first)
+        )
+
+    def test_invalid_cursor(self):
+        with self.assertRaises(InvalidCursor):
+            self.paginator.page("not-a-cursor")
+
+    def test_no_count_or_offset_queries(self):
+        cursor = self.paginator.page().next_cursor
+        with self.assertNumQueries(1) as queries:
+            self.paginator.page(cursor)
+        sql = queries.captured_queries[0]["sql"]
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT", sql)
+
+
+class CursorPaginationViewTest(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            username="cook",
+            password="cook_test",
+        )
+        self.client.force_login(user)
+        for num in range(7):
+            DishType.objects.create(name=f"Dishtype {num}")
+
+    def test_list_view_uses_cursor_links(self):
+        response = self.client.get(DISH_TYPE_LIST_URL)
+        next_cursor = response.context["page_obj"].next_cursor
+        self.assertContains(response, f"?cursor={next_cursor}")
+
+        response = self.client.get(DISH_TYPE_LIST_URL, {"cursor": next_cursor})
+        self.assertEqual(len(response.context["dishtype_list"]), 2)
+
+        response = self.client.get(DISH_TYPE_LIST_URL, {"cursor": "broken"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_values(self):
+        for url_name, cursors in TAMPERED_CURSORS.items():
+            api_name = url_name.replace(":", ":api-")
+            for values in cursors:
+                cursor = encode_cursor(values, "next")
+                with self.subTest(url_name, values=values):
+                    response = self.client.get(
+                        reverse(url_name), {"cursor": cursor}
+                    )
+                    self.assertEqual(response.status_code, 404)
+                    response = self.client.get(
+                        reverse(api_name), {"cursor": cursor}
+                    )
+                    self.assertEqual(response.status_code, 400)
+
+    def test_offset_mode_switch(self):
+        view = DishTypeListView.as_view(pagination_mode="offset")
+        request = RequestFactory().get(DISH_TYPE_LIST_URL, {"page": 2})
+        request.user = get_user_model().objects.get(username="cook")
+        response = view(request)
+        self.assertEqual(response.context_data["page_obj"].number, 2)
+        self.assertEqual(len(response.context_data["dishtype_list"]), 2)
+
+    def test_query_transform_drops_other_pagination_param(self):
+        request = RequestFactory().get("/", {"page": 3, "name": "soup"})
+        self.assertEqual(
+            query_transform(request, cursor="abc"), "name=soup&cursor=abc"
+        )
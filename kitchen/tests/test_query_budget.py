@@ -0,0 +1,186 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from kitchen.models import DishType, Dish, Ingredient
+from kitchen.urls import urlpatterns
+
+ROLES = ["superuser", "manager", "employee", "trainee"]
+
+# Routes that change data are only walked with GET, apart from these
+# POST flows that leave the fixtures in place
+POST_FLOWS = {
+    "dish-add": {},
+    "dish-remove": {},
+    "dish-update-ingredient": {"action": "add"},
+}
+
+# The fragment cache would hide N+1 queries in template blocks it skips
+NO_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+
+# A timed visit flush would land in whichever walk its interval ends
+@override_settings(CACHES=NO_CACHE, KITCHEN_VISIT_FLUSH_SECONDS=3600)
+class QueryBudgetTest(TestCase):
+    """
+    Every kitchen route must run the same number of queries whether its
+    objects have a handful of relations or many times more.
+    """
+    small = 3
+    large = 30
+    report = []
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.password = make_password("budget_pass")
+        cls.users = {}
+        for role in ROLES:
+            user = get_user_model().objects.create(
+                username=f"budget_{role}",
+                password=cls.password,
+                is_superuser=role == "superuser",
+                is_staff=role == "superuser",
+            )
+            if role != "superuser":
+                user.groups.add(Group.objects.get(name=role))
+            cls.users[role] = user
+
+        cls.dishtype = DishType.objects.create(name="Budget type")
+        cls.dish = Dish.objects.create(
+            name="Budget dish",
+            description="description dish test",
+            price=10,
+            dishtype=cls.dishtype,
+        )
+        cls.ingredient = Ingredient.objects.create(name="Budget ingredient")
+        cls.cook = cls.users["manager"]
+        cls.batch = 0
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if os.environ.get("QUERY_BUDGET_REPORT"):
+            print(cls.format_report())
+
+    @classmethod
+    def format_report(cls):
+        lines = [
+            f"{'route':<28}{'method':<8}{'role':<11}"
+            f"{'queries':>8}{'ms':>9}",
+        ]
+        for row in cls.report:
+            lines.append(
+                f"{row['route']:<28}{row['method']:<8}{row['role']:<11}"
+                f"{row['queries']:>8}{row['ms']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def grow(self, size):
+        """Add ``size`` dishes, cooks and ingredients around the objects."""
+        self.batch += 1
+        prefix = f"grow{self.batch}"
+        dishtypes = DishType.objects.bulk_create([
+            DishType(name=f"{prefix} type {num}") for num in range(size)
+        ])
+        dishes = Dish.objects.bulk_create([
+            Dish(
+                name=f"{prefix} dish {num}",
+                description="description dish test",
+                price=num,
+                dishtype=dishtypes[num] if num % 2 else self.dishtype,
+            )
+            for num in range(size)
+        ])
+        cooks = get_user_model().objects.bulk_create([
+            get_user_model()(
+                username=f"{prefix}_cook_{num}", password=self.password
+            )
+            for num in range(size)
+        ])
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(name=f"{prefix} ingredient {num}")
+            for num in range(size)
+        ])
+        self.dish.cooks.add(*cooks)
+        self.dish.ingredients.add(*ingredients)
+        self.cook.dishes.add(*dishes)
+        self.ingredient.dishes.add(*dishes)
+
+    def url_for(self, pattern):
+        name = pattern.name
+        if "<int:pk>" not in str(pattern.pattern):
+            return reverse(f"kitchen:{name}")
+        if "dish-type" in name:
+            pk = self.dishtype.pk
+        elif "ingredient" in name and "dish-update" not in name:
+            pk = self.ingredient.pk
+        elif "cook" in name:
+            pk = self.cook.pk
+        else:
+            pk = self.dish.pk
+        return reverse(f"kitchen:{name}", args=[pk])
+
+    def measure(self):
+        counts = {}
+        for pattern in urlpatterns:
+            url = self.url_for(pattern)
+            requests = [("GET", None)]
+            if pattern.name in POST_FLOWS:
+                requests.append(("POST", POST_FLOWS[pattern.name]))
+            for role in ROLES:
+                self.client.force_login(self.users[role])
+                for method, data in requests:
+                    if data is not None and "action" in data:
+                        # Start every role from the same membership state
+                        self.dish.ingredients.remove(self.ingredient)
+                        data = dict(data, ingredient_id=self.ingredient.pk)
+                    started = time.perf_counter()
+                    with CaptureQueriesContext(connection) as queries:
+                        if method == "GET":
+                            response = self.client.get(url)
+                        else:
+                            response = self.client.post(url, data)
+                    elapsed = (time.perf_counter() - started) * 1000
+                    self.assertLess(response.status_code, 500, url)
+                    counts[(pattern.name, method, role)] = len(queries)
+                    self.report.append({
+                        "route": pattern.name,
+                        "method": method,
+                        "role": role,
+                        "queries": len(queries),
+                        "ms": elapsed,
+                    })
+        return counts
+
+    def test_query_count_independent_of_data_size(self):
+        self.grow(self.small)
+        small_counts = self.measure()
+        self.report.clear()
+        self.grow(self.large)
+        large_counts = self.measure()
+
+        growing = {
+            key: (small_counts[key], count)
+            for key, count in large_counts.items()
+            if count != small_counts[key]
+        }
+        self.assertEqual(
+            growing, {},
+            "Query counts grow with data (route, method, role): "
+            "(small, large)",
+        )
+
+
+@override_settings(KITCHEN_MENU_CARDS=True)
+class MenuCardQueryBudgetTest(QueryBudgetTest):
+    """The same budget with dish pages served from menu cards."""
+    report = []
@@ -0,0 +1,118 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen import menu_cards
+from kitchen.models import DishType, Dish, MenuCard
+from kitchen.pagination import CursorPaginator
+from kitchen.search import search, search_related, SQLiteFTSSearchBackend
+
+
+@override_settings(
+    KITCHEN_SEARCH_BACKEND="kitchen.search.SQLiteFTSSearchBackend"
+)
+class SQLiteFTSSearchTest(TestCase):
+    def setUp(self):
+        dishtype = DishType.objects.create(name="Soup")
+        self.borscht = Dish.objects.create(
+            name="Borscht",
+            description="Beetroot soup with sour cream",
+            price=10,
+            dishtype=dishtype,
+        )
+        self.bread = Dish.objects.create(
+            name="Bread and butter",
+            description="Fresh \"sourdough\" loaf",
+            price=5,
+            dishtype=dishtype,
+        )
+
+    def test_matches_substring_of_name_and_description(self):
+        self.assertEqual(
+            list(search(Dish.objects.all(), "RSCH")), [self.borscht]
+        )
+        self.assertEqual(
+            list(search(Dish.objects.all(), "sour")),
+            [self.borscht, self.bread],
+        )
+
+    def test_short_term_falls_back_to_icontains(self):
+        self.assertEqual(
+            list(search(Dish.objects.all(), "br")), [self.bread]
+        )
+
+    def test_index_follows_updates_and_quotes(self):
+        self.bread.name = "Toast"
+        self.bread.save()
+        self.assertFalse(search(Dish.objects.all(), "Bread").exists())
+        self.assertEqual(
+            list(search(Dish.objects.all(), '"sourdough"')), [self.bread]
+        )
+
+    def test_rank_orders_best_match_first(self):
+        ranked = SQLiteFTSSearchBackend().rank(Dish.objects.all(), "Bors")
+        self.assertEqual(list(ranked), [self.borscht])
+
+    def test_search_orders_by_rank(self):
+        pea = Dish.objects.create(
+            name="Pea soup",
+            description="Soup of split peas, a thick soup",
+            price=7,
+            dishtype=self.borscht.dishtype,
+        )
+        self.assertEqual(
+            list(search(Dish.objects.all(), "soup")), [pea, self.borscht]
+        )
+
+    def test_cursor_pages_follow_rank(self):
+        pea = Dish.objects.create(
+            name="Pea soup",
+            description="Soup of split peas, a thick soup",
+            price=7,
+            dishtype=self.borscht.dishtype,
+        )
+        paginator = CursorPaginator(search(Dish.objects.all(), "soup"), 1)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(list(first) + list(second), [pea, self.borscht])
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(paginator.page(second.previous_cursor)), [pea])
+
+    def test_list_view_keeps_rank_order(self):
+        pea = Dish.objects.create(
+            name="Pea soup",
+            description="Soup of split peas, a thick soup",
+            price=7,
+            dishtype=self.borscht.dishtype,
+        )
+        self.client.force_login(get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        ))
+        response = self.client.get(reverse("kitchen:dish-list"), {
+            "name": "soup"
+        })
+        self.assertEqual(
+            list(response.context["dish_list"]), [pea, self.borscht]
+        )
+
+    def test_related_rows_ordered_by_rank(self):
+        pea = Dish.objects.create(
+            name="Pea soup",
+            description="Soup of split peas, a thick soup",
+            price=7,
+            dishtype=self.borscht.dishtype,
+        )
+        menu_cards.refresh([self.borscht.pk, self.bread.pk, pea.pk])
+        self.assertEqual(
+            [card.dish for card in search_related(
+                MenuCard.objects.all(), Dish, "soup"
+            )],
+            [pea, self.borscht],
+        )
+        # Short terms are matched without a rank, in the cards' order
+        self.assertEqual(
+            [card.dish for card in search_related(
+                MenuCard.objects.all(), Dish, "br"
+            )],
+            [self.bread],
+        )
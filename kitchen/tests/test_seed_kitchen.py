@@ -0,0 +1,56 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from kitchen import counters, fragments
+from kitchen.models import DishType, Dish, Ingredient
+
+
+class SeedKitchenCommandTest(TestCase):
+    def seed(self, **options):
+        call_command(
+            "seed_kitchen",
+            dishes=60,
+            dishtypes=4,
+            ingredients=25,
+            cooks=8,
+            batch_size=16,
+            random_seed=1,
+            stdout=StringIO(),
+            **options,
+        )
+
+    def test_creates_linked_graph(self):
+        generation = fragments.generations(["dish"])["dish"]
+        self.seed()
+
+        self.assertEqual(Dish.objects.count(), 60)
+        self.assertEqual(DishType.objects.count(), 4)
+        self.assertEqual(Ingredient.objects.count(), 25)
+        self.assertEqual(get_user_model().objects.count(), 8)
+        self.assertEqual(
+            counters.get_counts(),
+            {"cooks": 8, "dishes": 60, "dishtypes": 4, "ingredients": 25},
+        )
+        self.assertFalse(Dish.objects.filter(cooks=None).exists())
+        self.assertFalse(Dish.objects.filter(ingredients=None).exists())
+        self.assertNotEqual(
+            fragments.generations(["dish"])["dish"], generation
+        )
+
+        cook = get_user_model().objects.first()
+        self.assertTrue(cook.check_password("seed12345"))
+
+    def test_zipf_favours_first_ingredients(self):
+        self.seed(distribution="zipf", skew=1.5)
+        ingredients = list(Ingredient.objects.order_by("pk"))
+        self.assertGreater(
+            ingredients[0].dishes.count(), ingredients[-1].dishes.count()
+        )
+
+    def test_refuses_existing_prefix(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
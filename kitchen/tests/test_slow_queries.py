@@ -0,0 +1,126 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from kitchen import slow_queries
+from kitchen.group_cache import get_user_groups
+from kitchen.models import DishType, Dish
+
+
+class NormalizeTest(TestCase):
+    def test_values_are_replaced(self):
+        self.assertEqual(
+            slow_queries.normalize(
+                'SELECT "kitchen_dish"."id" FROM "kitchen_dish"\n'
+                "WHERE (\"kitchen_dish\".\"name\" = 'O''Brien'"
+                ' AND "kitchen_dish"."price" > 12.5) LIMIT 21'
+            ),
+            'SELECT "kitchen_dish"."id" FROM "kitchen_dish" '
+            'WHERE ("kitchen_dish"."name" = ?'
+            ' AND "kitchen_dish"."price" > ?) LIMIT ?',
+        )
+
+    def test_lists_fold(self):
+        self.assertEqual(
+            slow_queries.normalize(
+                'SELECT * FROM "t" WHERE "id" IN (%s, %s, %s)'
+            ),
+            slow_queries.normalize('SELECT * FROM "t" WHERE "id" IN (%s)'),
+        )
+        self.assertEqual(
+            slow_queries.normalize(
+                'INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'
+            ),
+            'INSERT INTO "t" ("a", "b") VALUES (?, ?), ...',
+        )
+
+
+class SlowQueryLogTest(TestCase):
+    def setUp(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        self.path = os.path.join(directory, "slow.jsonl")
+        self.user = get_user_model().objects.create_user(
+            username="cook", password="cook_test"
+        )
+        self.user.groups.add(Group.objects.get(name="employee"))
+        self.client.force_login(self.user)
+        dishtype = DishType.objects.create(name="Soup")
+        self.dish = Dish.objects.create(
+            name="Secret borscht", description="test", price=10,
+            dishtype=dishtype,
+        )
+
+    def log_everything(self, **options):
+        options.setdefault("KITCHEN_SLOW_QUERY_MS", 0)
+        return override_settings(KITCHEN_SLOW_QUERY_LOG=self.path, **options)
+
+    def test_off_without_a_log(self):
+        self.client.get(reverse("kitchen:dish-list"))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_queries_are_attributed_to_views(self):
+        with self.log_everything():
+            self.client.get(reverse("kitchen:dish-list"))
+            self.client.get(
+                reverse("kitchen:dish-detail", args=[self.dish.pk])
+            )
+        entries = list(slow_queries.read_entries(self.path))
+        views = {entry["view"] for entry in entries}
+        self.assertEqual(views, {"DishListView", "DishDetailView"})
+        with open(self.path) as file:
+            self.assertNotIn("Secret", file.read())
+        self.assertTrue(all(
+            entry["fingerprint"] == slow_queries.fingerprint(entry["sql"])
+            for entry in entries
+        ))
+
+    async def test_async_views(self):
+        await self.async_client.aforce_login(self.user)
+        with self.log_everything():
+            await self.async_client.get(reverse("kitchen:async-dish-list"))
+        views = {
+            entry["view"] for entry in slow_queries.read_entries(self.path)
+        }
+        self.assertEqual(views, {"AsyncDishListView"})
+
+    def test_threshold(self):
+        with self.log_everything(KITCHEN_SLOW_QUERY_MS=60_000):
+            self.client.get(reverse("kitchen:dish-list"))
+        self.assertEqual(list(slow_queries.read_entries(self.path)), [])
+
+    def test_rotated_logs_are_read(self):
+        # Cache the cook's groups so that every request runs the same queries
+        get_user_groups(self.user)
+        with self.log_everything(
+            KITCHEN_SLOW_QUERY_LOG_BYTES=2000,
+            KITCHEN_SLOW_QUERY_LOG_BACKUPS=50,
+        ):
+            for _ in range(5):
+                self.client.get(reverse("kitchen:dish-list"))
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        rows = slow_queries.summarize(
+            slow_queries.read_entries(self.path), by="view"
+        )
+        self.assertEqual(rows[0]["key"], "DishListView")
+        self.assertEqual(rows[0]["count"] % 5, 0)
+
+    def test_summary_command(self):
+        with self.log_everything():
+            self.client.get(reverse("kitchen:dish-list"))
+            self.client.get(reverse("kitchen:dish-list"))
+        out = StringIO()
+        call_command(
+            "slow_queries", log=self.path, sort="count", stdout=out
+        )
+        self.assertIn("DishListView (2)", out.getvalue())
+        self.assertIn('FROM "kitchen_dish"', out.getvalue())
+
+        out = StringIO()
+        call_command("slow_queries", log=self.path, by="view", stdout=out)
+        self.assertIn("DishListView", out.getvalue())
@@ -0,0 +1,151 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from kitchen import tickets
+from kitchen.models import DishType, Dish, OrderTicket
+
+
+class TicketQueueTest(TestCase):
+    def setUp(self):
+        user_model = get_user_model()
+        self.grill = user_model.objects.create_user(
+            username="grill", password="grill_test"
+        )
+        self.grill.groups.add(Group.objects.get(name="trainee"))
+        self.fryer = user_model.objects.create_user(
+            username="fryer", password="fryer_test"
+        )
+        self.dish = Dish.objects.create(
+            name="Steak", description="test", price=30,
+            dishtype=DishType.objects.create(name="Main"),
+        )
+        self.tickets = [
+            OrderTicket.objects.create(dish=self.dish, note=f"table {num}")
+            for num in range(5)
+        ]
+
+    def test_claims_take_the_oldest_tickets_once(self):
+        first = tickets.claim(self.grill, "grill", limit=2)
+        second = tickets.claim(self.fryer, "fryer", limit=2)
+        self.assertEqual(
+            [ticket.note for ticket in first], ["table 0", "table 1"]
+        )
+        self.assertEqual(
+            [ticket.note for ticket in second], ["table 2", "table 3"]
+        )
+        self.assertEqual(first[0].status, OrderTicket.IN_PROGRESS)
+        self.assertEqual(first[0].station, "grill")
+        self.assertEqual(tickets.queued().count(), 1)
+
+    def test_complete_and_release(self):
+        claimed = [ticket.pk for ticket in tickets.claim(self.grill)]
+        # Only the cook holding a ticket can finish it
+        self.assertEqual(tickets.complete(self.fryer, claimed), 0)
+        self.assertEqual(tickets.complete(self.grill, claimed), 1)
+        self.assertEqual(
+            OrderTicket.objects.get(pk=claimed[0]).status, OrderTicket.DONE
+        )
+
+        again = tickets.claim(self.grill)
+        self.assertEqual(tickets.release(self.grill, [again[0].pk]), 1)
+        self.assertEqual(tickets.claim(self.fryer)[0].pk, again[0].pk)
+
+    def test_api(self):
+        self.client.force_login(self.grill)
+        response = self.client.post(
+            reverse("kitchen:api-ticket-claim"),
+            data=json.dumps({"station": "grill", "limit": 2}),
+            content_type="application/json",
+        )
+        results = response.json()["results"]
+        self.assertEqual([row["dish_name"] for row in results],
+                         ["Steak", "Steak"])
+        self.assertEqual(results[0]["status"], "in_progress")
+
+        response = self.client.post(
+            reverse("kitchen:api-ticket-done"),
+            data=json.dumps({"ids": [row["id"] for row in results]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"updated": 2})
+
+        response = self.client.get(
+            reverse("kitchen:api-ticket-list"), {"status": "queued"}
+        )
+        self.assertEqual(len(response.json()["results"]), 3)
+
+    def test_floor_creates_tickets(self):
+        self.client.force_login(self.grill)
+        url = reverse("kitchen:api-ticket-list")
+        data = json.dumps([{"dish": self.dish.pk, "quantity": 2}])
+        response = self.client.post(
+            url, data=data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 403)
+
+        self.grill.groups.add(Group.objects.get(name="employee"))
+        response = self.client.post(
+            url, data=data, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(tickets.queued().last().quantity, 2)
+
+    def test_board(self):
+        self.client.force_login(self.grill)
+        self.client.post(reverse("kitchen:ticket-claim"), {"station": "wok"})
+        response = self.client.get(reverse("kitchen:ticket-board"))
+        self.assertEqual(response.context["queued_count"], 4)
+        self.assertEqual(response.context["station"], "wok")
+        ticket = response.context["my_tickets"][0]
+
+        self.client.post(reverse("kitchen:ticket-done", args=[ticket.pk]))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.status, OrderTicket.DONE)
+
+
+class TicketBenchmarkTest(TransactionTestCase):
+    def test_concurrent_stations_never_share_a_ticket(self):
+        out = StringIO()
+        call_command(
+            "benchmark_tickets", "--tickets", "200", "--stations", "4",
+            stdout=out,
+        )
+        self.assertIn("200/200 tickets claimed", out.getvalue())
+        self.assertIn("No ticket was claimed twice", out.getvalue())
+        self.assertFalse(OrderTicket.objects.exists())
+        # The dish, dish type and station made for the run are gone too
+        self.assertFalse(Dish.objects.exists())
+        self.assertFalse(DishType.objects.exists())
+        self.assertFalse(
+            get_user_model().objects.filter(
+                username="benchmark_station"
+            ).exists()
+        )
+
+    def test_lock_timeouts_are_retried_a_bounded_number_of_times(self):
+        claim = tickets.claim
+
+        def locked(*args):
+            raise OperationalError("database is locked")
+
+        tickets.claim = locked
+        try:
+            with self.assertRaisesMessage(
+                CommandError, "Gave up after 3 retries: database is locked"
+            ):
+                call_command(
+                    "benchmark_tickets", "--tickets", "10",
+                    "--stations", "2", "--retries", "3", stdout=StringIO(),
+                )
+        finally:
+            tickets.claim = claim
+        self.assertFalse(OrderTicket.objects.exists())
+        self.assertFalse(Dish.objects.exists())
@@ -227,3 +227,21 @@ class PrivateCookTest(TestCase):
             reverse("kitchen:cook-delete", args=[cook.id])
         )
         self.assertEqual(response.status_code, 403)
+
+    def test_manager_links_follow_groups(self):
+        export_url = reverse("kitchen:cook-export")
+        assignment_url = reverse("kitchen:cook-assignment")
+        response = self.client.get(COOK_LIST_URL)
+        self.assertContains(response, export_url)
+        self.assertContains(response, assignment_url)
+
+        self.user.groups.set([Group.objects.get(name="employee")])
+        response = self.client.get(COOK_LIST_URL)
+        self.assertNotContains(response, export_url)
+        self.assertNotContains(response, assignment_url)
+
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get(COOK_LIST_URL)
+        self.assertContains(response, export_url)
+        self.assertContains(response, assignment_url)
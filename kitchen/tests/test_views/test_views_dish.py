@@ -260,6 +260,51 @@ class PrivateDishTest(TestCase):
         self.assertNotIn(ingredient_one, dish_ingredients)
         self.assertIn(ingredient_two, dish_ingredients)
 
+    def test_dish_update_ingredient_batch(self):
+        dishtype = DishType.objects.create(
+            name="DishType_test",
+        )
+        dish = Dish.objects.create(
+            name="Pasta",
+            description="description dish test",
+            price=10,
+            dishtype=dishtype,
+        )
+        ingredients = [
+            Ingredient.objects.create(name=f"Ingredient_test {num}")
+            for num in range(4)
+        ]
+        dish.ingredients.add(ingredients[0], ingredients[1])
+        url = reverse("kitchen:dish-update-ingredient", args=[dish.id])
+
+        response = self.client.get(url)
+        self.assertEqual(
+            response.context["dish_ingredient_ids"],
+            {ingredients[0].id, ingredients[1].id},
+        )
+
+        response = self.client.post(url, data={
+            "add_ids": [ingredients[2].id, ingredients[3].id],
+            "remove_ids": [ingredients[0].id],
+        })
+        self.assertRedirects(response, url)
+        self.assertEqual(
+            set(dish.ingredients.values_list("id", flat=True)),
+            {ingredients[1].id, ingredients[2].id, ingredients[3].id},
+        )
+
+        response = self.client.post(url, data={"add_ids": [9999]})
+        self.assertEqual(response.status_code, 404)
+
+        for data in [
+            {"add_ids": ["abc"]},
+            {"remove_ids": [ingredients[1].id, "1.5"]},
+            {"ingredient_id": "x", "action": "add"},
+        ]:
+            response = self.client.post(url, data=data)
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(dish.ingredients.count(), 3)
+
     def test_dish_update_ingredient_pagination(self):
         dishtype = DishType.objects.create(
             name="DishType_test",
@@ -302,3 +347,28 @@ class PrivateDishTest(TestCase):
             reverse("kitchen:dish-delete", args=[dish.id])
         )
         self.assertEqual(response.status_code, 403)
+
+    def test_import_export_buttons_follow_groups(self):
+        import_url = reverse("kitchen:dish-import")
+        export_url = reverse("kitchen:dish-export")
+        response = self.client.get(DISH_LIST_URL)
+        self.assertContains(response, import_url)
+        self.assertContains(response, export_url)
+
+        self.user.groups.set([Group.objects.get(name="employee")])
+        response = self.client.get(DISH_LIST_URL)
+        self.assertNotContains(response, import_url)
+        self.assertContains(response, export_url)
+
+        self.user.groups.set([Group.objects.get(name="trainee")])
+        response = self.client.get(DISH_LIST_URL)
+        self.assertNotContains(response, import_url)
+        self.assertNotContains(response, export_url)
+
+        # Superusers pass every group check, as in GroupRequiredMixin
+        self.user.groups.clear()
+        self.user.is_superuser = True
+        self.user.save()
+        response = self.client.get(DISH_LIST_URL)
+        self.assertContains(response, import_url)
+        self.assertContains(response, export_url)
@@ -0,0 +1,106 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from kitchen import visits
+from kitchen.models import VisitCounter
+
+
+@override_settings(KITCHEN_VISIT_FLUSH_SECONDS=3600)
+class VisitTest(TestCase):
+    def setUp(self):
+        visits.clear()
+        self.users = [
+            get_user_model().objects.create_user(
+                username=f"cook{num}", password="cook_test"
+            )
+            for num in range(3)
+        ]
+        self.client.force_login(self.users[0])
+
+    def visit(self):
+        return self.client.get(reverse("kitchen:index")).context["num_visits"]
+
+    def test_visits_do_not_write(self):
+        self.visit()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.visit(), 1)
+        self.assertFalse(any(
+            query["sql"].startswith(("UPDATE", "INSERT"))
+            for query in queries
+        ))
+        self.assertFalse(VisitCounter.objects.exists())
+
+    def test_flush_writes_one_batch(self):
+        for user, count in zip(self.users, (1, 2, 2)):
+            for _ in range(count):
+                visits.record(user)
+        self.users[2].delete()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(visits.flush(), 5)
+        # Users, insert, one update per distinct count, and the savepoint
+        self.assertLessEqual(len(queries), 6)
+        self.assertEqual(
+            dict(VisitCounter.objects.values_list("user_id", "visits")),
+            {self.users[0].pk: 1, self.users[1].pk: 2},
+        )
+
+        visits.record(self.users[0])
+        visits.flush()
+        self.assertEqual(visits.get_visits(self.users[0]), 2)
+        self.assertEqual(visits.flush(), 0)
+
+    def test_count_is_table_plus_buffer(self):
+        self.visit()
+        visits.flush()
+        self.assertEqual(self.visit(), 1)
+        self.assertEqual(self.visit(), 2)
+
+    @override_settings(KITCHEN_VISIT_FLUSH_SECONDS=0)
+    def test_flushes_on_interval(self):
+        self.visit()
+        self.assertEqual(VisitCounter.objects.get().visits, 1)
+
+    def test_session_counts_carry_over(self):
+        session = self.client.session
+        session["num_visits"] = 7
+        session.save()
+        self.assertEqual(self.visit(), 7)
+        self.assertNotIn("num_visits", self.client.session)
+        self.assertEqual(self.visit(), 8)
+
+    async def test_async_index(self):
+        await self.async_client.aforce_login(self.users[1])
+        url = reverse("kitchen:async-index")
+        await self.async_client.get(url)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.context["num_visits"], 1)
+
+
+class PurgeSessionsTest(TestCase):
+    def test_purges_expired_sessions_in_chunks(self):
+        now = timezone.now()
+        for num in range(5):
+            Session.objects.create(
+                session_key=f"expired{num}", session_data="",
+                expire_date=now - timedelta(days=1),
+            )
+        Session.objects.create(
+            session_key="live", session_data="",
+            expire_date=now + timedelta(days=1),
+        )
+        out = StringIO()
+        call_command("purge_sessions", chunk_size=2, stdout=out)
+        self.assertIn("Deleted 5 expired sessions", out.getvalue())
+        self.assertEqual(
+            list(Session.objects.values_list("session_key", flat=True)),
+            ["live"],
+        )
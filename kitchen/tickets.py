@@ -0,0 +1,108 @@
+"""
+Order ticket queue: the floor enqueues tickets, stations claim and cook
+them.
+
+Claims take the oldest queued tickets. Where the database supports
+``SELECT ... FOR UPDATE SKIP LOCKED`` (Postgres) concurrent claimers lock
+disjoint rows and never wait for each other. Elsewhere (SQLite serialises
+writers anyway) a claim is one transaction whose UPDATE only matches
+tickets still queued, so no ticket is ever claimed twice.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from kitchen.models import OrderTicket
+
+
+CLAIM_ATTEMPTS = 5
+MAX_CLAIM = 50
+
+
+def queued():
+    return OrderTicket.objects.filter(
+        status=OrderTicket.QUEUED
+    ).order_by("created_at", "id")
+
+
+def _claimed(cook, station):
+    now = timezone.now()
+    return {
+        "status": OrderTicket.IN_PROGRESS,
+        "cook": cook,
+        "station": station,
+        "claimed_at": now,
+        "updated_at": now,
+    }
+
+
+def _claim_locked(cook, station, limit):
+    with transaction.atomic():
+        claimed = list(
+            queued().select_related("dish")
+            .select_for_update(skip_locked=True, of=("self",))[:limit]
+        )
+        values = _claimed(cook, station)
+        if claimed:
+            OrderTicket.objects.filter(
+                pk__in=[ticket.pk for ticket in claimed]
+            ).update(**values)
+    return claimed, values
+
+
+def _claim_conditional(cook, station, limit):
+    claimed = []
+    for _attempt in range(CLAIM_ATTEMPTS):
+        # On SQLite with transaction_mode IMMEDIATE this holds the write
+        # lock throughout. The status check in the UPDATE keeps claims
+        # unique even where a concurrent writer got in first.
+        with transaction.atomic():
+            candidates = list(
+                queued().select_related("dish")[:limit - len(claimed)]
+            )
+            values = _claimed(cook, station)
+            for ticket in candidates:
+                if OrderTicket.objects.filter(
+                    pk=ticket.pk, status=OrderTicket.QUEUED
+                ).update(**values):
+                    claimed.append(ticket)
+        if not candidates or len(claimed) == limit:
+            break
+    return claimed, values
+
+
+def claim(cook, station="", limit=1):
+    """
+    Claim up to ``limit`` of the oldest queued tickets for ``cook``. The
+    tickets are read in the claiming transaction, so a failed claim
+    leaves nothing behind in progress.
+    """
+    limit = max(1, min(limit, MAX_CLAIM))
+    if connection.features.has_select_for_update_skip_locked:
+        claimed, values = _claim_locked(cook, station, limit)
+    else:
+        claimed, values = _claim_conditional(cook, station, limit)
+    for ticket in claimed:
+        for name, value in values.items():
+            setattr(ticket, name, value)
+    return claimed
+
+
+def complete(cook, pks):
+    """Mark tickets of ``cook`` done, returns how many were in progress."""
+    now = timezone.now()
+    return OrderTicket.objects.filter(
+        pk__in=pks, cook=cook, status=OrderTicket.IN_PROGRESS
+    ).update(status=OrderTicket.DONE, done_at=now, updated_at=now)
+
+
+def release(cook, pks):
+    """Put tickets of ``cook`` back at their place in the queue."""
+    return OrderTicket.objects.filter(
+        pk__in=pks, cook=cook, status=OrderTicket.IN_PROGRESS
+    ).update(
+        status=OrderTicket.QUEUED,
+        cook=None,
+        station="",
+        claimed_at=None,
+        updated_at=timezone.now(),
+    )
@@ -1,5 +1,18 @@
 from django.urls import path
 
+from kitchen import async_views
+from kitchen.live import LiveEventsFallbackView, LiveTokenView
+from kitchen.metrics import MetricsView
+from kitchen.api import (
+    ResourceCollectionView,
+    ResourceDetailView,
+    DishTypeResource,
+    DishResource,
+    IngredientResource,
+    CookResource,
+    OrderTicketResource,
+    StockMatchApiView,
+    TicketActionView)
 from kitchen.views import (
     index,
     DishTypeListView,
@@ -10,6 +23,9 @@ from kitchen.views import (
     DishListView,
     DishDetailView,
     DishCreateView,
+    DishImportView,
+    DishExportView,
+    DishStockMatchView,
     DishUpdateView,
     DishAddCookView,
     DishRemoveCookView,
@@ -23,8 +39,13 @@ from kitchen.views import (
     CookListView,
     CookDetailView,
     CookCreateView,
+    CookExportView,
+    CookAssignmentView,
     CookUpdateView,
-    CookDeleteView)
+    CookDeleteView,
+    TicketBoardView,
+    TicketClaimView,
+    TicketDoneView)
 
 urlpatterns = [
     path("", index, name="index"),
@@ -44,6 +65,12 @@ urlpatterns = [
          DishDetailView.as_view(), name="dish-detail"),
     path("dishes/create/",
          DishCreateView.as_view(), name="dish-create"),
+    path("dishes/import/",
+         DishImportView.as_view(), name="dish-import"),
+    path("dishes/export/",
+         DishExportView.as_view(), name="dish-export"),
+    path("dishes/from-stock/",
+         DishStockMatchView.as_view(), name="dish-stock-match"),
     path("dishes/<int:pk>/update/",
          DishUpdateView.as_view(), name="dish-update"),
     path("dishes/<int:pk>/add/",
@@ -70,10 +97,91 @@ urlpatterns = [
          CookDetailView.as_view(), name="cook-detail"),
     path("cooks/create/",
          CookCreateView.as_view(), name="cook-create"),
+    path("cooks/export/",
+         CookExportView.as_view(), name="cook-export"),
+    path("cooks/assignment/",
+         CookAssignmentView.as_view(), name="cook-assignment"),
     path("cooks/<int:pk>/update/",
          CookUpdateView.as_view(), name="cook-update"),
     path("cooks/<int:pk>/delete/",
          CookDeleteView.as_view(), name="cook-delete"),
+    path("tickets/",
+         TicketBoardView.as_view(), name="ticket-board"),
+    path("tickets/claim/",
+         TicketClaimView.as_view(), name="ticket-claim"),
+    path("tickets/<int:pk>/done/",
+         TicketDoneView.as_view(), name="ticket-done"),
+    path("live/token/",
+         LiveTokenView.as_view(), name="live-token"),
+    path("live/events/",
+         LiveEventsFallbackView.as_view(), name="live-events"),
+    path("metrics",
+         MetricsView.as_view(), name="metrics"),
+    path("async/",
+         async_views.index, name="async-index"),
+    path("async/dish-types/",
+         async_views.AsyncDishTypeListView.as_view(),
+         name="async-dish-type-list"),
+    path("async/dish-types/<int:pk>/",
+         async_views.AsyncDishTypeDetailView.as_view(),
+         name="async-dish-type-detail"),
+    path("async/dishes/",
+         async_views.AsyncDishListView.as_view(),
+         name="async-dish-list"),
+    path("async/dishes/<int:pk>/",
+         async_views.AsyncDishDetailView.as_view(),
+         name="async-dish-detail"),
+    path("async/ingredients/",
+         async_views.AsyncIngredientListView.as_view(),
+         name="async-ingredient-list"),
+    path("async/ingredients/<int:pk>/",
+         async_views.AsyncIngredientDetailView.as_view(),
+         name="async-ingredient-detail"),
+    path("async/cooks/",
+         async_views.AsyncCookListView.as_view(),
+         name="async-cook-list"),
+    path("async/cooks/<int:pk>/",
+         async_views.AsyncCookDetailView.as_view(),
+         name="async-cook-detail"),
+    path("api/dish-types/",
+         ResourceCollectionView.as_view(resource=DishTypeResource),
+         name="api-dish-type-list"),
+    path("api/dish-types/<int:pk>/",
+         ResourceDetailView.as_view(resource=DishTypeResource),
+         name="api-dish-type-detail"),
+    path("api/dishes/",
+         ResourceCollectionView.as_view(resource=DishResource),
+         name="api-dish-list"),
+    path("api/dishes/from-stock/",
+         StockMatchApiView.as_view(),
+         name="api-dish-stock-match"),
+    path("api/dishes/<int:pk>/",
+         ResourceDetailView.as_view(resource=DishResource),
+         name="api-dish-detail"),
+    path("api/ingredients/",
+         ResourceCollectionView.as_view(resource=IngredientResource),
+         name="api-ingredient-list"),
+    path("api/ingredients/<int:pk>/",
+         ResourceDetailView.as_view(resource=IngredientResource),
+         name="api-ingredient-detail"),
+    path("api/cooks/",
+         ResourceCollectionView.as_view(resource=CookResource),
+         name="api-cook-list"),
+    path("api/cooks/<int:pk>/",
+         ResourceDetailView.as_view(resource=CookResource),
+         name="api-cook-detail"),
+    path("api/tickets/",
+         ResourceCollectionView.as_view(resource=OrderTicketResource),
+         name="api-ticket-list"),
+    path("api/tickets/claim/",
+         TicketActionView.as_view(action="claim"),
+         name="api-ticket-claim"),
+    path("api/tickets/done/",
+         TicketActionView.as_view(action="done"),
+         name="api-ticket-done"),
+    path("api/tickets/release/",
+         TicketActionView.as_view(action="release"),
+         name="api-ticket-release"),
 ]
 
 app_name = "kitchen"
@@ -1,9 +1,20 @@
+import csv
+import io
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from .mixins import GroupRequiredMixin
-
-from django.http import HttpResponseRedirect
-from django.shortcuts import render, redirect, get_object_or_404
+from .mixins import (
+    GroupRequiredMixin,
+    CursorPaginationMixin,
+    ConditionalGetMixin,
+    StreamingExportMixin,
+)
+
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, Http404
+from django.shortcuts import redirect, get_object_or_404
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy, reverse
 from django.views import generic
 
@@ -17,34 +28,62 @@ from kitchen.forms import (
     CookSearchForm,
     IngredientSearchForm,
     DishSearchForm,
-    DishTypeSearchForm)
-
-from kitchen.models import Cook, Dish, Ingredient, DishType
+    DishTypeSearchForm,
+    MenuImportForm,
+    StockMatchForm,
+    CookAssignmentForm)
+
+from kitchen import (
+    assignment,
+    counters,
+    ingredient_sets,
+    menu_cards,
+    tickets,
+    visits,
+)
+from kitchen.ingredient_filters import (
+    filter_dishes,
+    resolve_names,
+    split_names,
+)
+from kitchen.menu_import import MenuImporter, guess_format, read_rows
+from kitchen.group_cache import get_user_group_names
+from kitchen.search import search, search_related
+from kitchen.models import (
+    Cook,
+    Dish,
+    Ingredient,
+    DishType,
+    MenuCard,
+    OrderTicket,
+)
 
 
 # Create your views here.
 @login_required
 def index(request):
-    num_cooks = Cook.objects.all().count()
-    num_dishes = Dish.objects.all().count()
-    num_dishtypes = DishType.objects.all().count()
-    num_ingredients = Ingredient.objects.all().count()
+    counts = counters.get_counts()
 
-    num_visits = request.session.get("num_visits", 0)
-    request.session["num_visits"] = num_visits + 1
+    # Counts kept in the session before visits had their own table
+    carried = request.session.pop("num_visits", 0)
+    num_visits = visits.record(request.user, carried)
 
     context = {
-        "num_cooks": num_cooks,
-        "num_dishes": num_dishes,
-        "num_dishtypes": num_dishtypes,
-        "num_ingredients": num_ingredients,
+        "num_cooks": counts["cooks"],
+        "num_dishes": counts["dishes"],
+        "num_dishtypes": counts["dishtypes"],
+        "num_ingredients": counts["ingredients"],
         "num_visits": num_visits,
     }
 
-    return render(request, "kitchen/index.html", context=context)
+    # A TemplateResponse, so that /metrics can time its rendering
+    return TemplateResponse(request, "kitchen/index.html", context)
 
 
-class DishTypeListView(LoginRequiredMixin, generic.ListView):
+class DishTypeListView(ConditionalGetMixin,
+                       CursorPaginationMixin,
+                       LoginRequiredMixin,
+                       generic.ListView):
     model = DishType
     context_object_name = "dishtype_list"
     template_name = "kitchen/dishtype_list.html"
@@ -61,14 +100,17 @@ class DishTypeListView(LoginRequiredMixin, generic.ListView):
     def get_queryset(self):
         name = self.request.GET.get("name")
         if name:
-            return DishType.objects.filter(name__icontains=name)
+            return search(DishType.objects.all(), name)
         return DishType.objects.all()
 
 
-class DishTypeDetailView(LoginRequiredMixin, generic.DetailView):
+class DishTypeDetailView(ConditionalGetMixin,
+                         LoginRequiredMixin,
+                         generic.DetailView):
     model = DishType
     template_name = "kitchen/dishtype_detail.html"
     queryset = DishType.objects.all().prefetch_related("dishes")
+    conditional_related = ["dishes"]
 
 
 class DishTypeCreateView(GroupRequiredMixin,
@@ -102,7 +144,10 @@ class DishTypeDeleteView(GroupRequiredMixin,
     success_url = reverse_lazy("kitchen:dish-type-list")
 
 
-class DishListView(LoginRequiredMixin, generic.ListView):
+class DishListView(ConditionalGetMixin,
+                   CursorPaginationMixin,
+                   LoginRequiredMixin,
+                   generic.ListView):
     model = Dish
     context_object_name = "dish_list"
     template_name = "kitchen/dish_list.html"
@@ -110,23 +155,127 @@ class DishListView(LoginRequiredMixin, generic.ListView):
 
     def get_context_data(self, *, object_list=None, **kwargs):
         context = super(DishListView, self).get_context_data(**kwargs)
-        name = self.request.GET.get("name", "")
-        context["search_form"] = DishSearchForm(
-            initial={"name": name}
-        )
+        context["search_form"] = DishSearchForm(initial={
+            field: self.request.GET.get(field, "")
+            for field in DishSearchForm.base_fields
+        })
+        # The same check the two views make, groups come from the cache
+        user = self.request.user
+        context["can_import"] = DishImportView().has_group_permission(user)
+        context["can_export"] = DishExportView().has_group_permission(user)
         return context
 
+    @property
+    def conditional_related_models(self):
+        # Cards carry the dish type name and their own updated_at
+        models = [] if menu_cards.enabled() else [DishType]
+        if (self.request.GET.get("with_ingredients")
+                or self.request.GET.get("without_ingredients")):
+            # A renamed ingredient changes which dishes match its name
+            models.append(Ingredient)
+        return models
+
+    def get_ingredient_filters(self):
+        if not hasattr(self, "_ingredient_filters"):
+            include = resolve_names(
+                split_names(self.request.GET.get("with_ingredients"))
+            )
+            exclude = resolve_names(
+                split_names(self.request.GET.get("without_ingredients"))
+            )
+            self._ingredient_filters = (
+                include, set().union(*exclude)
+            )
+        return self._ingredient_filters
+
     def get_queryset(self):
         name = self.request.GET.get("name")
+        include, exclude = self.get_ingredient_filters()
+        if menu_cards.enabled():
+            queryset = MenuCard.objects.all()
+            if name:
+                queryset = search_related(queryset, Dish, name)
+            return filter_dishes(queryset, include, exclude)
+        queryset = Dish.objects.annotate(dishtype_name=F("dishtype__name"))
         if name:
-            return Dish.objects.filter(
-                name__icontains=name).select_related("dishtype")
-        return Dish.objects.all().select_related("dishtype")
+            queryset = search(queryset, name)
+        return filter_dishes(queryset, include, exclude)
 
 
-class DishDetailView(LoginRequiredMixin, generic.DetailView):
+class DishDetailView(ConditionalGetMixin,
+                     LoginRequiredMixin,
+                     generic.DetailView):
     model = Dish
-    queryset = Dish.objects.all().prefetch_related("cooks", "ingredients")
+    context_object_name = "dish"
+    template_name = "kitchen/dish_detail.html"
+
+    @property
+    def conditional_related(self):
+        return [] if menu_cards.enabled() else ["cooks", "ingredients"]
+
+    def get_queryset(self):
+        if menu_cards.enabled():
+            return MenuCard.objects.all()
+        return Dish.objects.all().prefetch_related("cooks", "ingredients")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        dish = self.object
+        if isinstance(dish, MenuCard):
+            cook_ids = dish.cook_ids
+            context["cook_usernames"] = dish.cook_usernames
+            context["ingredient_names"] = dish.ingredient_names
+        else:
+            cook_ids = [cook.pk for cook in dish.cooks.all()]
+            context["cook_usernames"] = [
+                cook.username for cook in dish.cooks.all()
+            ]
+            context["ingredient_names"] = [
+                ingredient.name for ingredient in dish.ingredients.all()
+            ]
+        context["is_cook"] = self.request.user.pk in cook_ids
+        return context
+
+
+class DishStockMatchView(LoginRequiredMixin, generic.TemplateView):
+    template_name = "kitchen/dish_stock_match.html"
+    paginate_by = 50
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = StockMatchForm(self.request.GET or None)
+        context["form"] = form
+        if not form.is_valid():
+            return context
+
+        matches = ingredient_sets.match(
+            form.cleaned_data["ingredients"], form.cleaned_data["max_missing"]
+        )
+        makeable = [found for found in matches if not found.missing]
+        nearly = [found for found in matches if found.missing]
+        shown = makeable[:self.paginate_by] + nearly[:self.paginate_by]
+        dishes = Dish.objects.only("name", "price").in_bulk(
+            [found.dish_id for found in shown]
+        )
+        names = dict(Ingredient.objects.filter(
+            pk__in={pk for found in shown for pk in found.missing}
+        ).values_list("pk", "name"))
+
+        def rows(found_list):
+            return [
+                (dishes[found.dish_id],
+                 sorted(names[pk] for pk in found.missing if pk in names))
+                for found in found_list[:self.paginate_by]
+                if found.dish_id in dishes
+            ]
+
+        context.update(
+            makeable=rows(makeable),
+            makeable_count=len(makeable),
+            nearly=rows(nearly),
+            nearly_count=len(nearly),
+        )
+        return context
 
 
 class DishCreateView(GroupRequiredMixin,
@@ -138,6 +287,58 @@ class DishCreateView(GroupRequiredMixin,
     success_url = reverse_lazy("kitchen:dish-list")
 
 
+class DishImportView(GroupRequiredMixin,
+                     LoginRequiredMixin,
+                     generic.FormView):
+    group_required = ["manager"]
+    form_class = MenuImportForm
+    template_name = "kitchen/dish_import.html"
+
+    def form_valid(self, form):
+        upload = form.cleaned_data["file"]
+        # Large uploads are spooled to disk by Django and read row by row
+        stream = io.TextIOWrapper(
+            upload.file, encoding="utf-8-sig", newline=""
+        )
+        importer = MenuImporter(merge=form.cleaned_data["merge"])
+        try:
+            report = importer.run(
+                read_rows(stream, guess_format(upload.name))
+            )
+        except UnicodeDecodeError:
+            return self.import_failed(
+                form, importer, "The file is not UTF-8 encoded text."
+            )
+        except csv.Error as error:
+            return self.import_failed(
+                form, importer, f"The file is not valid CSV: {error}."
+            )
+        finally:
+            stream.detach()
+        return self.render_to_response(
+            self.get_context_data(form=MenuImportForm(), report=report)
+        )
+
+    def import_failed(self, form, importer, message):
+        # Batches are committed as they are written
+        report = importer.report
+        if report.imported:
+            message += (
+                f" The {report.imported} dishes read before the error "
+                f"were imported."
+            )
+        form.add_error("file", message)
+        return self.form_invalid(form)
+
+
+class DishExportView(GroupRequiredMixin,
+                     StreamingExportMixin,
+                     LoginRequiredMixin,
+                     generic.View):
+    group_required = ["employee", "manager"]
+    export_name = "dishes"
+
+
 class DishUpdateView(GroupRequiredMixin,
                      LoginRequiredMixin,
                      generic.UpdateView):
@@ -177,6 +378,7 @@ class DishRemoveCookView(GroupRequiredMixin,
 
 
 class DishUpdateIngredientView(GroupRequiredMixin,
+                               CursorPaginationMixin,
                                LoginRequiredMixin,
                                generic.ListView):
     group_required = ["employee", "manager"]
@@ -187,32 +389,70 @@ class DishUpdateIngredientView(GroupRequiredMixin,
     def get_queryset(self):
         name = self.request.GET.get("name")
         if name:
-            return Ingredient.objects.filter(name__icontains=name)
+            return search(Ingredient.objects.all(), name)
         return Ingredient.objects.all()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["dish"] = get_object_or_404(Dish, pk=self.kwargs["pk"])
+        dish = get_object_or_404(Dish, pk=self.kwargs["pk"])
+        context["dish"] = dish
+        page_ingredient_ids = [
+            ingredient.id for ingredient in context["object_list"]
+        ]
+        context["dish_ingredient_ids"] = set(
+            Ingredient.dishes.through.objects.filter(
+                dish_id=dish.id, ingredient_id__in=page_ingredient_ids
+            ).values_list("ingredient_id", flat=True)
+        )
         name = self.request.GET.get("name", "")
         context["search_form"] = IngredientSearchForm(
             initial={"name": name}
         )
         return context
 
+    @staticmethod
+    def parse_ids(values):
+        """The ids in ``values``, ``None`` when one is not an integer."""
+        try:
+            return {int(value) for value in values if value}
+        except ValueError:
+            return None
+
     def post(self, request, pk):
         dish = get_object_or_404(Dish, pk=pk)
-        ingredient_pk = request.POST.get("ingredient_id")
+        add_ids = self.parse_ids(request.POST.getlist("add_ids"))
+        remove_ids = self.parse_ids(request.POST.getlist("remove_ids"))
+        # Single-ingredient form kept for existing clients
+        ingredient_ids = self.parse_ids(
+            request.POST.getlist("ingredient_id")[-1:]
+        )
+        if None in (add_ids, remove_ids, ingredient_ids):
+            return HttpResponseBadRequest("Invalid ingredient id.")
+
         action = request.POST.get("action")
-        ingredient = get_object_or_404(Ingredient, pk=ingredient_pk)
+        if ingredient_ids:
+            if action == "add":
+                add_ids |= ingredient_ids
+            elif action == "remove":
+                remove_ids |= ingredient_ids
+
+        requested_ids = add_ids | remove_ids
+        existing_ids = set(
+            Ingredient.objects.filter(
+                pk__in=requested_ids
+            ).values_list("pk", flat=True)
+        )
+        if existing_ids != requested_ids:
+            raise Http404("No Ingredient matches the given query.")
 
-        if action == "add":
-            dish.ingredients.add(ingredient)
-        elif action == "remove":
-            dish.ingredients.remove(ingredient)
+        with transaction.atomic():
+            if add_ids - remove_ids:
+                dish.ingredients.add(*(add_ids - remove_ids))
+            if remove_ids - add_ids:
+                dish.ingredients.remove(*(remove_ids - add_ids))
 
-        return redirect(reverse(
-            "kitchen:dish-update-ingredient", kwargs={"pk": pk})
-        )
+        # Stay on the same search results and page after saving
+        return redirect(request.get_full_path())
 
 
 class DishDeleteView(GroupRequiredMixin,
@@ -223,7 +463,10 @@ class DishDeleteView(GroupRequiredMixin,
     success_url = reverse_lazy("kitchen:dish-list")
 
 
-class IngredientListView(LoginRequiredMixin, generic.ListView):
+class IngredientListView(ConditionalGetMixin,
+                         CursorPaginationMixin,
+                         LoginRequiredMixin,
+                         generic.ListView):
     model = Ingredient
     context_object_name = "ingredient_list"
     template_name = "kitchen/ingredient_list.html"
@@ -240,13 +483,16 @@ class IngredientListView(LoginRequiredMixin, generic.ListView):
     def get_queryset(self):
         name = self.request.GET.get("name")
         if name:
-            return Ingredient.objects.filter(name__icontains=name)
+            return search(Ingredient.objects.all(), name)
         return Ingredient.objects.all()
 
 
-class IngredientDetailView(LoginRequiredMixin, generic.DetailView):
+class IngredientDetailView(ConditionalGetMixin,
+                           LoginRequiredMixin,
+                           generic.DetailView):
     model = Ingredient
     queryset = Ingredient.objects.all().prefetch_related("dishes")
+    conditional_related = ["dishes"]
 
 
 class IngredientCreateView(GroupRequiredMixin,
@@ -280,7 +526,10 @@ class IngredientDeleteView(GroupRequiredMixin,
     success_url = reverse_lazy("kitchen:ingredient-list")
 
 
-class CookListView(LoginRequiredMixin, generic.ListView):
+class CookListView(ConditionalGetMixin,
+                   CursorPaginationMixin,
+                   LoginRequiredMixin,
+                   generic.ListView):
     model = Cook
     context_object_name = "cook_list"
     template_name = "kitchen/cook_list.html"
@@ -292,27 +541,32 @@ class CookListView(LoginRequiredMixin, generic.ListView):
         context["search_form"] = CookSearchForm(
             initial={"username": username}
         )
+        user = self.request.user
+        context["can_export"] = CookExportView().has_group_permission(user)
+        context["can_balance"] = CookAssignmentView().has_group_permission(
+            user
+        )
         return context
 
     def get_queryset(self):
         username = self.request.GET.get("username")
         if username:
-            return Cook.objects.filter(username__icontains=username)
+            return search(Cook.objects.all(), username)
         return Cook.objects.all()
 
 
-class CookDetailView(LoginRequiredMixin, generic.DetailView):
+class CookDetailView(ConditionalGetMixin,
+                     LoginRequiredMixin,
+                     generic.DetailView):
     model = Cook
-    queryset = Cook.objects.all().prefetch_related("dishes")
+    queryset = Cook.objects.all().prefetch_related("dishes__dishtype")
+    conditional_related = ["dishes", "dishes__dishtype"]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        cook = self.object
-        try:
-            cook_group = cook.groups.first()  # Assuming one group per cook
-        except Exception:
-            cook_group = None
-        context["cook_group"] = cook_group
+        # Assuming one group per cook
+        group_names = get_user_group_names(self.object)
+        context["cook_group"] = group_names[0] if group_names else None
         return context
 
 
@@ -325,6 +579,62 @@ class CookCreateView(GroupRequiredMixin,
     reverse_lazy = reverse_lazy("kitchen:cook-list")
 
 
+class CookExportView(GroupRequiredMixin,
+                     StreamingExportMixin,
+                     LoginRequiredMixin,
+                     generic.View):
+    group_required = ["manager"]
+    export_name = "cooks"
+
+
+class CookAssignmentView(GroupRequiredMixin,
+                         LoginRequiredMixin,
+                         generic.FormView):
+    """
+    Preview a balanced dish assignment on GET, apply it on POST. The POST
+    carries the digest of the plan previewed and is refused when the
+    plan has changed since, the new plan is shown instead.
+    """
+    group_required = ["manager"]
+    form_class = CookAssignmentForm
+    template_name = "kitchen/cook_assignment.html"
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        if self.request.method == "GET" and self.request.GET:
+            kwargs["data"] = self.request.GET
+        return kwargs
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if "plan" in context:
+            return context
+        form = context["form"]
+        cooks_per_dish = (
+            form.cleaned_data["cooks_per_dish"]
+            if form.is_bound and form.is_valid()
+            else form.fields["cooks_per_dish"].initial
+        )
+        context["plan"] = assignment.plan(cooks_per_dish)
+        return context
+
+    def form_valid(self, form):
+        applied = assignment.plan(form.cleaned_data["cooks_per_dish"])
+        if self.request.POST.get("plan") != applied.digest:
+            form.add_error(
+                None,
+                "The plan has changed since the preview, "
+                "check it and apply again.",
+            )
+            return self.render_to_response(
+                self.get_context_data(form=form, plan=applied)
+            )
+        changed = assignment.apply(applied)
+        return self.render_to_response(self.get_context_data(
+            form=form, applied=len(changed), dropped=applied.dropped
+        ))
+
+
 class CookUpdateView(GroupRequiredMixin,
                      LoginRequiredMixin,
                      generic.UpdateView):
@@ -343,3 +653,43 @@ class CookDeleteView(GroupRequiredMixin,
     group_required = ["manager"]
     model = Cook
     success_url = reverse_lazy("kitchen:cook-list")
+
+
+class TicketBoardView(LoginRequiredMixin, generic.TemplateView):
+    template_name = "kitchen/ticket_board.html"
+    upcoming = 10
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["queued_count"] = tickets.queued().count()
+        context["upcoming"] = tickets.queued().select_related("dish")[
+            :self.upcoming
+        ]
+        context["my_tickets"] = OrderTicket.objects.filter(
+            cook=self.request.user, status=OrderTicket.IN_PROGRESS
+        ).select_related("dish")
+        context["station"] = self.request.session.get("ticket_station", "")
+        return context
+
+
+class TicketClaimView(GroupRequiredMixin,
+                      LoginRequiredMixin,
+                      generic.View):
+
+    def post(self, request):
+        station = request.POST.get("station", "").strip()[:64]
+        request.session["ticket_station"] = station
+        tickets.claim(request.user, station)
+        return HttpResponseRedirect(reverse("kitchen:ticket-board"))
+
+
+class TicketDoneView(GroupRequiredMixin,
+                     LoginRequiredMixin,
+                     generic.View):
+
+    def post(self, request, pk):
+        if request.POST.get("action") == "release":
+            tickets.release(request.user, [pk])
+        else:
+            tickets.complete(request.user, [pk])
+        return HttpResponseRedirect(reverse("kitchen:ticket-board"))
@@ -0,0 +1,148 @@
+"""
+Home page visit counts, buffered in memory and written in batches.
+
+``record`` adds a visit to the buffer of the process instead of writing
+the session. Once ``KITCHEN_VISIT_FLUSH_SECONDS`` have passed since the
+last flush, or ``MAX_PENDING`` cooks have visits waiting, the next visit
+writes the whole buffer to VisitCounter: one INSERT of the missing rows
+and one UPDATE per distinct increment, whatever the number of visits.
+
+A cook's count is the stored row plus what this process still holds, so
+the visits other workers buffered show up once they flush. Visits still
+buffered when a worker exits are lost.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from kitchen.models import VisitCounter
+
+
+FLUSH_SECONDS = 10
+# Keeps the user id lists of a flush well below SQLite's parameter limit
+MAX_PENDING = 500
+
+
+class VisitBuffer:
+    """Visits per user id not written yet, shared by the threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+
+    def add(self, user_id, count, interval):
+        """Buffer ``count`` visits, true once a flush is due."""
+        with self.lock:
+            self.pending[user_id] += count
+            return (
+                len(self.pending) >= MAX_PENDING
+                or time.monotonic() - self.flushed_at >= interval
+            )
+
+    def get(self, user_id):
+        with self.lock:
+            return self.pending.get(user_id, 0)
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+            return pending
+
+    def restore(self, pending):
+        with self.lock:
+            self.pending.update(pending)
+
+
+_buffer = VisitBuffer()
+
+
+def flush_interval():
+    return getattr(settings, "KITCHEN_VISIT_FLUSH_SECONDS", FLUSH_SECONDS)
+
+
+def write(pending):
+    now = timezone.now()
+    with transaction.atomic():
+        # Cooks deleted since their visit are dropped
+        existing = list(
+            get_user_model().objects.filter(
+                pk__in=list(pending)
+            ).values_list("pk", flat=True)
+        )
+        VisitCounter.objects.bulk_create(
+            [VisitCounter(user_id=pk) for pk in existing],
+            ignore_conflicts=True,
+        )
+        by_count = defaultdict(list)
+        for pk in existing:
+            by_count[pending[pk]].append(pk)
+        for count, pks in by_count.items():
+            VisitCounter.objects.filter(user_id__in=pks).update(
+                visits=F("visits") + count, updated_at=now
+            )
+
+
+def flush():
+    """Write the buffered visits of this process, return how many."""
+    pending = _buffer.take()
+    if not pending:
+        return 0
+    try:
+        write(pending)
+    except DatabaseError:
+        _buffer.restore(pending)
+        raise
+    return sum(pending.values())
+
+
+def clear():
+    """Forget the buffered visits, for tests."""
+    _buffer.take()
+
+
+def get_visits(user):
+    pending = _buffer.get(user.pk)
+    stored = VisitCounter.objects.filter(
+        user_id=user.pk
+    ).values_list("visits", flat=True).first()
+    return (stored or 0) + pending
+
+
+async def aget_visits(user):
+    pending = _buffer.get(user.pk)
+    stored = await VisitCounter.objects.filter(
+        user_id=user.pk
+    ).values_list("visits", flat=True).afirst()
+    return (stored or 0) + pending
+
+
+def record(user, carried=0):
+    """
+    Count a visit of ``user``, plus ``carried`` visits counted elsewhere,
+    and return the visits before this one.
+    """
+    if _buffer.add(user.pk, 1 + carried, flush_interval()):
+        try:
+            flush()
+        except DatabaseError:
+            # Back in the buffer for the next visit to write
+            pass
+    return get_visits(user) - 1
+
+
+async def arecord(user, carried=0):
+    if _buffer.add(user.pk, 1 + carried, flush_interval()):
+        try:
+            await sync_to_async(flush)()
+        except DatabaseError:
+            pass
+    return await aget_visits(user) - 1
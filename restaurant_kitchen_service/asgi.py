@@ -14,4 +14,10 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE",
                       "restaurant_kitchen_service.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once get_asgi_application() has set Django up
+from kitchen.live import LiveEventsRouter  # noqa: E402
+
+# Event streams are answered before Django's middleware, see kitchen.live
+application = LiveEventsRouter(django_application)
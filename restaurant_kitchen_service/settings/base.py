@@ -41,7 +41,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "kitchen.middleware.WhiteNoiseMiddleware",
+    "kitchen.middleware.MetricsMiddleware",
+    "kitchen.middleware.SlowQueryMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -116,6 +118,15 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# collectstatic only takes the files the templates reference from
+# STATICFILES_DIRS and these apps, see kitchen.assets
+STATICFILES_FINDERS = [
+    "kitchen.assets.PrunedFileSystemFinder",
+    "kitchen.assets.PrunedAppDirectoriesFinder",
+]
+
+KITCHEN_PRUNED_STATIC_APPS = ["theme_pixel"]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -124,3 +135,40 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "kitchen.Cook"
 
 LOGIN_REDIRECT_URL = "/"
+
+# Sessions are read from the cache and only written when they change,
+# purge expired rows with "manage.py purge_sessions"
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+KITCHEN_SEARCH_BACKEND = "kitchen.search.SearchBackend"
+
+# Serve dish list and detail pages from the denormalised MenuCard rows
+KITCHEN_MENU_CARDS = False
+
+# How often each process writes the home page visits it buffered
+KITCHEN_VISIT_FLUSH_SECONDS = 10
+
+# Share of cached fragment renders counted for "manage.py
+# fragment_cache_stats"
+KITCHEN_FRAGMENT_STATS_SAMPLE = float(
+    os.environ.get("KITCHEN_FRAGMENT_STATS_SAMPLE", 0.01)
+)
+
+# Reaches the live event streams of this process only, see kitchen.live
+KITCHEN_LIVE_BROKER = "kitchen.live.LocalBroker"
+
+# Request metrics on /metrics stay in this process unless a directory
+# shared by the workers is given, see kitchen.metrics
+KITCHEN_METRICS_DIR = os.environ.get("KITCHEN_METRICS_DIR")
+
+# Prometheus must send it as "Authorization: Bearer <token>". Without it
+# /metrics is only served with DEBUG on
+KITCHEN_METRICS_TOKEN = os.environ.get("KITCHEN_METRICS_TOKEN")
+
+# Queries slower than KITCHEN_SLOW_QUERY_MS are logged to this JSONL file,
+# see kitchen.slow_queries. Off when unset
+KITCHEN_SLOW_QUERY_LOG = os.environ.get("KITCHEN_SLOW_QUERY_LOG")
+KITCHEN_SLOW_QUERY_MS = int(os.environ.get("KITCHEN_SLOW_QUERY_MS", 100))
+KITCHEN_SLOW_QUERY_SAMPLE = float(
+    os.environ.get("KITCHEN_SLOW_QUERY_SAMPLE", 1.0)
+)
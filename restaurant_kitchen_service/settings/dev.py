@@ -12,5 +12,15 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "OPTIONS": {
+            # Readers keep reading while a station claims tickets, and
+            # writers queue on BEGIN instead of failing halfway through
+            "init_command": (
+                "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;"
+            ),
+            "transaction_mode": "IMMEDIATE",
+        },
     }
 }
+
+KITCHEN_SEARCH_BACKEND = "kitchen.search.SQLiteFTSSearchBackend"
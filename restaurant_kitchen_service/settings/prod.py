@@ -22,3 +22,74 @@ DATABASES = {
         "PORT": int(os.environ["POSTGRES_DB_PORT"]),
     }
 }
+
+INSTALLED_APPS += ["django.contrib.postgres"]
+
+KITCHEN_SEARCH_BACKEND = "kitchen.search.PostgresSearchBackend"
+
+KITCHEN_MENU_CARDS = os.environ.get("KITCHEN_MENU_CARDS", "true") == "true"
+
+# Live streams are only served under ASGI, start.sh runs WSGI and pages
+# fall back to polling, so events stay in the process instead of costing
+# a pg_notify per change. Set kitchen.live.PostgresBroker when running
+# several ASGI workers so that their events reach every stream
+KITCHEN_LIVE_BROKER = os.environ.get(
+    "KITCHEN_LIVE_BROKER", "kitchen.live.LocalBroker"
+)
+
+# Shared between gunicorn workers so that signal-driven invalidation made
+# in one worker is seen by the others. Redis increments the version and
+# generation numbers atomically and evicts the least recently used keys
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    # Files cull a random share of the entries once MAX_ENTRIES is reached,
+    # so sessions and the version numbers get caches of their own that
+    # fragments and cached rows cannot push out. Their increments are not
+    # atomic, use Redis with more than one worker
+    CACHE_DIR = os.environ.get("DJANGO_CACHE_DIR", str(BASE_DIR / ".cache"))
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(CACHE_DIR, "default"),
+            "OPTIONS": {"MAX_ENTRIES": 5000, "CULL_FREQUENCY": 4},
+        },
+        "state": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(CACHE_DIR, "state"),
+            "TIMEOUT": None,
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        },
+        "sessions": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(CACHE_DIR, "sessions"),
+            "TIMEOUT": None,
+            "OPTIONS": {"MAX_ENTRIES": 20000, "CULL_FREQUENCY": 10},
+        },
+    }
+    KITCHEN_STATE_CACHE = "state"
+    SESSION_CACHE_ALIAS = "sessions"
+
+# Hashed file names served with far-future caching, with gzip and brotli
+# copies made by collectstatic
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "kitchen.assets.CompressedManifestStorage",
+    },
+}
+
+WHITENOISE_KEEP_ONLY_HASHED_FILES = True
+
+# Every gunicorn worker writes its request metrics here and /metrics adds
+# them up. start.sh empties the directory before the workers start
+KITCHEN_METRICS_DIR = os.environ.get(
+    "KITCHEN_METRICS_DIR", str(BASE_DIR / ".metrics")
+)
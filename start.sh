@@ -0,0 +1,10 @@
+#!/usr/bin/env bash
+# Exit on error
+set -o errexit
+
+# Metrics files of the previous workers would be added up again
+python manage.py clear_metrics
+
+# WSGI: live screens poll every 30 seconds, streams need the ASGI
+# application (see README)
+exec gunicorn restaurant_kitchen_service.wsgi:application
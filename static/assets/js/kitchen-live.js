@@ -0,0 +1,53 @@
+/*
+ * Reloads a kitchen page when a change it shows is published on the live
+ * event stream. Reloads revalidate with the page's ETag, so an unchanged
+ * page costs a 304.
+ */
+(function () {
+  var config = document.getElementById("kitchen-live");
+  if (!config || !window.EventSource || !window.fetch) {
+    return;
+  }
+  var topics = config.dataset.topics.split(" ");
+  var pending = null;
+
+  function reload() {
+    if (pending === null) {
+      // Changes usually come in bursts, reload once for all of them
+      pending = setTimeout(function () {
+        window.location.reload();
+      }, 500);
+    }
+  }
+
+  function connect() {
+    fetch(config.dataset.tokenUrl, {credentials: "same-origin", cache: "no-store"})
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(response.status);
+        }
+        return response.json();
+      })
+      .then(function (data) {
+        var query = new URLSearchParams({token: data.token, topics: topics.join(",")});
+        if (config.dataset.dish) {
+          query.set("dish", config.dataset.dish);
+        }
+        var source = new EventSource(data.url + "?" + query.toString());
+        topics.concat(["reload"]).forEach(function (topic) {
+          source.addEventListener(topic, reload);
+        });
+        source.onerror = function () {
+          // Closed for good, e.g. the token expired: ask for a new one
+          if (source.readyState === EventSource.CLOSED) {
+            setTimeout(connect, 5000);
+          }
+        };
+      })
+      .catch(function () {
+        setTimeout(connect, 30000);
+      });
+  }
+
+  connect();
+})();